@@ -2,6 +2,8 @@
 set -e
 
 flutter pub get
-flutter pub global run intl_utils:generate
+# Regenerate only the message files whose ARB changed; the full intl_utils run
+# is the fallback (no Python, or ICU plural/select messages)
+python3 scripts/generate_messages.py || flutter pub global run intl_utils:generate
 
 echo "Build Data Done !!!"
\ No newline at end of file
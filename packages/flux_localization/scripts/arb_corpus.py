@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Load every ARB file of the l10n directory once into a shared key x locale index
+"""
+
+import argparse
+import json
+import logging
+import sys
+import time
+import tracemalloc
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from arb_io import write_arb
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_L10N_DIR = Path(__file__).resolve().parent.parent / 'lib' / 'src' / 'l10n'
+
+def locale_of(path: Path) -> str:
+    """Language code of an ``intl_<code>.arb`` file."""
+    return Path(path).stem.replace('intl_', '')
+
+def _read_arb(path: Path) -> Tuple[bytes, Dict[str, str]]:
+    raw = path.read_bytes()
+    return raw, json.loads(raw.decode('utf-8'))
+
+class ArbCorpus:
+    """Every ``intl_*.arb`` file of a directory, parsed once.
+
+    Keys are interned into one shared list and each locale stores its values
+    as a column aligned with that list (``None`` where the key is absent),
+    plus the key order of its file. Queries such as missing keys or values
+    identical to English are answered from the columns, and ``data`` rebuilds
+    a file's dict in its original order when it is needed for a write.
+    """
+
+    def __init__(self, l10n_dir: str, base_locale: str = 'en'):
+        self.l10n_dir = Path(l10n_dir)
+        self.base_locale = base_locale
+        self.paths: Dict[str, Path] = {}
+
+        self.keys: List[str] = []
+        self._key_ids: Dict[str, int] = {}
+        self._values: Dict[str, List[Optional[str]]] = {}
+        self._order: Dict[str, array] = {}
+        self._raw: Dict[str, bytes] = {}
+
+    @classmethod
+    def load(cls, l10n_dir: str, base_locale: str = 'en', workers: int = 8) -> 'ArbCorpus':
+        """Read and parse every ARB file of ``l10n_dir`` in parallel."""
+        corpus = cls(l10n_dir, base_locale)
+        paths = sorted(corpus.l10n_dir.glob('intl_*.arb'))
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            parsed = list(pool.map(_read_arb, paths))
+
+        # Base file first so the shared key list follows its order
+        entries = sorted(zip(paths, parsed), key=lambda entry: locale_of(entry[0]) != base_locale)
+        for path, (raw, data) in entries:
+            corpus._add(locale_of(path), path, raw, data)
+
+        logger.info(f"Loaded {len(paths)} ARB files ({len(corpus.keys)} keys) in "
+                    f"{(time.perf_counter() - start) * 1000:.0f} ms")
+        return corpus
+
+    def _key_id(self, key: str) -> int:
+        """Id of a key, interning and registering it on first sight."""
+        key_id = self._key_ids.get(key)
+        if key_id is None:
+            key_id = len(self.keys)
+            key = sys.intern(key)
+            self.keys.append(key)
+            self._key_ids[key] = key_id
+            for column in self._values.values():
+                column.append(None)
+        return key_id
+
+    def _add(self, locale: str, path: Path, raw: bytes, data: Dict[str, str]):
+        key_ids = list(map(self._key_ids.get, data))
+        if None in key_ids:
+            key_ids = [self._key_id(key) if key_id is None else key_id for key, key_id in zip(data, key_ids)]
+        order = array('I', key_ids)
+        column: List[Optional[str]] = [None] * len(self.keys)
+        for key_id, value in zip(key_ids, data.values()):
+            column[key_id] = value
+
+        self.paths[locale] = path
+        self._values[locale] = column
+        self._order[locale] = order
+        self._raw[locale] = raw
+
+    @property
+    def locales(self) -> List[str]:
+        """All loaded locales, base locale first."""
+        return list(self._values)
+
+    @property
+    def target_locales(self) -> List[str]:
+        return [locale for locale in self._values if locale != self.base_locale]
+
+    def has(self, locale: str, key: str) -> bool:
+        key_id = self._key_ids.get(key)
+        return key_id is not None and self._values[locale][key_id] is not None
+
+    def get(self, locale: str, key: str, default: Optional[str] = None) -> Optional[str]:
+        key_id = self._key_ids.get(key)
+        if key_id is None:
+            return default
+        value = self._values[locale][key_id]
+        return default if value is None else value
+
+    def keys_of(self, locale: str) -> List[str]:
+        """Keys of a locale in file order."""
+        return [self.keys[key_id] for key_id in self._order[locale]]
+
+    def data(self, locale: str) -> Dict[str, str]:
+        """A fresh ``{key: value}`` dict of a locale in file order."""
+        column = self._values[locale]
+        return {self.keys[key_id]: column[key_id] for key_id in self._order[locale]}
+
+    def raw_bytes(self, locale: str) -> bytes:
+        """The file content as it was last read or written."""
+        return self._raw[locale]
+
+    def translatable(self) -> Dict[str, str]:
+        """The base locale's translatable ``{key: value}`` pairs (everything except ``@@locale``)."""
+        return {key: value for key, value in self.data(self.base_locale).items() if key != '@@locale'}
+
+    def missing_keys(self, locale: str) -> List[str]:
+        """Base keys absent from a locale, in base file order."""
+        column = self._values[locale]
+        return [self.keys[key_id] for key_id in self._order[self.base_locale] if column[key_id] is None]
+
+    def extra_keys(self, locale: str) -> List[str]:
+        """Keys of a locale that the base file no longer has."""
+        base = self._values[self.base_locale]
+        return [self.keys[key_id] for key_id in self._order[locale] if base[key_id] is None]
+
+    def identical_to_base(self, locale: str) -> List[str]:
+        """Keys whose value is still exactly the English text (untranslated or language-neutral)."""
+        base = self._values[self.base_locale]
+        column = self._values[locale]
+        return [self.keys[key_id] for key_id in self._order[locale]
+                if base[key_id] is not None and column[key_id] == base[key_id] and self.keys[key_id] != '@@locale']
+
+    def changed_keys(self, locale: str, manifest, base_hashes: Dict[str, str]) -> List[str]:
+        """Keys whose English value changed since the locale's last sync according to ``manifest``."""
+        return manifest.changed_keys(locale, base_hashes, self.keys_of(locale))
+
+    def update(self, locale: str, data: Dict[str, str], raw: Optional[bytes] = None):
+        """Replace the indexed content of a locale after its file changed."""
+        if raw is None:
+            raw = json.dumps(data, ensure_ascii=False, indent='\t').encode('utf-8')
+        self._add(locale, self.paths.get(locale, self.l10n_dir / f'intl_{locale}.arb'), raw, data)
+
+    def write(self, locale: str, data: Dict[str, str]):
+        """Atomically write a locale's ARB file and refresh the index."""
+        path = self.paths.get(locale, self.l10n_dir / f'intl_{locale}.arb')
+        write_arb(str(path), data)
+        self.update(locale, data)
+
+    def locale_for(self, path: str) -> Optional[str]:
+        """Locale of a file path if the file belongs to this corpus."""
+        locale = locale_of(Path(path))
+        loaded = self.paths.get(locale)
+        return locale if loaded is not None and loaded.resolve() == Path(path).resolve() else None
+
+    def select(self, languages: Optional[Iterable[str]]) -> List[str]:
+        """Target locales matching ``languages`` exactly or as a prefix (``zh`` matches ``zh_CN``)."""
+        if not languages:
+            return self.target_locales
+        languages = list(languages)
+        return [locale for locale in self.locales
+                if any(locale == lang or locale.startswith(lang + '_') for lang in languages)]
+
+    def summary(self) -> List[Dict[str, object]]:
+        """Per-locale key, missing, extra and identical-to-English counts."""
+        return [{
+            'locale': locale,
+            'keys': len(self._order[locale]),
+            'missing': len(self.missing_keys(locale)),
+            'extra': len(self.extra_keys(locale)),
+            'identical': len(self.identical_to_base(locale)),
+        } for locale in self.target_locales]
+
+def measure(l10n_dir: str, workers: int, repeat: int):
+    """Compare per-file json.load dicts with the corpus on load time and retained memory."""
+    paths = sorted(Path(l10n_dir).glob('intl_*.arb'))
+    size = sum(path.stat().st_size for path in paths)
+
+    def load_dicts():
+        result = {}
+        for path in paths:
+            with open(path, 'r', encoding='utf-8') as f:
+                result[locale_of(path)] = json.load(f)
+        return result
+
+    def best_time(load) -> float:
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            load()
+            times.append(time.perf_counter() - start)
+        return min(times)
+
+    def retained(load) -> int:
+        tracemalloc.start()
+        loaded = load()
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del loaded
+        return current
+
+    def load_corpus_only():
+        corpus = ArbCorpus.load(l10n_dir, workers=workers)
+        corpus._raw.clear()
+        return corpus
+
+    print(f"Corpus: {len(paths)} files, {size / 1024 / 1024:.1f} MB")
+    print(f"json.load per file, serial:  {best_time(load_dicts) * 1000:7.1f} ms, "
+          f"{retained(load_dicts) / 1024 / 1024:6.1f} MB retained")
+    print(f"ArbCorpus, 1 worker:         {best_time(lambda: ArbCorpus.load(l10n_dir, workers=1)) * 1000:7.1f} ms")
+    print(f"ArbCorpus, {workers} workers:        {best_time(lambda: ArbCorpus.load(l10n_dir, workers=workers)) * 1000:7.1f} ms, "
+          f"{retained(lambda: ArbCorpus.load(l10n_dir, workers=workers)) / 1024 / 1024:6.1f} MB retained "
+          f"({retained(load_corpus_only) / 1024 / 1024:.1f} MB without raw file bytes)")
+
+def main():
+    parser = argparse.ArgumentParser(description='Summarize the ARB corpus or measure loading it')
+    parser.add_argument('--l10n-dir', default=str(DEFAULT_L10N_DIR), help='Directory containing intl_*.arb files')
+    parser.add_argument('--workers', type=int, default=8, help='Parallel file readers (default: 8)')
+    parser.add_argument('--measure', action='store_true', help='Measure load time and memory instead of summarizing')
+    parser.add_argument('--repeat', type=int, default=5, help='Timing repetitions for --measure (default: 5)')
+
+    args = parser.parse_args()
+
+    if args.measure:
+        measure(args.l10n_dir, args.workers, args.repeat)
+        return
+
+    corpus = ArbCorpus.load(args.l10n_dir, workers=args.workers)
+    print(f"{'locale':<8} {'keys':>6} {'missing':>8} {'extra':>6} {'identical':>10}")
+    for row in corpus.summary():
+        print(f"{row['locale']:<8} {row['keys']:>6} {row['missing']:>8} {row['extra']:>6} {row['identical']:>10}")
+
+if __name__ == "__main__":
+    main()
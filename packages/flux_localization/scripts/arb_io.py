@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Crash-safe writes for ARB files and local run state
+"""
+
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Dict
+
+def atomic_write_bytes(path: str, content: bytes):
+    """Replace ``path`` with ``content`` so readers only ever see the old or the new content.
+
+    The content goes to a temporary file in the same directory, is flushed to
+    disk and then renamed over the target, so an interrupted run cannot leave
+    a truncated file behind.
+    """
+    path = Path(path)
+    fd, tmp_path = tempfile.mkstemp(dir=str(path.parent), prefix=f'.{path.name}.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        if path.exists():
+            os.chmod(tmp_path, path.stat().st_mode & 0o777)
+        else:
+            os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+def atomic_write_text(path: str, text: str):
+    """Atomically replace ``path`` with ``text`` encoded as UTF-8."""
+    atomic_write_bytes(path, text.encode('utf-8'))
+
+def write_arb(path: str, data: Dict[str, str]):
+    """Write an ARB file in the repository format (tab indented, UTF-8) atomically."""
+    atomic_write_text(path, json.dumps(data, ensure_ascii=False, indent='\t'))
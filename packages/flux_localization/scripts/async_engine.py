@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Concurrent asyncio translation engine shared by the translation scripts
+"""
+
+import asyncio
+import logging
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+import openai
+
+from batch_recovery import bisect_recover_async, salvage_translations
+from streaming_json import StreamResult, consume_stream_async
+
+logger = logging.getLogger(__name__)
+
+class AsyncTranslationEngine:
+    """Run batch translations for many locales at once.
+
+    The engine reuses the prompt building and response parsing of the wrapped
+    translator (``OptimizedTranslator`` or ``Retranslator``) so the async and
+    serial paths produce the same requests and accept the same responses.
+    """
+
+    def __init__(self, translator, max_in_flight: int = 16, per_locale_limit: int = 4, max_retries: int = 2):
+        if max_in_flight < 1 or per_locale_limit < 1:
+            raise ValueError("Concurrency limits must be at least 1")
+
+        self.translator = translator
+        self.max_in_flight = max_in_flight
+        self.per_locale_limit = per_locale_limit
+        self.max_retries = max_retries
+
+        self.client: Optional[openai.AsyncAzureOpenAI] = None
+        self._global_limit: Optional[asyncio.Semaphore] = None
+        self._locale_limits: Dict[str, asyncio.Semaphore] = {}
+
+    async def _complete(self, locale: str, request_kwargs: Dict, call=None) -> str:
+        """Send one chat completion through the rate limiter while holding the per-locale and global slots."""
+        # Take the per-locale slot first so a locale waiting on its own limit
+        # never sits on a global slot another locale could use.
+        async with self._locale_limits[locale], self._global_limit:
+            response = await self.translator.rate_limiter.create_async(self.client, request_kwargs, call)
+        return response.choices[0].message.content.strip()
+
+    async def _stream_batch(self, locale: str, texts: Dict[str, str], call=None) -> StreamResult:
+        """Stream one batch request, holding the slots until the stream is consumed."""
+        language_name = self.translator.language_names.get(locale, locale)
+        request_kwargs = {**self.translator._batch_request_kwargs(texts, language_name, locale), "stream": True}
+        async with self._locale_limits[locale], self._global_limit:
+            stream = await self.translator.rate_limiter.create_async(self.client, request_kwargs, call)
+            return await consume_stream_async(stream, texts, call)
+
+    async def _translate_batch(self, locale: str, batch_idx: int, texts: Dict[str, str]) -> Tuple[Dict[str, str], bool]:
+        """Translate one batch, recovering failed keys by concurrent bisection."""
+        language_name = self.translator.language_names.get(locale, locale)
+        salvaged: Dict[str, str] = {}
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                logger.debug(f"[{locale}] API call for batch {batch_idx} (attempt {attempt + 1})")
+                with self.translator.metrics.call(locale, 'batch', attempt + 1, len(texts)) as call:
+                    if self.translator.stream:
+                        streamed = await self._stream_batch(locale, texts, call)
+                        response_text = streamed.text
+                        translations = streamed.ordered() if streamed.complete else None
+                    else:
+                        response_text = await self._complete(
+                            locale, self.translator._batch_request_kwargs(texts, language_name, locale), call)
+                        translations = self.translator._parse_json_response(response_text, texts, call)
+
+                if translations:
+                    return translations, True
+
+                logger.warning(f"[{locale}] Batch {batch_idx} attempt {attempt + 1}: Invalid or incomplete response")
+                partial = streamed.translations if self.translator.stream else salvage_translations(response_text, texts)
+                if len(partial) > len(salvaged):
+                    salvaged = partial
+                if salvaged:
+                    # Keep the usable keys and let recovery request only the rest
+                    break
+            except Exception as e:
+                logger.warning(f"[{locale}] Batch {batch_idx} attempt {attempt + 1} failed: {str(e)}")
+
+            if attempt < self.max_retries:
+                await asyncio.sleep(self.translator.rate_limiter.backoff_delay(attempt))
+
+        logger.warning(f"⚠️ [{locale}] Batch {batch_idx} failed, kept {len(salvaged)}/{len(texts)} keys; "
+                       f"recovering the rest by bisection")
+        translations = await bisect_recover_async(
+            texts, salvaged,
+            lambda pending: self._request_batch_partial(locale, pending),
+            lambda text: self._translate_single(locale, text),
+            self.translator.recovery_stats,
+            lambda key, method: self.translator._note(locale, [key], method))
+        self.translator._note(locale, translations, 'recovery')
+        return translations, False
+
+    async def _request_batch_partial(self, locale: str, texts: Dict[str, str]) -> Dict[str, str]:
+        """Make one batch call and return whichever keys came back usable."""
+        language_name = self.translator.language_names.get(locale, locale)
+        try:
+            with self.translator.metrics.call(locale, 'recovery', keys=len(texts)) as call:
+                if self.translator.stream:
+                    return (await self._stream_batch(locale, texts, call)).ordered()
+                response_text = await self._complete(
+                    locale, self.translator._batch_request_kwargs(texts, language_name, locale), call)
+                translations = self.translator._parse_json_response(response_text, texts, call)
+                if translations:
+                    return {key: translations[key] for key in texts}
+                call.parse = 'salvaged'
+                return salvage_translations(response_text, texts)
+        except Exception as e:
+            logger.warning(f"[{locale}] Recovery call for {len(texts)} keys failed: {str(e)}")
+            return {}
+
+    async def _translate_single(self, locale: str, text: str) -> Optional[str]:
+        """Translate one text, returning None on failure like the serial path."""
+        language_name = self.translator.language_names.get(locale, locale)
+        try:
+            with self.translator.metrics.call(locale, 'single') as call:
+                response_text = await self._complete(
+                    locale, self.translator._single_request_kwargs(text, language_name), call)
+            return self.translator._clean_single_translation(response_text)
+        except Exception as e:
+            logger.error(f"[{locale}] Single translation failed for '{text}': {str(e)}")
+            return None
+
+    async def _translate_locale(self, locale: str, texts: Dict[str, str], batch_size: int,
+                                on_locale_done: Optional[Callable[[str, Dict[str, str]], None]]) -> Dict[str, str]:
+        """Translate every batch of one locale and merge the results in batch order."""
+        translations, texts = self.translator._recall(texts, locale)
+
+        text_items = list(texts.items())
+        if self.translator.adaptive_batching:
+            # Batches run concurrently, so they are packed up front with the
+            # token budget instead of adapting between calls
+            batches = self.translator._get_batcher(locale, batch_size).pack_all(text_items)
+        else:
+            batches = [dict(text_items[i:i + batch_size]) for i in range(0, len(text_items), batch_size)]
+
+        logger.info(f"Translating {len(texts)} texts to {locale} in {len(batches)} batches")
+
+        async def run_batch(batch_idx: int, batch: Dict[str, str]) -> Tuple[Dict[str, str], bool]:
+            started = time.perf_counter()
+            batch_translations, ok = await self._translate_batch(locale, batch_idx, batch)
+            self.translator.batch_latencies.append(time.perf_counter() - started)
+            # Journal each batch as it completes, not when the whole locale is done
+            self.translator._checkpoint(batch, batch_translations, locale)
+            return batch_translations, ok
+
+        results = await asyncio.gather(*(
+            run_batch(batch_idx, batch)
+            for batch_idx, batch in enumerate(batches, 1)
+        ))
+
+        # gather() preserves submission order, so the merge is deterministic
+        # regardless of which batch finished first.
+        for batch, (batch_translations, ok) in zip(batches, results):
+            translations.update(batch_translations)
+            if ok:
+                self.translator._remember_batch(batch, batch_translations, locale)
+
+        batch_success_count = sum(1 for _, ok in results if ok)
+        logger.info(f"✅ [{locale}] {batch_success_count}/{len(batches)} batches succeeded, "
+                    f"{len(batches) - batch_success_count} recovered")
+
+        if on_locale_done:
+            on_locale_done(locale, translations)
+
+        return translations
+
+    async def translate_all_async(self, jobs: Dict[str, Dict[str, str]], batch_size: int,
+                                  on_locale_done: Optional[Callable[[str, Dict[str, str]], None]] = None) -> Dict[str, Dict[str, str]]:
+        """Translate ``{locale: {key: text}}`` jobs concurrently."""
+        # The async client and semaphores belong to the running event loop,
+        # so they are created per run rather than in __init__.
+        self.client = openai.AsyncAzureOpenAI(
+            azure_endpoint=self.translator.azure_endpoint,
+            api_key=self.translator.api_key,
+            api_version=self.translator.api_version,
+            max_retries=0,
+            # The SDK's own client unless a pool size or HTTP/2 was asked for
+            **({'http_client': self.translator.transport.async_client()}
+               if self.translator.transport.configured else {})
+        )
+        self._global_limit = asyncio.Semaphore(self.max_in_flight)
+        self._locale_limits = {locale: asyncio.Semaphore(self.per_locale_limit) for locale in jobs}
+
+        locales: List[str] = list(jobs.keys())
+        try:
+            results = await asyncio.gather(*(
+                self._translate_locale(locale, jobs[locale], batch_size, on_locale_done)
+                for locale in locales
+            ))
+        finally:
+            await self.client.close()
+
+        return dict(zip(locales, results))
+
+    def translate_all(self, jobs: Dict[str, Dict[str, str]], batch_size: int,
+                      on_locale_done: Optional[Callable[[str, Dict[str, str]], None]] = None) -> Dict[str, Dict[str, str]]:
+        """Blocking entry point used by the command line scripts."""
+        return asyncio.run(self.translate_all_async(jobs, batch_size, on_locale_done))
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Content-addressed backups of ARB files with per-run manifests
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import logging
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from arb_corpus import DEFAULT_L10N_DIR
+from arb_io import atomic_write_bytes, atomic_write_text
+from translation_memory import STATE_DIR
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BACKUP_DIR = STATE_DIR / 'backups'
+
+class BackupStore:
+    """Store every distinct file content once, keyed by its SHA-256.
+
+    Blobs live gzip-compressed under ``blobs/<first two hex digits>/``. Each
+    run that backs files up gets a small manifest under ``runs/`` mapping
+    file names to blob hashes. Backing up a file whose content is already
+    stored only adds a line to the run manifest; no blob is written.
+    """
+
+    def __init__(self, root: str = None):
+        self.root = Path(root) if root else DEFAULT_BACKUP_DIR
+        self.blob_dir = self.root / 'blobs'
+        self.run_dir = self.root / 'runs'
+
+        self.run_id: Optional[str] = None
+        self.run_label = ''
+        self.run_files: Dict[str, str] = {}
+        self.blobs_written = 0
+        self.blobs_reused = 0
+        self.bytes_written = 0
+
+    @staticmethod
+    def digest(content: bytes) -> str:
+        return hashlib.sha256(content).hexdigest()
+
+    def _blob_path(self, digest: str) -> Path:
+        return self.blob_dir / digest[:2] / f'{digest}.gz'
+
+    def _run_path(self, run_id: str) -> Path:
+        return self.run_dir / f'{run_id}.json'
+
+    def start_run(self, label: str = '') -> str:
+        """Open a new run manifest; later backups are recorded in it."""
+        now = time.time()
+        run_id = time.strftime('%Y%m%d-%H%M%S', time.localtime(now)) + f'.{int(now * 1000) % 1000:03d}'
+        # Ids sort by time; two runs in the same millisecond get a suffix
+        suffix = 1
+        self.run_id = run_id
+        while self._run_path(self.run_id).exists():
+            suffix += 1
+            self.run_id = f'{run_id}-{suffix}'
+        self.run_label = label
+        self.run_files = {}
+        return self.run_id
+
+    def backup(self, file_path: str, content: bytes) -> str:
+        """Back up ``content`` as the current version of ``file_path`` and return its hash."""
+        return self.backup_many({file_path: content})[Path(file_path).name]
+
+    def backup_many(self, contents: Dict[str, bytes]) -> Dict[str, str]:
+        """Back up several ``{file path: content}`` at once, saving the run manifest once."""
+        if self.run_id is None:
+            self.start_run()
+
+        digests = {}
+        for file_path, content in contents.items():
+            digest = self.digest(content)
+            self._store_blob(digest, content)
+            digests[Path(file_path).name] = digest
+
+        self.run_files.update(digests)
+        self._save_run()
+        return digests
+
+    def _store_blob(self, digest: str, content: bytes):
+        blob_path = self._blob_path(digest)
+        if blob_path.exists():
+            # Unchanged since some earlier backup: nothing to write
+            self.blobs_reused += 1
+            return
+
+        blob_path.parent.mkdir(parents=True, exist_ok=True)
+        compressed = gzip.compress(content, mtime=0)
+        # An existing blob is trusted as is, so it must never be seen half written
+        atomic_write_bytes(str(blob_path), compressed)
+        self.blobs_written += 1
+        self.bytes_written += len(compressed)
+
+    def _save_run(self):
+        self.run_dir.mkdir(parents=True, exist_ok=True)
+        manifest = {
+            'run': self.run_id,
+            'label': self.run_label,
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'files': dict(sorted(self.run_files.items())),
+        }
+        atomic_write_text(self._run_path(self.run_id), json.dumps(manifest, indent=1))
+
+    def runs(self) -> List[Dict]:
+        """All run manifests, oldest first."""
+        if not self.run_dir.exists():
+            return []
+        manifests = []
+        for path in sorted(self.run_dir.glob('*.json')):
+            with open(path, 'r', encoding='utf-8') as f:
+                manifests.append(json.load(f))
+        return manifests
+
+    def load_run(self, run_id: str) -> Dict:
+        """A run manifest by id; ``latest`` picks the most recent run."""
+        if run_id == 'latest':
+            runs = self.runs()
+            if not runs:
+                raise FileNotFoundError(f"No backup runs in {self.run_dir}")
+            return runs[-1]
+
+        path = self._run_path(run_id)
+        if not path.exists():
+            raise FileNotFoundError(f"Backup run not found: {run_id}")
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def read_blob(self, digest: str) -> bytes:
+        with open(self._blob_path(digest), 'rb') as f:
+            return gzip.decompress(f.read())
+
+    def restore(self, run_id: str, l10n_dir: str, file_names: Optional[List[str]] = None) -> int:
+        """Write the files of a run back into ``l10n_dir``, skipping files that already match."""
+        manifest = self.load_run(run_id)
+        restored = 0
+        for name, digest in manifest['files'].items():
+            if file_names and name not in file_names:
+                continue
+
+            target = Path(l10n_dir) / name
+            if target.exists() and self.digest(target.read_bytes()) == digest:
+                logger.info(f"Unchanged since backup: {name}")
+                continue
+
+            atomic_write_text(target, self.read_blob(digest).decode('utf-8'))
+            logger.info(f"Restored {name} from run {manifest['run']}")
+            restored += 1
+        return restored
+
+    def prune(self, keep: int) -> int:
+        """Drop all but the newest ``keep`` runs and delete blobs no remaining run references."""
+        runs = self.runs()
+        for manifest in runs[:max(0, len(runs) - keep)]:
+            self._run_path(manifest['run']).unlink()
+
+        referenced = {digest for manifest in self.runs() for digest in manifest['files'].values()}
+        removed = 0
+        for blob_path in self.blob_dir.glob('*/*.gz'):
+            if blob_path.name[:-len('.gz')] not in referenced:
+                blob_path.unlink()
+                removed += 1
+        return removed
+
+    def log_summary(self):
+        if self.run_id is None:
+            return
+
+        logger.info(f"💾 Backup Summary (run {self.run_id}):")
+        logger.info(f"   - Files backed up: {len(self.run_files)}")
+        logger.info(f"   - New blobs written: {self.blobs_written} ({self.bytes_written / 1024:.1f} KB compressed)")
+        logger.info(f"   - Unchanged files (no write): {self.blobs_reused}")
+
+def main():
+    parser = argparse.ArgumentParser(description='List, restore and prune ARB backups')
+    parser.add_argument('--backup-dir', default=str(DEFAULT_BACKUP_DIR),
+                        help='Backup store directory (default: .l10n_state/backups)')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    subparsers.add_parser('list', help='List backup runs')
+
+    show_parser = subparsers.add_parser('show', help='Show the files of a backup run')
+    show_parser.add_argument('run', help="Run id, or 'latest'")
+
+    restore_parser = subparsers.add_parser('restore', help='Restore the files of a backup run')
+    restore_parser.add_argument('run', help="Run id, or 'latest'")
+    restore_parser.add_argument('--l10n-dir', default=str(DEFAULT_L10N_DIR), help='Directory to restore into')
+    restore_parser.add_argument('--languages', nargs='+', help='Only restore these languages')
+
+    prune_parser = subparsers.add_parser('prune', help='Delete old runs and unreferenced blobs')
+    prune_parser.add_argument('--keep', type=int, default=20, help='Number of newest runs to keep (default: 20)')
+
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    store = BackupStore(args.backup_dir)
+
+    if args.command == 'list':
+        for manifest in store.runs():
+            label = f"  {manifest['label']}" if manifest.get('label') else ''
+            print(f"{manifest['run']}  {manifest['created']}  {len(manifest['files']):3d} files{label}")
+    elif args.command == 'show':
+        manifest = store.load_run(args.run)
+        for name, digest in manifest['files'].items():
+            print(f"{digest[:12]}  {name}")
+    elif args.command == 'restore':
+        file_names = [f'intl_{language}.arb' for language in args.languages] if args.languages else None
+        restored = store.restore(args.run, args.l10n_dir, file_names)
+        logger.info(f"✅ Restored {restored} files")
+    elif args.command == 'prune':
+        removed = store.prune(args.keep)
+        logger.info(f"✅ Kept {args.keep} newest runs, removed {removed} unreferenced blobs")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Bisecting recovery for batches that failed every retry
+"""
+
+import asyncio
+import json
+import logging
+import re
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from placeholders import tags_match
+from wire_format import from_wire, wire_ids
+
+logger = logging.getLogger(__name__)
+
+# A complete "key": "value" pair, used to salvage truncated or malformed JSON
+PAIR_PATTERN = re.compile(r'"((?:[^"\\]|\\.)*)"\s*:\s*"((?:[^"\\]|\\.)*)"')
+
+def _json_candidates(response_text: str):
+    """The same cleanup strategies ``_parse_json_response`` tries, as raw strings."""
+    text = response_text.strip()
+    yield text
+
+    start_idx = text.find('{')
+    end_idx = text.rfind('}') + 1
+    if start_idx != -1 and end_idx > start_idx:
+        yield text[start_idx:end_idx]
+
+    if text.startswith('```json'):
+        text = text[7:]
+    if text.endswith('```'):
+        text = text[:-3]
+    yield text
+
+def is_usable(translation, source: str) -> bool:
+    """A value can be kept if it is a string, not blank where the source was not, and keeps the source's placeholder tags."""
+    return (isinstance(translation, str) and (bool(translation.strip()) or not source.strip())
+            and tags_match(source, translation))
+
+def salvage_translations(response_text: str, original_texts: Dict[str, str]) -> Dict[str, str]:
+    """Return the usable translations of a batch response that failed validation.
+
+    Responses that parse but miss keys keep the keys they have. Responses that
+    do not parse at all (typically cut off at ``max_tokens``) keep every
+    complete ``"key": "value"`` pair before the cut.
+    """
+    for candidate in _json_candidates(response_text):
+        try:
+            data = json.loads(candidate)
+        except (json.JSONDecodeError, ValueError):
+            continue
+        if isinstance(data, dict):
+            return {key: value for key, value in from_wire(data, original_texts).items()
+                    if key in original_texts and is_usable(value, original_texts[key])}
+
+    ids = wire_ids(original_texts)
+    salvaged = {}
+    for match in PAIR_PATTERN.finditer(response_text):
+        try:
+            key = json.loads(f'"{match.group(1)}"')
+            value = json.loads(f'"{match.group(2)}"')
+        except json.JSONDecodeError:
+            continue
+        key = key if key in original_texts else ids.get(key, key)
+        if key in original_texts and is_usable(value, original_texts[key]):
+            salvaged[key] = value
+    return salvaged
+
+class RecoveryStats:
+    """API call counts of batch recovery compared with translating every key on its own."""
+
+    def __init__(self):
+        self.recovered_batches = 0
+        self.failed_keys = 0
+        self.salvaged_keys = 0
+        self.batch_calls = 0
+        self.single_calls = 0
+
+    @property
+    def calls_saved(self) -> int:
+        # The per-key fallback costs one call for every key of a failed batch
+        return self.failed_keys - self.batch_calls - self.single_calls
+
+    def log_summary(self):
+        if not self.recovered_batches:
+            return
+
+        logger.info(f"🩹 Batch Recovery Summary:")
+        logger.info(f"   - Recovered batches: {self.recovered_batches} ({self.failed_keys} keys)")
+        logger.info(f"   - Keys kept from failed responses: {self.salvaged_keys}")
+        logger.info(f"   - Recovery calls: {self.batch_calls} batch, {self.single_calls} single")
+        logger.info(f"   - Calls saved vs per-key fallback: {self.calls_saved}")
+
+def _split(texts: Dict[str, str]) -> Tuple[Dict[str, str], Dict[str, str]]:
+    items = list(texts.items())
+    middle = len(items) // 2
+    return dict(items[:middle]), dict(items[middle:])
+
+def _start(texts: Dict[str, str], salvaged: Dict[str, str],
+           stats: RecoveryStats) -> Tuple[Dict[str, str], Dict[str, str]]:
+    translations = {key: value for key, value in salvaged.items() if key in texts}
+    pending = {key: text for key, text in texts.items() if key not in translations}
+
+    stats.recovered_batches += 1
+    stats.failed_keys += len(texts)
+    stats.salvaged_keys += len(translations)
+    return translations, pending
+
+def keep_best(salvage: Dict[str, str], partial: Dict[str, str]):
+    """Replace the partial answer kept in ``salvage`` when ``partial`` has more keys."""
+    if len(partial) > len(salvage):
+        salvage.clear()
+        salvage.update(partial)
+
+def bisect_recover(texts: Dict[str, str], salvaged: Dict[str, str],
+                   request_batch: Callable[[Dict[str, str]], Dict[str, str]],
+                   request_single: Callable[[str], Optional[str]], stats: RecoveryStats,
+                   on_single: Optional[Callable[[str, str], None]] = None) -> Dict[str, str]:
+    """Recover a failed batch with as few calls as possible.
+
+    Keys salvaged from the failed response are kept. The rest are re-requested
+    as one batch, and whatever is still missing is split in halves recursively
+    until single keys remain, which fall back to ``request_single``.
+    ``request_batch`` makes one call and returns only the usable keys.
+    ``request_single`` returns None when it fails, and the key keeps its
+    source text. ``on_single`` is told the key of every single-key fallback
+    and its method: ``single``, or ``error`` when the call failed.
+    """
+    translations, pending = _start(texts, salvaged, stats)
+
+    def recover(pending: Dict[str, str], resend: bool):
+        if not pending:
+            return
+        if len(pending) == 1:
+            (key, text), = pending.items()
+            stats.single_calls += 1
+            translation = request_single(text)
+            translations[key] = text if translation is None else translation
+            if on_single:
+                on_single(key, 'error' if translation is None else 'single')
+            return
+
+        if resend:
+            stats.batch_calls += 1
+            received = request_batch(pending)
+            translations.update(received)
+            rest = {key: text for key, text in pending.items() if key not in received}
+            if len(rest) < len(pending):
+                recover(rest, True)
+                return
+
+        # Nothing came back: the batch as a whole is the problem, halve it
+        for half in _split(pending):
+            recover(half, True)
+
+    # Re-sending the exact batch that just failed every retry is pointless
+    recover(pending, len(pending) < len(texts))
+    return {key: translations[key] for key in texts}
+
+async def bisect_recover_async(texts: Dict[str, str], salvaged: Dict[str, str],
+                               request_batch: Callable[[Dict[str, str]], Awaitable[Dict[str, str]]],
+                               request_single: Callable[[str], Awaitable[Optional[str]]],
+                               stats: RecoveryStats,
+                               on_single: Optional[Callable[[str, str], None]] = None) -> Dict[str, str]:
+    """Asyncio version of ``bisect_recover``; both halves of a split run concurrently."""
+    translations, pending = _start(texts, salvaged, stats)
+
+    async def recover(pending: Dict[str, str], resend: bool):
+        if not pending:
+            return
+        if len(pending) == 1:
+            (key, text), = pending.items()
+            stats.single_calls += 1
+            translation = await request_single(text)
+            translations[key] = text if translation is None else translation
+            if on_single:
+                on_single(key, 'error' if translation is None else 'single')
+            return
+
+        if resend:
+            stats.batch_calls += 1
+            received = await request_batch(pending)
+            translations.update(received)
+            rest = {key: text for key, text in pending.items() if key not in received}
+            if len(rest) < len(pending):
+                await recover(rest, True)
+                return
+
+        await asyncio.gather(*(recover(half, True) for half in _split(pending)))
+
+    await recover(pending, len(pending) < len(texts))
+    return {key: translations[key] for key in texts}
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Token-budget batch packing that adapts to truncated and unparseable responses
+"""
+
+import logging
+from typing import Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# How many tokens a translation into the language costs relative to the English
+# source. Latin-script languages stay close to English, while scripts such as
+# Tamil or Burmese are split into many more tokens per word.
+EXPANSION_FACTORS = {
+    'am': 3.0, 'ar': 1.8, 'bg': 1.8, 'bn': 2.8, 'el': 2.2, 'fa': 1.9,
+    'he': 1.9, 'hi': 2.6, 'ja': 1.6, 'ka': 3.2, 'kk': 1.9, 'km': 3.8,
+    'kn': 3.2, 'ko': 1.7, 'ku': 1.6, 'lo': 3.5, 'mr': 2.8, 'my': 4.0,
+    'ru': 1.8, 'si': 3.5, 'sr': 1.8, 'ta': 3.6, 'te': 3.2, 'th': 2.6,
+    'ti': 3.2, 'uk': 1.9, 'ur': 2.0, 'zh': 1.3, 'zh_CN': 1.3, 'zh_TW': 1.4,
+}
+DEFAULT_EXPANSION = 1.3
+
+# The short id and JSON punctuation of one compact "12":"..." pair (see wire_format.py)
+PAIR_OVERHEAD_TOKENS = 4
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate: ~4 ASCII characters per token, ~1 token per other character."""
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+    return (ascii_chars + 3) // 4 + (len(text) - ascii_chars)
+
+def estimate_prompt_tokens(messages: List[Dict[str, str]]) -> int:
+    """Rough token count of chat messages, including per-message framing."""
+    return sum(estimate_tokens(message['content']) + 4 for message in messages)
+
+def expected_output_tokens(text: str, target_language: str) -> int:
+    """Estimate the response tokens one id/translation pair costs."""
+    source_tokens = estimate_tokens(text)
+    if text.isascii():
+        target_tokens = source_tokens * EXPANSION_FACTORS.get(target_language, DEFAULT_EXPANSION)
+    else:
+        # Already in the target script (e.g. retranslation): roughly the same size again
+        target_tokens = source_tokens * 1.2
+    return int(target_tokens) + PAIR_OVERHEAD_TOKENS
+
+class AdaptiveBatcher:
+    """Pack keys into batches that fit a completion token budget.
+
+    The batcher starts by filling ``fill_ratio`` of ``max_tokens`` with the
+    estimated response size, capped at ``max_keys``. Truncated responses
+    (``finish_reason == 'length'``) shrink the fill ratio, parse failures
+    shrink the key cap, and a run of clean batches grows both back.
+    """
+
+    MIN_FILL = 0.2
+    MAX_FILL = 0.85
+    GROW_AFTER = 3
+
+    def __init__(self, target_language: str, max_tokens: int, max_keys: int = 100, fill_ratio: float = 0.6):
+        self.target_language = target_language
+        self.max_tokens = max_tokens
+        self.max_keys = max_keys
+        self.fill_ratio = fill_ratio
+
+        # Smallest batch that has been truncated; growth stays below it
+        self._ceiling = max_keys
+
+        self.successes = 0
+        self.truncations = 0
+        self.parse_failures = 0
+        self._streak = 0
+
+    @property
+    def token_budget(self) -> int:
+        return int(self.max_tokens * self.fill_ratio)
+
+    def next_batch(self, items: List[Tuple[str, str]]) -> Dict[str, str]:
+        """Take the longest prefix of ``items`` that fits the current budget (at least one key)."""
+        batch = {}
+        used = 0
+        for key, text in items:
+            cost = expected_output_tokens(text, self.target_language)
+            if batch and (used + cost > self.token_budget or len(batch) >= self.max_keys):
+                break
+            batch[key] = text
+            used += cost
+        return batch
+
+    def pack_all(self, items: List[Tuple[str, str]]) -> List[Dict[str, str]]:
+        """Split all items into batches with the current budget."""
+        batches = []
+        while items:
+            batch = self.next_batch(items)
+            batches.append(batch)
+            items = items[len(batch):]
+        return batches
+
+    def record_success(self):
+        self.successes += 1
+        self._streak += 1
+        if self._streak >= self.GROW_AFTER:
+            self._streak = 0
+            self.fill_ratio = min(self.MAX_FILL, self.fill_ratio * 1.15)
+            self.max_keys = min(self._ceiling, max(self.max_keys + 1, int(self.max_keys * 1.25)))
+
+    def record_truncation(self, batch_len: int):
+        """The response hit max_tokens: the estimate was too optimistic for this language."""
+        self.truncations += 1
+        self._streak = 0
+        self._ceiling = max(1, min(self._ceiling, batch_len - 1))
+        self.fill_ratio = max(self.MIN_FILL, self.fill_ratio * 0.6)
+        self.max_keys = max(1, min(self.max_keys, batch_len // 2))
+        logger.info(f"✂️ Truncated response for {self.target_language}; token budget now {self.token_budget}, "
+                    f"max {self.max_keys} keys")
+
+    def record_parse_failure(self, batch_len: int):
+        """The response could not be parsed or validated: try fewer keys per call."""
+        self.parse_failures += 1
+        self._streak = 0
+        self.max_keys = max(1, min(self.max_keys, int(batch_len * 0.75)))
+
+    def log_summary(self):
+        logger.info(f"   - Adaptive batching ({self.target_language}): {self.successes} ok, "
+                    f"{self.truncations} truncated, {self.parse_failures} parse failures, "
+                    f"final budget {self.token_budget} tokens / {self.max_keys} keys")
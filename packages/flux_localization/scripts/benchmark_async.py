@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Benchmark the serial translation path against the asyncio engine and multi-target
+mode on a local mock endpoint
+"""
+
+import argparse
+import json
+import logging
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from mock_azure_server import MockAzureOpenAIServer
+from translate_optimized import OptimizedTranslator
+
+DEFAULT_L10N_DIR = Path(__file__).resolve().parent.parent / 'lib' / 'src' / 'l10n'
+
+def build_fixture(workdir: Path, base_file: Path, languages: List[str], key_count: int) -> Path:
+    """Create an l10n dir with the first ``key_count`` English keys and empty target files."""
+    with open(base_file, 'r', encoding='utf-8') as f:
+        base_data = json.load(f)
+
+    keys = [key for key in base_data if key != '@@locale'][:key_count]
+    l10n_dir = workdir / 'l10n'
+    l10n_dir.mkdir(parents=True)
+
+    with open(l10n_dir / 'intl_en.arb', 'w', encoding='utf-8') as f:
+        json.dump({'@@locale': 'en', **{key: base_data[key] for key in keys}}, f, ensure_ascii=False, indent='\t')
+
+    for language in languages:
+        with open(l10n_dir / f'intl_{language}.arb', 'w', encoding='utf-8') as f:
+            json.dump({'@@locale': language}, f, ensure_ascii=False, indent='\t')
+
+    return l10n_dir
+
+def read_outputs(l10n_dir: Path) -> Dict[str, str]:
+    return {path.name: path.read_text(encoding='utf-8') for path in sorted(l10n_dir.glob('intl_*.arb'))}
+
+def run_once(endpoint: str, fixture: Path, workdir: Path, name: str, batch_size: int,
+             concurrency: int, per_locale_concurrency: int, locales_per_call: int = 1) -> float:
+    """Translate a fresh copy of the fixture and return the wall-clock time."""
+    l10n_dir = workdir / name
+    shutil.copytree(fixture, l10n_dir)
+
+    translator = OptimizedTranslator(azure_endpoint=endpoint, api_key='mock', deployment_name='mock')
+    start = time.perf_counter()
+    translator.process_language_files(str(l10n_dir), batch_size=batch_size, concurrency=concurrency,
+                                      per_locale_concurrency=per_locale_concurrency,
+                                      locales_per_call=locales_per_call)
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark serial vs concurrent translation against a mock endpoint')
+    parser.add_argument('--l10n-dir', default=str(DEFAULT_L10N_DIR), help='Directory containing intl_en.arb')
+    parser.add_argument('--languages', nargs='+', default=['fr', 'de', 'es', 'ja', 'vi', 'ar'],
+                        help='Languages to translate (default: fr de es ja vi ar)')
+    parser.add_argument('--keys', type=int, default=120, help='Number of English keys to translate (default: 120)')
+    parser.add_argument('--batch-size', type=int, default=30, help='Batch size (default: 30)')
+    parser.add_argument('--latency', type=float, default=0.2, help='Mock endpoint latency in seconds (default: 0.2)')
+    parser.add_argument('--concurrency', type=int, default=16, help='Global in-flight limit (default: 16)')
+    parser.add_argument('--per-locale-concurrency', type=int, default=4, help='Per-locale in-flight limit (default: 4)')
+    parser.add_argument('--locales-per-call', type=int, default=0,
+                        help='Also benchmark multi-target mode with this many languages per call (default: off)')
+
+    args = parser.parse_args()
+
+    # The translation scripts configure INFO logging on import; keep the benchmark output readable
+    logging.getLogger().setLevel(logging.WARNING)
+
+    workdir = Path(tempfile.mkdtemp(prefix='l10n-bench-'))
+    try:
+        fixture = build_fixture(workdir / 'fixture', Path(args.l10n_dir) / 'intl_en.arb', args.languages, args.keys)
+
+        with MockAzureOpenAIServer(latency=args.latency) as server:
+            serial_time = run_once(server.endpoint, fixture, workdir, 'serial', args.batch_size, 0, 1)
+            serial_calls = server.request_count
+            serial_tokens = server.prompt_tokens
+
+            async_time = run_once(server.endpoint, fixture, workdir, 'async', args.batch_size,
+                                  args.concurrency, args.per_locale_concurrency)
+            async_calls = server.request_count - serial_calls
+
+            if args.locales_per_call > 1:
+                calls_before, tokens_before = server.request_count, server.prompt_tokens
+                multi_time = run_once(server.endpoint, fixture, workdir, 'multi', args.batch_size, 0, 1,
+                                      args.locales_per_call)
+                multi_calls = server.request_count - calls_before
+                multi_tokens = server.prompt_tokens - tokens_before
+
+        identical = read_outputs(workdir / 'serial') == read_outputs(workdir / 'async')
+
+        print(f"Languages: {len(args.languages)}, keys: {args.keys}, batch size: {args.batch_size}, "
+              f"latency: {args.latency:.3f}s")
+        print(f"Serial:     {serial_time:8.2f}s  ({serial_calls} API calls)")
+        print(f"Concurrent: {async_time:8.2f}s  ({async_calls} API calls, "
+              f"concurrency={args.concurrency}, per-locale={args.per_locale_concurrency})")
+        print(f"Speedup:    {serial_time / async_time:8.1f}x")
+        print(f"Identical output files: {'yes' if identical else 'NO'}")
+
+        if args.locales_per_call > 1:
+            saved = serial_tokens - multi_tokens
+            print(f"Multi-target ({args.locales_per_call} languages/call): {multi_time:8.2f}s  ({multi_calls} API calls)")
+            print(f"Input tokens: per-language {serial_tokens}, multi-target {multi_tokens} "
+                  f"(saved {saved}, {saved / serial_tokens * 100:.1f}%)")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
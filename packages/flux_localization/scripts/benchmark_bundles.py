@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Compare the size of the message bundles against the generated messages_<locale>.dart files
+"""
+
+import argparse
+import gzip
+import json
+import logging
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, List
+
+from arb_corpus import DEFAULT_L10N_DIR, locale_of
+from dart_usage import DEFAULT_GENERATED_DIR
+from generate_messages import BASE_LOCALE, _read_messages, arguments, message_literal
+from message_bundles import Bundle, BundleBuilder, decode_keys
+
+def mismatches(bundle: Bundle, keys: List[str], messages: Dict[str, str], base_args: Dict[str, List[str]]) -> int:
+    """Messages whose bundle form does not spell the same Dart literal as the generated code."""
+    count = 0
+    for key_id, key in enumerate(keys):
+        segments = bundle.segments(key_id)
+        if segments is None or key not in messages:
+            count += (segments is None) != (key not in messages)
+            continue
+        args = base_args[key]
+        rebuilt = ''.join('{' + args[segment] + '}' if isinstance(segment, int) else segment for segment in segments)
+        count += message_literal(rebuilt, args) != message_literal(messages[key], args)
+    return count
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare message bundles with the generated Dart message files')
+    parser.add_argument('--l10n-dir', default=str(DEFAULT_L10N_DIR), help='Directory containing intl_*.arb files')
+    parser.add_argument('--generated-dir', default=str(DEFAULT_GENERATED_DIR),
+                        help='Output directory of intl_utils (l10n.dart and intl/)')
+    parser.add_argument('--locales', nargs='+', help='Locales to list (default: all; totals always cover all)')
+
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+
+    l10n_dir = Path(args.l10n_dir)
+    intl_dir = Path(args.generated_dir) / 'intl'
+    with tempfile.TemporaryDirectory() as workdir:
+        BundleBuilder(str(l10n_dir), workdir).build()
+        bundle_dir = Path(workdir)
+        keys_data = (bundle_dir / 'keys.bin').read_bytes()
+        keys = decode_keys(keys_data)
+        english = _read_messages(l10n_dir / f'intl_{BASE_LOCALE}.arb')
+        base_args = {key: arguments(message) for key, message in english.items()}
+
+        rows = []
+        broken = 0
+        for path in sorted(l10n_dir.glob('intl_*.arb')):
+            locale = locale_of(path)
+            dart = (intl_dir / f'messages_{locale}.dart').read_bytes()
+            messages = _read_messages(path)
+            as_json = json.dumps({key: value for key, value in messages.items() if key in base_args},
+                                 ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+            data = (bundle_dir / f'{locale}.bin').read_bytes()
+            bundle = Bundle(data, keys_data)
+            broken += mismatches(bundle, keys, messages, base_args)
+
+            rows.append({
+                'locale': locale,
+                'dart': len(dart), 'dart_gz': len(gzip.compress(dart, 9)),
+                'json': len(as_json), 'json_gz': len(gzip.compress(as_json, 9)),
+                'bundle': len(data), 'bundle_gz': len(gzip.compress(data, 9)),
+            })
+
+    # Load time is not reported: only the Dart loader in an app can show it, and it has not been run there yet
+    print(f"{len(rows)} locales, {len(keys)} keys; sizes in KB (raw / gzip -9)")
+    print(f"{'locale':<7} {'dart':>15} {'json':>15} {'bundle':>15}")
+    listed = [row for row in rows if not args.locales or row['locale'] in args.locales]
+    for row in listed:
+        print(f"{row['locale']:<7} {row['dart'] / 1024:7.1f} / {row['dart_gz'] / 1024:5.1f} "
+              f"{row['json'] / 1024:7.1f} / {row['json_gz'] / 1024:5.1f} "
+              f"{row['bundle'] / 1024:7.1f} / {row['bundle_gz'] / 1024:5.1f}")
+
+    def total(field: str) -> float:
+        return sum(row[field] for row in rows) / 1024
+
+    print(f"{'total':<7} {total('dart'):7.0f} / {total('dart_gz'):5.0f} {total('json'):7.0f} / {total('json_gz'):5.0f} "
+          f"{total('bundle'):7.0f} / {total('bundle_gz'):5.0f}   (+ keys.bin {len(keys_data) / 1024:.1f} KB, "
+          f"{len(gzip.compress(keys_data, 9)) / 1024:.1f} KB gzip)")
+    print(f"bundle vs dart: {total('bundle') / total('dart'):.0%} raw, {total('bundle_gz') / total('dart_gz'):.0%} gzip; "
+          f"bundle vs json: {total('bundle') / total('json'):.0%} raw, {total('bundle_gz') / total('json_gz'):.0%} gzip")
+    if broken:
+        print(f"❌ {broken} messages differ from the generated Dart code")
+        sys.exit(1)
+    print("✅ Every bundled message matches the generated Dart code")
+
+if __name__ == "__main__":
+    main()
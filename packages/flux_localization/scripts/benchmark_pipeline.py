@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+End-to-end throughput benchmark of the translation pipeline over the full ARB corpus
+against the local mock endpoint with injected latency and faults
+"""
+
+import argparse
+import json
+import logging
+import random
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from arb_corpus import DEFAULT_L10N_DIR, ArbCorpus
+from arb_io import write_arb
+from mock_azure_server import FaultConfig, LatencyModel, MockAzureOpenAIServer
+from rate_limiter import RateLimiter
+from translate_optimized import OptimizedTranslator
+
+# Named endpoint behaviours; every scenario runs with every selected mode
+SCENARIOS = {
+    'clean': {'latency_dist': 'fixed', 'faults': {}},
+    'jittery': {'latency_dist': 'lognormal', 'faults': {}},
+    'faulty': {'latency_dist': 'lognormal',
+               'faults': {'rate_limit': 0.05, 'truncated': 0.02, 'malformed': 0.02, 'fenced': 0.05,
+                          'dropped_placeholder': 0.05}},
+}
+
+MODES = ('serial', 'adaptive', 'concurrent')
+
+def build_fixture(workdir: Path, l10n_dir: Path, missing_ratio: float, seed: int) -> Dict[str, int]:
+    """Copy the corpus and drop ``missing_ratio`` of every target locale's keys; return the dropped counts."""
+    corpus = ArbCorpus.load(str(l10n_dir))
+    rng = random.Random(seed)
+    fixture = workdir / 'fixture'
+    fixture.mkdir(parents=True)
+
+    write_arb(str(fixture / f'intl_{corpus.base_locale}.arb'), corpus.data(corpus.base_locale))
+    dropped = {}
+    for locale in corpus.target_locales:
+        data = corpus.data(locale)
+        keys = [key for key in data if key != '@@locale']
+        removed = set(rng.sample(keys, int(len(keys) * missing_ratio)))
+        write_arb(str(fixture / f'intl_{locale}.arb'), {key: value for key, value in data.items() if key not in removed})
+        dropped[locale] = len(removed)
+    return dropped
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile; 0 for an empty list."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))]
+
+def run_mode(server: MockAzureOpenAIServer, workdir: Path, name: str, mode: str, args) -> Dict[str, float]:
+    """Translate a fresh copy of the fixture in one mode and collect the run's figures."""
+    l10n_dir = workdir / name
+    shutil.copytree(workdir / 'fixture', l10n_dir)
+
+    translator = OptimizedTranslator(azure_endpoint=server.endpoint, api_key='mock', deployment_name='mock',
+                                     adaptive_batching=mode == 'adaptive',
+                                     rate_limiter=RateLimiter(base_delay=args.base_delay), stream=args.stream)
+    requests_before = server.request_count
+    faults_before = dict(server.counters)
+
+    start = time.perf_counter()
+    translator.process_language_files(str(l10n_dir), batch_size=args.batch_size,
+                                      concurrency=args.concurrency if mode == 'concurrent' else 0,
+                                      per_locale_concurrency=args.per_locale_concurrency)
+    elapsed = time.perf_counter() - start
+
+    result = ArbCorpus.load(str(l10n_dir))
+    incomplete = sum(len(result.missing_keys(locale)) for locale in result.target_locales)
+    batches = translator.batch_latencies
+    requests = server.request_count - requests_before
+
+    return {
+        'seconds': elapsed,
+        'requests': requests,
+        'batches': len(batches),
+        'recovered_batches': translator.recovery_stats.recovered_batches,
+        'fallback_rate': translator.recovery_stats.recovered_batches / len(batches) if batches else 0.0,
+        'p50_batch': percentile(batches, 0.50),
+        'p95_batch': percentile(batches, 0.95),
+        'throttled': translator.rate_limiter.throttled,
+        'incomplete_keys': incomplete,
+        'faults': {kind: count - faults_before[kind] for kind, count in server.counters.items()},
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='End-to-end translation throughput benchmark against a mock endpoint')
+    parser.add_argument('--l10n-dir', default=str(DEFAULT_L10N_DIR), help='Corpus to benchmark (default: lib/src/l10n)')
+    parser.add_argument('--missing-ratio', type=float, default=0.05,
+                        help='Fraction of each locale\'s keys removed before translating (default: 0.05)')
+    parser.add_argument('--scenarios', nargs='+', choices=sorted(SCENARIOS), default=['clean', 'faulty'],
+                        help='Endpoint scenarios to run (default: clean faulty)')
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=['serial', 'concurrent'],
+                        help='Pipeline modes to run (default: serial concurrent)')
+    parser.add_argument('--batch-size', type=int, default=30, help='Batch size (default: 30)')
+    parser.add_argument('--latency', type=float, default=0.05, help='Mean mock latency in seconds (default: 0.05)')
+    parser.add_argument('--tokens-per-second', type=float, default=0.0,
+                        help='Mock output generation speed after the first token (default: instant)')
+    parser.add_argument('--stream', action='store_true', help='Use streamed batch responses')
+    parser.add_argument('--concurrency', type=int, default=16, help='Global in-flight limit (default: 16)')
+    parser.add_argument('--per-locale-concurrency', type=int, default=4, help='Per-locale in-flight limit (default: 4)')
+    parser.add_argument('--base-delay', type=float, default=1.0, help='Retry backoff base in seconds (default: 1.0)')
+    parser.add_argument('--seed', type=int, default=1, help='Seed for the fixture, latencies and faults (default: 1)')
+    parser.add_argument('--json', help='Also write the results to this JSON file')
+
+    args = parser.parse_args()
+
+    # The translation scripts configure INFO logging on import, and injected
+    # faults log a warning each; keep the benchmark output readable
+    logging.getLogger().setLevel(logging.ERROR)
+
+    workdir = Path(tempfile.mkdtemp(prefix='l10n-pipeline-'))
+    results = []
+    try:
+        dropped = build_fixture(workdir, Path(args.l10n_dir), args.missing_ratio, args.seed)
+        keys = sum(dropped.values())
+        print(f"Corpus: {len(dropped)} target locales, {keys} keys to translate "
+              f"(missing ratio {args.missing_ratio}), batch size {args.batch_size}, latency {args.latency:.3f}s")
+        print(f"{'scenario':<9} {'mode':<11} {'keys/s':>8} {'calls/key':>10} {'fallback':>9} "
+              f"{'p50 batch':>10} {'p95 batch':>10} {'429s':>5} {'complete':>9}")
+
+        for scenario in args.scenarios:
+            settings = SCENARIOS[scenario]
+            for mode in args.modes:
+                server = MockAzureOpenAIServer(
+                    latency_model=LatencyModel(args.latency, settings['latency_dist'], 0.8, args.seed),
+                    faults=FaultConfig(seed=args.seed, **settings['faults']),
+                    tokens_per_second=args.tokens_per_second)
+                with server:
+                    run = run_mode(server, workdir, f'{scenario}-{mode}', mode, args)
+
+                run.update(scenario=scenario, mode=mode, keys=keys,
+                           keys_per_second=keys / run['seconds'], calls_per_key=run['requests'] / keys)
+                results.append(run)
+                print(f"{scenario:<9} {mode:<11} {run['keys_per_second']:8.1f} {run['calls_per_key']:10.3f} "
+                      f"{run['fallback_rate'] * 100:8.1f}% {run['p50_batch']:9.3f}s {run['p95_batch']:9.3f}s "
+                      f"{run['throttled']:5d} {'yes' if not run['incomplete_keys'] else 'NO':>9}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Benchmark requests per second of the HTTP transport settings at several concurrency levels on a local mock endpoint
+"""
+
+import argparse
+import asyncio
+import contextlib
+import logging
+import time
+from typing import Dict, List, Optional
+
+import openai
+
+from mock_azure_server import MockAzureOpenAIServer
+from transport import HttpTransport
+
+API_VERSION = "2024-02-15-preview"
+
+def transport_for(name: str, concurrency: int, http2: bool) -> Optional[HttpTransport]:
+    """The transport of a benchmarked configuration; None leaves the SDK's default client."""
+    if name == 'sdk-default':
+        return None
+    if name == 'no-keepalive':
+        # Every request opens a new connection, as a pool too small for the concurrency ends up doing
+        return HttpTransport(max_connections=concurrency, max_keepalive=0)
+    return HttpTransport.for_concurrency(concurrency, concurrency, http2=http2)
+
+async def run_level(endpoint: str, transport: Optional[HttpTransport], concurrency: int, requests: int) -> float:
+    """Send ``requests`` single-text completions with ``concurrency`` in flight; return the wall-clock time."""
+    client = openai.AsyncAzureOpenAI(
+        azure_endpoint=endpoint, api_key='mock', api_version=API_VERSION, max_retries=0,
+        **({'http_client': transport.async_client()} if transport else {}))
+    limit = asyncio.Semaphore(concurrency)
+    timeout = transport.timeout(30) if transport else 30
+
+    async def one(index: int):
+        async with limit:
+            await client.chat.completions.create(
+                model='mock', messages=[{'role': 'user', 'content': f'Translate to French: "Item {index}"'}],
+                max_tokens=50, timeout=timeout)
+
+    start = time.perf_counter()
+    try:
+        await asyncio.gather(*(one(index) for index in range(requests)))
+    finally:
+        await client.close()
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare requests/sec of the HTTP transport settings against a mock endpoint')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 16, 64],
+                        help='Concurrency levels to measure (default: 1 4 16 64)')
+    parser.add_argument('--requests', type=int, default=0,
+                        help='Requests per level (default: 8 per unit of concurrency, at least 64)')
+    parser.add_argument('--latency', type=float, default=0.05, help='Mock response latency in seconds (default: 0.05)')
+    parser.add_argument('--handshake-latency', type=float, default=0.03,
+                        help='Mock cost of opening a connection, standing in for TCP+TLS (default: 0.03)')
+    parser.add_argument('--configs', nargs='+', default=['sdk-default', 'no-keepalive', 'pooled'],
+                        choices=('sdk-default', 'no-keepalive', 'pooled'), help='Transport settings to compare')
+    parser.add_argument('--endpoint',
+                        help='Mock endpoint already running in another process, e.g. http://127.0.0.1:8765 '
+                             '(default: start one in this process, which shares its CPU with the client)')
+    parser.add_argument('--http2', action='store_true',
+                        help='Enable HTTP/2 on the pooled transport (the mock endpoint only speaks HTTP/1.1)')
+
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+
+    results: Dict[str, List[str]] = {}
+    server = None if args.endpoint else MockAzureOpenAIServer(latency=args.latency,
+                                                              handshake_latency=args.handshake_latency)
+    with server or contextlib.nullcontext():
+        endpoint = args.endpoint or server.endpoint
+        for name in args.configs:
+            for concurrency in args.concurrency:
+                requests = args.requests or max(64, concurrency * 8)
+                transport = transport_for(name, concurrency, args.http2)
+                connections_before = server.connection_count if server else 0
+                elapsed = asyncio.run(run_level(endpoint, transport, concurrency, requests))
+                # Counted by the client when the server runs elsewhere; the SDK's own client is not traced
+                if server:
+                    connections = f"{server.connection_count - connections_before:>4}"
+                else:
+                    connections = f"{transport.connections:>4}" if transport else "   ?"
+                results.setdefault(name, []).append(f"{requests / elapsed:8.1f} ({connections} conn)")
+
+    if server:
+        print(f"Latency: {args.latency * 1000:.0f} ms, handshake: {args.handshake_latency * 1000:.0f} ms; "
+              f"requests/sec (connections opened)")
+    else:
+        print(f"Endpoint: {endpoint}; requests/sec (connections opened)")
+    print(f"{'transport':<14}" + ''.join(f"{f'c={concurrency}':>21}" for concurrency in args.concurrency))
+    for name, cells in results.items():
+        print(f"{name:<14}" + ''.join(f"{cell:>21}" for cell in cells))
+
+if __name__ == "__main__":
+    main()
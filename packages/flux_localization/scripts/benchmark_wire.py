@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Measure tokens per key and keys per call of the batch prompt encoding, before and after the compact wire format
+"""
+
+import argparse
+import json
+import logging
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+from arb_corpus import DEFAULT_L10N_DIR
+from batching import AdaptiveBatcher, estimate_tokens
+from translate_optimized import OptimizedTranslator
+from wire_format import wire_id
+
+# The batch messages of PROMPT_VERSION "optimized-2": full key names, indented JSON, rules in every user message
+LEGACY_SYSTEM_PROMPT = ("You are a professional translator. You MUST return ONLY a valid JSON object with the exact "
+                        "same keys as the input, translated to the target language. Do not include any explanations "
+                        "or additional text.")
+
+def legacy_messages(texts: Dict[str, str], language_name: str) -> List[Dict[str, str]]:
+    clean_texts = {key: text.strip() for key, text in texts.items() if text.strip()}
+    prompt = f"""Translate the following English texts to {language_name}.
+
+IMPORTANT: Return ONLY a JSON object with the exact same keys and translated values.
+
+Input texts:
+{json.dumps(clean_texts, ensure_ascii=False, indent=2)}
+
+Rules:
+1. Keep placeholders like {{variable}} and tags like <x0/> or <x1>...</x1> unchanged; translate only the text around and between tags
+2. Maintain the same tone and style
+3. Ensure natural, app-appropriate translations
+4. Return ONLY the JSON object, no explanations
+
+JSON response:"""
+    return [{"role": "system", "content": LEGACY_SYSTEM_PROMPT}, {"role": "user", "content": prompt}]
+
+def legacy_response(translations: Dict[str, str]) -> str:
+    # Models answer in the layout of the request
+    return json.dumps(translations, ensure_ascii=False, indent=2)
+
+def compact_response(translations: Dict[str, str]) -> str:
+    return json.dumps({wire_id(index): text for index, text in enumerate(translations.values())},
+                      ensure_ascii=False, separators=(',', ':'))
+
+def token_counter() -> Tuple[str, Callable[[str], int]]:
+    """The o200k_base tokenizer of the GPT-4o family when tiktoken is installed, else the batcher's estimate."""
+    try:
+        import tiktoken
+        encoding = tiktoken.get_encoding('o200k_base')
+    except Exception:
+        # Not installed, or the encoding file could not be downloaded
+        return 'batching.estimate_tokens (pip install tiktoken for exact counts)', estimate_tokens
+    return 'tiktoken o200k_base', lambda text: len(encoding.encode(text))
+
+def measure(english: Dict[str, str], translated: Dict[str, str], language_name: str, batch_size: int,
+            build_messages: Callable, build_response: Callable, count: Callable[[str], int],
+            max_tokens: int) -> Dict[str, float]:
+    """Input and output tokens of every batch of ``batch_size`` keys, and how many keys fit one call's budget."""
+    keys = [key for key in english if key in translated]
+    input_tokens = output_tokens = truncated = 0
+    calls = 0
+    pair_tokens = []
+    for start in range(0, len(keys), batch_size):
+        batch = keys[start:start + batch_size]
+        messages = build_messages({key: english[key] for key in batch}, language_name)
+        input_tokens += sum(count(message['content']) + 4 for message in messages)
+        response = count(build_response({key: translated[key] for key in batch}))
+        output_tokens += response
+        truncated += response > max_tokens
+        calls += 1
+        # Each pair's share of the response, to pack batches against the completion budget
+        pair_tokens.extend([response / len(batch)] * len(batch))
+
+    # Keys per call when batches are packed up to the batcher's highest fill of max_tokens
+    budget = max_tokens * AdaptiveBatcher.MAX_FILL
+    packed_calls, used = 1, 0.0
+    for cost in pair_tokens:
+        if used and used + cost > budget:
+            packed_calls += 1
+            used = 0.0
+        used += cost
+
+    return {
+        'keys': len(keys), 'calls': calls,
+        'input_per_key': input_tokens / len(keys), 'output_per_key': output_tokens / len(keys),
+        'input_per_call': input_tokens / calls, 'output_per_call': output_tokens / calls,
+        'truncated': truncated, 'keys_per_call': len(keys) / packed_calls,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Tokens per key and keys per call of the legacy and compact batch prompts')
+    parser.add_argument('--l10n-dir', default=str(DEFAULT_L10N_DIR), help='Directory containing intl_*.arb files')
+    parser.add_argument('--languages', nargs='+', default=['fr', 'de', 'ja', 'ar', 'ta'],
+                        help='Target languages; their existing translations stand in for the responses '
+                             '(default: fr de ja ar ta)')
+    parser.add_argument('--batch-size', type=int, default=30, help='Keys per batch (default: 30)')
+
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+
+    l10n_dir = Path(args.l10n_dir)
+    with open(l10n_dir / 'intl_en.arb', 'r', encoding='utf-8') as f:
+        english = {key: value for key, value in json.load(f).items() if not key.startswith('@') and isinstance(value, str)}
+
+    translator = OptimizedTranslator(azure_endpoint='http://127.0.0.1:9', api_key='benchmark', deployment_name='benchmark')
+    max_tokens = translator.BATCH_MAX_TOKENS
+    tokenizer, count = token_counter()
+    encodings = {
+        'legacy': (legacy_messages, legacy_response),
+        'compact': (lambda texts, name: translator._batch_request_kwargs(texts, name)['messages'], compact_response),
+    }
+
+    print(f"intl_en.arb: {len(english)} keys; batches of {args.batch_size}; tokens counted with {tokenizer}")
+    print(f"{'lang':<6} {'encoding':<9} {'in/key':>7} {'out/key':>8} {'in/call':>8} {'out/call':>9} "
+          f"{'>max_tokens':>12} {'keys/call':>10}")
+    for language in args.languages:
+        with open(l10n_dir / f'intl_{language}.arb', 'r', encoding='utf-8') as f:
+            translated = {key: value for key, value in json.load(f).items() if isinstance(value, str)}
+        language_name = translator.language_names.get(language, language)
+        results = {name: measure(english, translated, language_name, args.batch_size, messages, response, count,
+                                 max_tokens)
+                   for name, (messages, response) in encodings.items()}
+        for name, result in results.items():
+            print(f"{language:<6} {name:<9} {result['input_per_key']:7.1f} {result['output_per_key']:8.1f} "
+                  f"{result['input_per_call']:8.0f} {result['output_per_call']:9.0f} "
+                  f"{result['truncated']:>5}/{result['calls']:<6} {result['keys_per_call']:10.1f}")
+        legacy, compact = results['legacy'], results['compact']
+        print(f"{'':<6} {'saved':<9} {1 - compact['input_per_key'] / legacy['input_per_key']:7.0%} "
+              f"{1 - compact['output_per_key'] / legacy['output_per_key']:8.0%} "
+              f"{'':>8} {'':>9} {'':>12} {compact['keys_per_call'] / legacy['keys_per_call']:9.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Per-locale journal of completed batches so interrupted runs can resume
+"""
+
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Dict, Tuple
+
+from sync_manifest import source_hash
+from translation_memory import STATE_DIR
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHECKPOINT_DIR = STATE_DIR / 'checkpoints'
+
+class CheckpointJournal:
+    """Append every completed batch to ``<directory>/<locale>.jsonl``.
+
+    Each entry stores the translation together with a hash of the text it
+    was translated from, so a rerun reuses a journaled translation only
+    while its source is unchanged. The first line names the run (script,
+    deployment and prompt version); a journal written by a different run is
+    discarded rather than resumed. A locale's journal is deleted once its
+    ARB file has been written.
+    """
+
+    def __init__(self, directory: str, run_id: str):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.run_id = run_id
+        self.resumed = 0
+        self._handles = {}
+
+    def _path(self, locale: str) -> Path:
+        return self.directory / f'{locale}.jsonl'
+
+    def _load(self, locale: str) -> Dict[str, Tuple[str, str]]:
+        """Read ``{key: (source hash, translation)}`` from a locale journal."""
+        path = self._path(locale)
+        if not path.exists():
+            return {}
+
+        entries = {}
+        with open(path, 'r', encoding='utf-8') as f:
+            for line_number, line in enumerate(f):
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A batch cut off by the crash; everything before it is intact
+                    break
+                if line_number == 0:
+                    if record.get('run') != self.run_id:
+                        logger.info(f"Discarding checkpoint for {locale} from a different run ({record.get('run')})")
+                        self.clear(locale)
+                        return {}
+                    continue
+                for key, (digest, translation) in record.get('batch', {}).items():
+                    entries[key] = (digest, translation)
+        return entries
+
+    def resume(self, locale: str, texts: Dict[str, str]) -> Tuple[Dict[str, str], Dict[str, str]]:
+        """Split ``{key: source}`` into translations completed by an earlier run and texts still to do."""
+        entries = self._load(locale)
+        done = {}
+        pending = {}
+        for key, text in texts.items():
+            entry = entries.get(key)
+            if entry and entry[0] == source_hash(text):
+                done[key] = entry[1]
+            else:
+                pending[key] = text
+
+        if done:
+            self.resumed += len(done)
+            logger.info(f"♻️ Resuming {locale}: {len(done)}/{len(texts)} texts already translated by an interrupted run")
+        return done, pending
+
+    def record(self, locale: str, texts: Dict[str, str], translations: Dict[str, str]):
+        """Durably append one completed batch."""
+        batch = {key: [source_hash(text), translations[key]] for key, text in texts.items()
+                 if isinstance(translations.get(key), str)}
+        if not batch:
+            return
+
+        handle = self._handles.get(locale)
+        if handle is None:
+            path = self._path(locale)
+            is_new = not path.exists() or path.stat().st_size == 0
+            handle = self._handles[locale] = open(path, 'a', encoding='utf-8')
+            if is_new:
+                handle.write(json.dumps({'run': self.run_id}) + '\n')
+
+        handle.write(json.dumps({'batch': batch}, ensure_ascii=False) + '\n')
+        handle.flush()
+        os.fsync(handle.fileno())
+
+    def clear(self, locale: str):
+        """Forget a locale once its results are safely in the ARB file."""
+        handle = self._handles.pop(locale, None)
+        if handle:
+            handle.close()
+        path = self._path(locale)
+        if path.exists():
+            path.unlink()
+
+    def close(self):
+        for handle in self._handles.values():
+            handle.close()
+        self._handles.clear()
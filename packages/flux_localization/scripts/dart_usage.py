@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+Index which localization keys the app's Dart sources use, to skip and prune dead keys
+"""
+
+import argparse
+import json
+import logging
+import os
+import re
+import time
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from arb_corpus import DEFAULT_L10N_DIR, ArbCorpus
+from arb_io import atomic_write_text
+from translation_memory import STATE_DIR
+
+logger = logging.getLogger(__name__)
+
+# scripts -> flux_localization -> packages -> app
+DEFAULT_APP_ROOT = Path(__file__).resolve().parents[3]
+DEFAULT_GENERATED_DIR = Path(__file__).resolve().parent.parent / 'lib' / 'src' / 'generated'
+DEFAULT_CACHE_PATH = STATE_DIR / 'dart_usage_cache.json'
+
+# Directories of the app root holding Dart code that can reach ``S``
+SOURCE_DIRS = ('lib', 'packages')
+# Never scanned: build output, tool caches and the generated localization code itself
+SKIPPED_DIRS = ('build', '.dart_tool', '.symlinks')
+
+CACHE_VERSION = 2
+
+# Members of the generated ``S`` class: ``String get seeAll {`` or ``String countItems(Object count) {``
+_MEMBER = re.compile(r'^  String (?:get (\w+)|(\w+)\()', re.MULTILINE)
+_MESSAGE_NAME = re.compile(r"name: '(\w+)'")
+
+# An expression evaluating to the ``S`` instance. The patterns start with
+# the literal ``S`` so the regex engine can skip ahead to candidates; a
+# match preceded by an identifier character or a dot is discarded
+_S = r'S\s*\.\s*(?:of\s*\([^()]*\)|maybeOf\s*\([^()]*\)\s*[?!]?|current)'
+# ``S.of(context).seeAll``, ``S.current.seeAll``, ``S.maybeOf(context)?.seeAll``
+_DIRECT = re.compile(_S + r'\s*\??\.\s*(\w+)')
+# ``final s = S.of(context);``, whose later ``s.seeAll`` count as calls too
+_ASSIGNED = re.compile(_S + r'\s*;')
+_ALIAS = re.compile(r'(\w+)\s*=\s*$')
+# Identifiers declared with the type ``S``: ``displayLastActive(S locale)``,
+# ``final S s;``, ``S? l10n,`` and ``S get s => S.of(context);``
+_TYPED = re.compile(r'S\s*\??\s+(?:get\s+)?(\w+)\s*(?=[,;)=]|\{)')
+# Quoted identifiers, which may name a key looked up dynamically
+_LITERAL = re.compile(r'''['"]([a-z]\w*)['"]''')
+
+class CallSite(NamedTuple):
+    path: str
+    line: int
+
+def load_getters(l10n_dart: Path) -> Dict[str, str]:
+    """ARB key of every member of the generated ``S`` class, by member name."""
+    text = l10n_dart.read_text(encoding='utf-8')
+    getters = {}
+    members = list(_MEMBER.finditer(text))
+    for index, match in enumerate(members):
+        end = members[index + 1].start() if index + 1 < len(members) else len(text)
+        name = _MESSAGE_NAME.search(text, match.end(), end)
+        member = match.group(1) or match.group(2)
+        getters[member] = name.group(1) if name else member
+    return getters
+
+def scan_file(path: str) -> Tuple[Dict[str, List[int]], List[str]]:
+    """Lines of every member accessed on ``S`` in a Dart file, and the identifiers it quotes."""
+    text = Path(path).read_text(encoding='utf-8', errors='replace')
+    line_starts = [0] + [match.end() for match in re.finditer('\n', text)]
+
+    calls: Dict[str, List[int]] = {}
+
+    def add(member: str, offset: int):
+        calls.setdefault(member, []).append(bisect_right(line_starts, offset))
+
+    def is_s(match) -> bool:
+        start = match.start()
+        return not start or not (text[start - 1].isalnum() or text[start - 1] in '_.$')
+
+    for match in _DIRECT.finditer(text):
+        if is_s(match):
+            add(match.group(1), match.start(1))
+    aliases = set()
+    for match in _ASSIGNED.finditer(text):
+        alias = _ALIAS.search(text, max(0, match.start() - 64), match.start()) if is_s(match) else None
+        if alias:
+            aliases.add(alias.group(1))
+    aliases.update(match.group(1) for match in _TYPED.finditer(text) if is_s(match))
+    for alias in aliases:
+        for match in re.finditer(rf'(?<![\w.$]){re.escape(alias)}\s*\??\.\s*(\w+)', text):
+            add(match.group(1), match.start(1))
+    return calls, sorted(set(_LITERAL.findall(text)))
+
+def dart_files(app_root: Path, generated_dir: Path) -> List[Path]:
+    """Every Dart file under the app's source directories, outside generated and build directories."""
+    generated_dir = generated_dir.resolve()
+    paths = []
+    for source_dir in SOURCE_DIRS:
+        for root, dirs, files in os.walk(app_root / source_dir):
+            dirs[:] = [name for name in dirs if name not in SKIPPED_DIRS and Path(root, name).resolve() != generated_dir]
+            paths.extend(Path(root, name) for name in files if name.endswith('.dart'))
+    return sorted(paths)
+
+class UsageIndex:
+    """Call sites of every localization key in the app's Dart sources.
+
+    Keys come from the members of the generated ``S`` class in
+    ``lib/src/generated/l10n.dart``. A key is used when a Dart file reads
+    it from ``S.of(context)``, ``S.current``, ``S.maybeOf(context)``, a
+    variable assigned one of them, or a parameter, field or getter declared
+    with the type ``S``. Keys whose name appears quoted in a Dart file may
+    be looked up dynamically and count as used too, as do keys without a
+    member yet (``l10n.dart`` not regenerated since they were added).
+
+    The scan is textual: an ``S`` instance reaching code through an untyped
+    or ``dynamic`` variable is not followed, so check a key with ``--where``
+    before deleting it.
+
+    Files are scanned in a process pool and the results are cached by path,
+    mtime and size in ``.l10n_state/dart_usage_cache.json``, so a rebuild
+    only reads the files changed since the last one.
+    """
+
+    def __init__(self, getters: Dict[str, str], calls: Dict[str, List[CallSite]], quoted: Dict[str, List[str]]):
+        self.getters = getters
+        self.calls = calls
+        self.quoted = quoted
+        self._defined = set(getters.values())
+        self.files = 0
+        self.scanned = 0
+        self.seconds = 0.0
+        self.skipped = 0
+
+    @classmethod
+    def build(cls, app_root: Optional[str] = None, generated_dir: Optional[str] = None,
+              cache_path: Optional[str] = None, workers: int = 0) -> 'UsageIndex':
+        """Scan the app's Dart files that changed since the cached scan and index their calls.
+
+        ``workers`` 0 uses one process per CPU; 1 scans in this process.
+        """
+        start = time.perf_counter()
+        app_root = Path(app_root) if app_root else DEFAULT_APP_ROOT
+        generated_dir = Path(generated_dir) if generated_dir else DEFAULT_GENERATED_DIR
+        cache_path = Path(cache_path) if cache_path else DEFAULT_CACHE_PATH
+        getters = load_getters(generated_dir / 'l10n.dart')
+
+        cached = cls._read_cache(cache_path)
+        files = {}
+        stale = []
+        for path in dart_files(app_root, generated_dir):
+            relative = path.relative_to(app_root).as_posix()
+            stat = path.stat()
+            entry = cached.get(relative)
+            if entry and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+                files[relative] = entry
+            else:
+                files[relative] = [stat.st_mtime_ns, stat.st_size]
+                stale.append(relative)
+
+        workers = workers or os.cpu_count() or 1
+        paths = [str(app_root / relative) for relative in stale]
+        if workers == 1 or len(paths) < 2:
+            results = [scan_file(path) for path in paths]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(scan_file, paths, chunksize=max(1, len(paths) // (workers * 4))))
+        for relative, (file_calls, literals) in zip(stale, results):
+            files[relative] += [file_calls, literals]
+
+        if stale or len(files) != len(cached):
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            atomic_write_text(str(cache_path), json.dumps({'version': CACHE_VERSION, 'files': files},
+                                                          separators=(',', ':')))
+
+        calls: Dict[str, List[CallSite]] = {}
+        quoted: Dict[str, List[str]] = {}
+        for relative, (_, _, file_calls, literals) in sorted(files.items()):
+            for member, lines in file_calls.items():
+                if member in getters:
+                    calls.setdefault(getters[member], []).extend(CallSite(relative, line) for line in lines)
+            for literal in literals:
+                if literal in getters:
+                    quoted.setdefault(getters[literal], []).append(relative)
+
+        index = cls(getters, calls, quoted)
+        index.files = len(files)
+        index.scanned = len(stale)
+        index.seconds = time.perf_counter() - start
+        logger.info(f"Indexed {len(calls)} used keys in {len(files)} Dart files "
+                    f"({len(stale)} scanned, {len(files) - len(stale)} cached) in {index.seconds * 1000:.0f} ms")
+        return index
+
+    @staticmethod
+    def _read_cache(cache_path: Path) -> Dict[str, list]:
+        if not cache_path.exists():
+            return {}
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return data['files'] if data.get('version') == CACHE_VERSION else {}
+        except (OSError, ValueError, KeyError, AttributeError) as e:
+            logger.warning(f"Ignoring unreadable usage cache {cache_path}: {str(e)}")
+            return {}
+
+    @property
+    def keys(self) -> List[str]:
+        return list(self.getters.values())
+
+    def is_used(self, key: str) -> bool:
+        return key in self.calls or key in self.quoted or key not in self._defined
+
+    def unused_keys(self, keys: Optional[Iterable[str]] = None) -> List[str]:
+        """Keys among ``keys`` (default: every key of ``S``) that no Dart file uses."""
+        return [key for key in (self.keys if keys is None else keys) if not self.is_used(key)]
+
+    def skip_unused(self, keys: List[str]) -> List[str]:
+        """``keys`` without the unused ones, counting what was left out for the summary."""
+        kept = [key for key in keys if self.is_used(key)]
+        self.skipped += len(keys) - len(kept)
+        return kept
+
+    def log_summary(self):
+        if not self.skipped:
+            return
+
+        logger.info(f"🧹 Usage Index Summary:")
+        logger.info(f"   - Keys used by the app: {len(self.calls)} called, "
+                    f"{len(set(self.quoted) - set(self.calls))} only quoted; "
+                    f"unused: {len(self.unused_keys())} of {len(self._defined)}")
+        logger.info(f"   - Unused keys skipped: {self.skipped}")
+
+def _dart_entry_bytes(messages_dir: Path) -> Dict[str, int]:
+    """Bytes each key takes in the generated ``messages_*.dart`` files, its message function included."""
+    entry = re.compile(r'^    "(\w+)": (.*?),\n(?=    "|  };)', re.MULTILINE | re.DOTALL)
+    function = re.compile(r'^  static String (m\d+)\(.*?;\n\n?', re.MULTILINE | re.DOTALL)
+    sizes: Dict[str, int] = {}
+    for path in sorted(messages_dir.glob('messages_*.dart')):
+        text = path.read_text(encoding='utf-8')
+        functions = {match.group(1): len(match.group(0).encode('utf-8')) for match in function.finditer(text)}
+        for match in entry.finditer(text):
+            size = len(match.group(0).encode('utf-8')) + functions.get(match.group(2), 0)
+            sizes[match.group(1)] = sizes.get(match.group(1), 0) + size
+    return sizes
+
+def prunable_report(index: UsageIndex, corpus: ArbCorpus, generated_dir: Path) -> List[Dict[str, object]]:
+    """Every unused key with its bytes across all ARB files and all generated message files, largest first."""
+    dart_bytes = _dart_entry_bytes(generated_dir / 'intl')
+    report = []
+    for key in index.unused_keys():
+        arb = 0
+        for locale in corpus.locales:
+            value = corpus.get(locale, key)
+            if value is not None:
+                # The entry and its separator as write_arb serializes them
+                entry = json.dumps({key: value}, ensure_ascii=False, indent='\t')[2:-2]
+                arb += len(f'{entry},\n'.encode('utf-8'))
+        report.append({'key': key, 'arb_bytes': arb, 'dart_bytes': dart_bytes.get(key, 0),
+                       'english': corpus.get(corpus.base_locale, key)})
+    report.sort(key=lambda row: row['arb_bytes'] + row['dart_bytes'], reverse=True)
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description='Index where the app uses each localization key and list the unused ones')
+    parser.add_argument('--app-root', default=str(DEFAULT_APP_ROOT), help='Flutter app root holding lib/ and packages/')
+    parser.add_argument('--generated-dir', default=str(DEFAULT_GENERATED_DIR),
+                        help='Generated localization code (l10n.dart and intl/messages_*.dart)')
+    parser.add_argument('--l10n-dir', default=str(DEFAULT_L10N_DIR), help='Directory containing intl_*.arb files')
+    parser.add_argument('--cache', default=str(DEFAULT_CACHE_PATH),
+                        help='Scan cache keyed by file mtime (default: .l10n_state/dart_usage_cache.json)')
+    parser.add_argument('--workers', type=int, default=0, help='Worker processes (default: one per CPU; 1 runs in-process)')
+    parser.add_argument('--where', nargs='+', metavar='KEY', help='List the call sites of these keys')
+    parser.add_argument('--prunable', action='store_true', help='List the unused keys and the bytes they cost')
+    parser.add_argument('--json', action='store_true', help='Print the --prunable report as JSON')
+
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format='%(message)s')
+    index = UsageIndex.build(args.app_root, args.generated_dir, args.cache, args.workers)
+
+    if args.where:
+        for key in args.where:
+            sites = index.calls.get(key, [])
+            print(f"{key}: {len(sites)} call sites" + (f", quoted in {len(index.quoted[key])} files" if key in index.quoted else ''))
+            for site in sites:
+                print(f"   {site.path}:{site.line}")
+        return
+
+    if args.prunable:
+        report = prunable_report(index, ArbCorpus.load(args.l10n_dir), Path(args.generated_dir))
+        if args.json:
+            print(json.dumps(report, ensure_ascii=False, indent=2))
+            return
+        for row in report:
+            print(f"{row['key']:<48} {row['arb_bytes']:>8} {row['dart_bytes']:>8}  {(row['english'] or '')[:50]!r}")
+        arb = sum(row['arb_bytes'] for row in report)
+        dart = sum(row['dart_bytes'] for row in report)
+        print(f"{len(report)} unused keys: {arb / 1024:.1f} KiB of ARB files, {dart / 1024:.1f} KiB of generated Dart")
+        return
+
+    unused = index.unused_keys()
+    print(f"Dart files: {index.files} ({index.scanned} scanned, {index.files - index.scanned} cached) "
+          f"in {index.seconds * 1000:.0f} ms")
+    print(f"Keys: {len(index.getters)}; called: {len(index.calls)}; "
+          f"only quoted: {len(set(index.quoted) - set(index.calls))}; unused: {len(unused)}")
+
+if __name__ == "__main__":
+    main()
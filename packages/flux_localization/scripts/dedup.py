@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Translate each distinct English string once per language and fan the result out to every key using it
+"""
+
+import argparse
+import fnmatch
+import json
+import logging
+import re
+import unicodedata
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from arb_corpus import DEFAULT_L10N_DIR, ArbCorpus
+from batching import PAIR_OVERHEAD_TOKENS, estimate_tokens, expected_output_tokens
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_EXCLUDE_FILE = Path(__file__).resolve().parent / 'dedup_exclude.txt'
+
+_SPACES = re.compile(r'\s+')
+
+def _trailing_punctuation(text: str) -> int:
+    """Index where the run of trailing punctuation and whitespace of ``text`` starts."""
+    end = len(text)
+    while end > 0 and (text[end - 1].isspace() or unicodedata.category(text[end - 1]).startswith('P')):
+        end -= 1
+    return end
+
+def normalize(text: str) -> str:
+    """Grouping form of a source string: whitespace collapsed, trailing punctuation dropped.
+
+    Case is kept: "CANCEL" and "cancel" are translated separately, since
+    the fan-out only carries punctuation over, not capitalization.
+    """
+    text = _SPACES.sub(' ', text.strip())
+    return text[:_trailing_punctuation(text)]
+
+def trailing_punctuation(text: str) -> str:
+    return text[_trailing_punctuation(text):].strip()
+
+def transfer_punctuation(translation: str, source: str) -> str:
+    """Give a translation the trailing punctuation of ``source`` instead of its own."""
+    return translation[:_trailing_punctuation(translation)] + trailing_punctuation(source)
+
+def load_exclusions(path: Optional[Path]) -> List[str]:
+    """Key names or glob patterns, one per line; ``#`` starts a comment."""
+    if path is None or not Path(path).exists():
+        return []
+    patterns = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.split('#', 1)[0].strip()
+            if line:
+                patterns.append(line)
+    return patterns
+
+class DedupPlan:
+    """The unique texts of one language's job and how to fan their translations back out."""
+
+    def __init__(self, texts: Dict[str, str], unique: Dict[str, str], members: Dict[str, List[str]]):
+        self.texts = texts
+        self.unique = unique
+        self.members = members
+
+    @property
+    def duplicate_keys(self) -> List[str]:
+        return [key for group in self.members.values() for key in group[1:]]
+
+    def expand(self, translations: Dict[str, str]) -> Dict[str, str]:
+        """Translations for every key of the job, in job order.
+
+        A key whose source differs from its group's representative only in
+        trailing punctuation gets the representative's translation with its
+        own punctuation; keys that were not translated stay missing.
+        """
+        representative_of = {key: group[0] for group in self.members.values() for key in group}
+        expanded = {}
+        for key, text in self.texts.items():
+            representative = representative_of.get(key, key)
+            if representative not in translations:
+                continue
+            translation = translations[representative]
+            if key != representative and trailing_punctuation(text) != trailing_punctuation(self.texts[representative]):
+                translation = transfer_punctuation(translation, text)
+            expanded[key] = translation
+        return expanded
+
+class SourceDeduplicator:
+    """Group keys by normalized English text so each distinct string is sent once per language.
+
+    Keys matching an exclusion pattern (their text needs different context
+    per key) are always sent on their own.
+    """
+
+    def __init__(self, exclude: Iterable[str] = ()):
+        self.exclude = list(exclude)
+        self.keys_in = 0
+        self.keys_sent = 0
+        self.tokens_saved = 0
+        self._languages = 0
+
+    def is_excluded(self, key: str) -> bool:
+        return any(fnmatch.fnmatchcase(key, pattern) for pattern in self.exclude)
+
+    def plan(self, texts: Dict[str, str], target_language: str) -> DedupPlan:
+        """Pick one representative key per normalized text and count the payload tokens saved."""
+        groups: Dict[str, List[str]] = {}
+        for key, text in texts.items():
+            group = normalize(text)
+            # Excluded keys and strings that are nothing but punctuation are never merged
+            if not group or self.is_excluded(key):
+                group = '\0' + key
+            groups.setdefault(group, []).append(key)
+
+        members = {group: keys for group, keys in groups.items() if len(keys) > 1}
+        unique = {keys[0]: texts[keys[0]] for keys in groups.values()}
+        plan = DedupPlan(texts, unique, members)
+
+        self.keys_in += len(texts)
+        self.keys_sent += len(unique)
+        self._languages += 1
+        for key in plan.duplicate_keys:
+            text = texts[key]
+            # The id/text pair in the prompt plus its translation in the response
+            self.tokens_saved += (estimate_tokens(json.dumps(text, ensure_ascii=False)) + PAIR_OVERHEAD_TOKENS
+                                  + expected_output_tokens(text, target_language))
+        return plan
+
+    def log_summary(self):
+        if not self.keys_in:
+            return
+
+        saved_keys = self.keys_in - self.keys_sent
+        logger.info(f"🔁 Deduplication Summary:")
+        logger.info(f"   - Keys to translate: {self.keys_in} across {self._languages} languages")
+        logger.info(f"   - Keys sent after deduplication: {self.keys_sent} ({saved_keys} fanned out, "
+                    f"{saved_keys / self.keys_in * 100:.1f}%)")
+        logger.info(f"   - Estimated payload tokens saved: {self.tokens_saved}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Report keys of the English ARB file that share a source string')
+    parser.add_argument('--l10n-dir', default=str(DEFAULT_L10N_DIR), help='Directory containing intl_en.arb')
+    parser.add_argument('--exclude-file', default=str(DEFAULT_EXCLUDE_FILE),
+                        help='Keys or glob patterns never merged (default: scripts/dedup_exclude.txt)')
+
+    args = parser.parse_args()
+
+    texts = ArbCorpus.load(args.l10n_dir).translatable()
+
+    dedup = SourceDeduplicator(load_exclusions(Path(args.exclude_file)))
+    plan = dedup.plan(texts, 'fr')
+    for keys in plan.members.values():
+        print(' = '.join(f'{key} ({texts[key]!r})' for key in keys))
+    print(f"{len(texts)} keys, {len(plan.unique)} distinct strings, {len(plan.duplicate_keys)} keys fanned out")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+Fuzzy translation memory: character n-gram similarity between English strings and the pairs already translated
+"""
+
+import argparse
+import logging
+import math
+import random
+import re
+import statistics
+import time
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from arb_corpus import DEFAULT_L10N_DIR, ArbCorpus
+from placeholders import PlaceholderError, check
+
+logger = logging.getLogger(__name__)
+
+NGRAM = 3
+# Reuse a translation only when the English is the same string (up to whitespace)
+DEFAULT_REUSE_THRESHOLD = 1.0
+# Below this cosine similarity a neighbour says little about how to translate
+DEFAULT_HINT_THRESHOLD = 0.5
+# Few-shot examples per batch, and per key of the batch
+DEFAULT_MAX_EXAMPLES = 8
+EXAMPLES_PER_KEY = 2
+
+_SPACES = re.compile(r'\s+')
+
+def ngrams(text: str) -> Counter:
+    """Character trigrams of a text with collapsed whitespace, padded so short strings still have some."""
+    text = f" {_SPACES.sub(' ', text.strip())} "
+    return Counter(text[i:i + NGRAM] for i in range(max(1, len(text) - NGRAM + 1)))
+
+class FuzzyMemory:
+    """Nearest already-translated English strings of a text, per locale.
+
+    Every English source is a sparse TF-IDF vector of its character
+    trigrams, L2-normalised, so a dot product is the cosine similarity. The
+    vectors are kept as posting lists per trigram in flat NumPy arrays: a
+    lookup gathers the postings of the query's trigrams and sums them per
+    source with one ``np.bincount``, touching only sources that share a
+    trigram with the query. The sources are shared by all locales (the
+    English file), so one index serves every ``(English, target)`` pair;
+    each locale only adds a mask of the sources it has translated.
+
+    A match scoring at least ``reuse_threshold`` whose translation keeps
+    the new text's placeholders is reused without an API call. Matches
+    scoring at least ``hint_threshold`` are offered as few-shot examples
+    for the batch prompt. Keys being translated never match themselves, so
+    the stale translation of a changed key is not offered.
+    """
+
+    def __init__(self, reuse_threshold: float = DEFAULT_REUSE_THRESHOLD,
+                 hint_threshold: float = DEFAULT_HINT_THRESHOLD, max_examples: int = DEFAULT_MAX_EXAMPLES):
+        self.reuse_threshold = reuse_threshold
+        self.hint_threshold = hint_threshold
+        self.max_examples = max_examples
+
+        self.keys: List[str] = []
+        self.sources: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._vocab: Dict[str, int] = {}
+        self._idf = np.zeros(0, dtype=np.float32)
+        self._unseen_idf = 1.0
+        # Posting lists of every trigram, concatenated: _indptr[t]:_indptr[t + 1]
+        self._indptr = np.zeros(1, dtype=np.int64)
+        self._posting_rows = np.zeros(0, dtype=np.int32)
+        self._posting_weights = np.zeros(0, dtype=np.float32)
+        self._translations: Dict[str, List[Optional[str]]] = {}
+        self._available: Dict[str, np.ndarray] = {}
+
+        self.reused = Counter()
+        self.examples_sent = Counter()
+        self.lookups = 0
+        self.lookup_seconds = 0.0
+
+    @classmethod
+    def from_corpus(cls, corpus: ArbCorpus, **kwargs) -> 'FuzzyMemory':
+        """Index the English strings of a loaded corpus and every locale's translations of them."""
+        memory = cls(**kwargs)
+        sources = {key: value for key, value in corpus.translatable().items() if isinstance(value, str)}
+        memory.index(sources, {locale: {key: corpus.get(locale, key) for key in sources}
+                               for locale in corpus.target_locales})
+        return memory
+
+    @property
+    def pairs(self) -> int:
+        return sum(int(available.sum()) for available in self._available.values())
+
+    def index(self, sources: Dict[str, str], translations: Dict[str, Dict[str, Optional[str]]]):
+        """Build the index of ``sources`` and the ``{locale: {key: translation}}`` pairs available for them."""
+        self.keys = list(sources)
+        self.sources = list(sources.values())
+        self._rows = {key: row for row, key in enumerate(self.keys)}
+        self._vocab = {}
+
+        rows, columns, counts = [], [], []
+        for row, text in enumerate(self.sources):
+            for gram, count in ngrams(text).items():
+                rows.append(row)
+                columns.append(self._vocab.setdefault(gram, len(self._vocab)))
+                counts.append(count)
+        rows = np.array(rows, dtype=np.int32)
+        columns = np.array(columns, dtype=np.int64)
+
+        document_frequency = np.bincount(columns, minlength=len(self._vocab))
+        self._idf = (np.log((len(self.sources) + 1) / (document_frequency + 1)) + 1).astype(np.float32)
+        self._unseen_idf = math.log(len(self.sources) + 1) + 1
+        weights = (1 + np.log(np.array(counts, dtype=np.float32))) * self._idf[columns]
+        norms = np.sqrt(np.bincount(rows, weights=weights * weights, minlength=len(self.sources)))
+        weights = weights / np.maximum(norms[rows], 1e-12)
+
+        order = np.argsort(columns, kind='stable')
+        self._posting_rows = rows[order]
+        self._posting_weights = weights[order].astype(np.float32)
+        self._indptr = np.concatenate(([0], np.cumsum(document_frequency))).astype(np.int64)
+
+        self._translations = {}
+        self._available = {}
+        for locale, values in translations.items():
+            column = [values.get(key) if isinstance(values.get(key), str) else None for key in self.keys]
+            self._translations[locale] = column
+            self._available[locale] = np.array([value is not None and bool(value.strip()) for value in column],
+                                               dtype=bool)
+
+    def scores(self, text: str) -> Optional[np.ndarray]:
+        """Cosine similarity of ``text`` to every indexed source, or None if it shares no trigram with any."""
+        grams = ngrams(text)
+        columns = []
+        query_weights = []
+        norm = 0.0
+        for gram, count in grams.items():
+            column = self._vocab.get(gram)
+            weight = (1 + math.log(count)) * (self._idf[column] if column is not None else self._unseen_idf)
+            norm += weight * weight
+            if column is not None:
+                columns.append(column)
+                query_weights.append(weight)
+        if not columns:
+            return None
+
+        columns = np.array(columns, dtype=np.int64)
+        starts = self._indptr[columns]
+        lengths = self._indptr[columns + 1] - starts
+        # Positions of every posting of the query's trigrams, without a Python loop
+        offsets = np.repeat(starts - np.concatenate(([0], np.cumsum(lengths)[:-1])), lengths)
+        positions = offsets + np.arange(int(lengths.sum()))
+        weights = self._posting_weights[positions] * np.repeat(np.array(query_weights, dtype=np.float32) / math.sqrt(norm),
+                                                               lengths)
+        return np.bincount(self._posting_rows[positions], weights=weights, minlength=len(self.sources))
+
+    def nearest(self, text: str, locale: str, limit: int = 3,
+                exclude: Optional[np.ndarray] = None) -> List[Tuple[float, str, str, str]]:
+        """The best ``(score, key, English, translation)`` matches of ``text`` among the locale's translated pairs."""
+        start = time.perf_counter()
+        available = self._available.get(locale)
+        scores = self.scores(text) if available is not None else None
+        matches = []
+        if scores is not None:
+            if exclude is not None:
+                available = available & ~exclude
+            scores = np.where(available, scores, -1.0)
+            limit = min(limit, len(scores))
+            best = np.argpartition(-scores, limit - 1)[:limit]
+            for row in best[np.argsort(-scores[best])]:
+                if scores[row] <= 0:
+                    break
+                matches.append((float(scores[row]), self.keys[row], self.sources[row],
+                                self._translations[locale][row]))
+        self.lookups += 1
+        self.lookup_seconds += time.perf_counter() - start
+        return matches
+
+    def _excluded(self, texts: Dict[str, str]) -> np.ndarray:
+        exclude = np.zeros(len(self.sources), dtype=bool)
+        exclude[[self._rows[key] for key in texts if key in self._rows]] = True
+        return exclude
+
+    def reuse(self, texts: Dict[str, str], locale: str) -> Dict[str, str]:
+        """Translations of ``texts`` taken from matches at or above the reuse threshold."""
+        if locale not in self._available:
+            return {}
+        exclude = self._excluded(texts)
+        reused = {}
+        for key, text in texts.items():
+            matches = self.nearest(text, locale, 1, exclude)
+            if not matches or matches[0][0] < self.reuse_threshold - 1e-6:
+                continue
+            translation = matches[0][3]
+            try:
+                if check(text, translation) is None:
+                    reused[key] = translation
+            except PlaceholderError:
+                continue
+        self.reused[locale] += len(reused)
+        return reused
+
+    def examples(self, keys: Iterable[str], locale: str) -> Dict[str, str]:
+        """``{English: translation}`` of the closest translated strings to a batch of keys, best first.
+
+        Each key is looked up by its English text in the index, not by the
+        text sent for it, which may be masked or, when retranslating, the
+        current translation. Keys the index does not know are skipped.
+        """
+        if locale not in self._available or not self.max_examples:
+            return {}
+        rows = [self._rows[key] for key in keys if key in self._rows]
+        exclude = np.zeros(len(self.sources), dtype=bool)
+        exclude[rows] = True
+        queries = {self.sources[row] for row in rows}
+        candidates = []
+        for text in queries:
+            candidates.extend(match for match in self.nearest(text, locale, EXAMPLES_PER_KEY, exclude)
+                              if match[0] >= self.hint_threshold)
+        examples = {}
+        for score, key, source, translation in sorted(candidates, key=lambda match: -match[0]):
+            if source not in examples and source not in queries:
+                examples[source] = translation
+                if len(examples) >= self.max_examples:
+                    break
+        self.examples_sent[locale] += len(examples)
+        return examples
+
+    def log_summary(self):
+        if not self.lookups:
+            return
+
+        logger.info(f"🔎 Fuzzy Memory Summary:")
+        logger.info(f"   - Index: {len(self.sources)} English strings, {self.pairs} translated pairs, "
+                    f"{len(self._vocab)} trigrams")
+        logger.info(f"   - Reused without a call: {sum(self.reused.values())} keys "
+                    f"(threshold {self.reuse_threshold:.2f})")
+        logger.info(f"   - Few-shot examples sent: {sum(self.examples_sent.values())} "
+                    f"(threshold {self.hint_threshold:.2f})")
+        logger.info(f"   - Lookups: {self.lookups}, {self.lookup_seconds / self.lookups * 1e6:.0f} µs each")
+
+def synthetic_pairs(corpus: ArbCorpus, locale: str, count: int, seed: int) -> Tuple[Dict[str, str], Dict[str, Dict[str, str]]]:
+    """``count`` distinct (English, translation) pairs made by joining two real pairs of ``locale``."""
+    base = corpus.translatable()
+    pairs = [(base[key], corpus.get(locale, key)) for key in base if corpus.get(locale, key)]
+    rng = random.Random(seed)
+    sources, translations = {}, {}
+    while len(sources) < count:
+        (english_a, target_a), (english_b, target_b) = rng.sample(pairs, 2)
+        key = f"synthetic{len(sources)}"
+        sources[key] = f"{english_a} {english_b}"
+        translations[key] = f"{target_a} {target_b}"
+    return sources, {locale: translations}
+
+def benchmark(memory: FuzzyMemory, queries: List[str], locale: str):
+    timings = []
+    for text in queries:
+        start = time.perf_counter()
+        memory.nearest(text, locale, EXAMPLES_PER_KEY)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    print(f"{len(queries)} lookups against {len(memory.sources)} English strings "
+          f"({memory.pairs} pairs over {len(memory._available)} locales): "
+          f"median {statistics.median(timings) * 1e6:.0f} µs, p99 {timings[int(len(timings) * 0.99)] * 1e6:.0f} µs, "
+          f"max {timings[-1] * 1e6:.0f} µs")
+
+def main():
+    parser = argparse.ArgumentParser(description='Look up the nearest translated strings of an English text')
+    parser.add_argument('text', nargs='?', help='English text to look up')
+    parser.add_argument('--locale', default='fr', help='Locale whose translations are searched (default: fr)')
+    parser.add_argument('--l10n-dir', default=str(DEFAULT_L10N_DIR), help='Directory containing intl_*.arb files')
+    parser.add_argument('--limit', type=int, default=5, help='Matches to show (default: 5)')
+    parser.add_argument('--benchmark', action='store_true',
+                        help='Time a lookup of every English string against the whole corpus')
+    parser.add_argument('--synthetic', type=int, default=0,
+                        help='With --benchmark: index this many synthetic pairs of --locale instead, to test scale')
+
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    corpus = ArbCorpus.load(args.l10n_dir)
+
+    start = time.perf_counter()
+    if args.synthetic:
+        memory = FuzzyMemory()
+        memory.index(*synthetic_pairs(corpus, args.locale, args.synthetic, seed=1))
+    else:
+        memory = FuzzyMemory.from_corpus(corpus)
+    print(f"Indexed {len(memory.sources)} English strings, {memory.pairs} pairs in "
+          f"{(time.perf_counter() - start) * 1000:.0f} ms")
+
+    if args.benchmark:
+        benchmark(memory, list(corpus.translatable().values()), args.locale)
+        return
+    if not args.text:
+        parser.error("give a text to look up, or --benchmark")
+    for score, key, source, translation in memory.nearest(args.text, args.locale, args.limit):
+        print(f"{score:.3f}  {key:<36} {source!r} -> {translation!r}")
+
+if __name__ == "__main__":
+    main()
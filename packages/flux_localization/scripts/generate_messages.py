@@ -0,0 +1,527 @@
+#!/usr/bin/env python3
+"""
+Regenerate the Dart message files of only the ARB files that changed since the last generation
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+from arb_corpus import DEFAULT_L10N_DIR, locale_of
+from arb_io import atomic_write_text
+from dart_usage import DEFAULT_GENERATED_DIR
+from translation_memory import STATE_DIR
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STATE_PATH = STATE_DIR / 'generate_messages.json'
+
+# Bump whenever the emitted code changes so every file is regenerated once
+GENERATOR_VERSION = 1
+
+BASE_LOCALE = 'en'
+
+# dart format's line length
+LINE_LENGTH = 80
+
+# {name} arguments; any other brace is ICU syntax (plural, select, gender)
+_ARGUMENT = re.compile(r'\{(\w+)\}')
+# How translations spell them: intl_utils trims the name and matches it to
+# the English argument regardless of case, so "{ X }" reads as {x}
+_LOOSE_ARGUMENT = re.compile(r'\{\s*(\w+)\s*\}')
+
+# Escapes of package:intl's generate_localized for double-quoted messages
+_MESSAGE_ESCAPES = {'\\': '\\\\', '"': '\\"', '\b': '\\b', '\f': '\\f', '\n': '\\n', '\r': '\\r', '\t': '\\t',
+                    '\v': '\\v', "'": "\\'", '$': '\\$'}
+# Escapes of intl_utils for the single-quoted English defaults in l10n.dart
+_DEFAULT_ESCAPES = {'\\': '\\\\', "'": "\\'", '\n': '\\n', '\r': '\\r', '\t': '\\t', '$': '\\$'}
+
+MESSAGES_HEADER = """\
+// DO NOT EDIT. This is code generated via package:intl/generate_localized.dart
+// This is a library that provides messages for a {locale} locale. All the
+// messages from the main program should be duplicated here with the same
+// function name.
+
+// Ignore issues from commonly used lints in this file.
+// ignore_for_file:unnecessary_brace_in_string_interps, unnecessary_new
+// ignore_for_file:prefer_single_quotes,comment_references, directives_ordering
+// ignore_for_file:annotate_overrides,prefer_generic_function_type_aliases
+// ignore_for_file:unused_import, file_names, avoid_escaping_inner_quotes
+// ignore_for_file:unnecessary_string_interpolations, unnecessary_string_escapes
+
+import 'package:intl/intl.dart';
+import 'package:intl/message_lookup_by_library.dart';
+
+final messages = new MessageLookup();
+
+typedef String MessageIfAbsent(String messageStr, List<dynamic> args);
+
+class MessageLookup extends MessageLookupByLibrary {{
+  String get localeName => '{locale}';
+
+"""
+
+# The fixed parts of l10n.dart around the getters and the supported locales
+L10N_HEADER = '''\
+// GENERATED CODE - DO NOT MODIFY BY HAND
+import 'package:flutter/material.dart';
+import 'package:intl/intl.dart';
+import 'intl/messages_all.dart';
+
+// **************************************************************************
+// Generator: Flutter Intl IDE plugin
+// Made by Localizely
+// **************************************************************************
+
+// ignore_for_file: non_constant_identifier_names, lines_longer_than_80_chars
+// ignore_for_file: join_return_with_assignment, prefer_final_in_for_each
+// ignore_for_file: avoid_redundant_argument_values, avoid_escaping_inner_quotes
+
+class S {
+  S();
+
+  static S? _current;
+
+  static S get current {
+    assert(
+      _current != null,
+      'No instance of S was loaded. Try to initialize the S delegate before accessing S.current.',
+    );
+    return _current!;
+  }
+
+  static const AppLocalizationDelegate delegate = AppLocalizationDelegate();
+
+  static Future<S> load(Locale locale) {
+    final name =
+        (locale.countryCode?.isEmpty ?? false)
+            ? locale.languageCode
+            : locale.toString();
+    final localeName = Intl.canonicalizedLocale(name);
+    return initializeMessages(localeName).then((_) {
+      Intl.defaultLocale = localeName;
+      final instance = S();
+      S._current = instance;
+
+      return instance;
+    });
+  }
+
+  static S of(BuildContext context) {
+    final instance = S.maybeOf(context);
+    assert(
+      instance != null,
+      'No instance of S present in the widget tree. Did you add S.delegate in localizationsDelegates?',
+    );
+    return instance!;
+  }
+
+  static S? maybeOf(BuildContext context) {
+    return Localizations.of<S>(context, S);
+  }
+
+'''
+
+L10N_FOOTER_START = '''\
+}
+
+class AppLocalizationDelegate extends LocalizationsDelegate<S> {
+  const AppLocalizationDelegate();
+
+  List<Locale> get supportedLocales {
+    return const <Locale>[
+'''
+
+L10N_FOOTER_END = '''\
+    ];
+  }
+
+  @override
+  bool isSupported(Locale locale) => _isSupported(locale);
+  @override
+  Future<S> load(Locale locale) => S.load(locale);
+  @override
+  bool shouldReload(AppLocalizationDelegate old) => false;
+
+  bool _isSupported(Locale locale) {
+    for (var supportedLocale in supportedLocales) {
+      if (supportedLocale.languageCode == locale.languageCode) {
+        return true;
+      }
+    }
+    return false;
+  }
+}
+'''
+
+MESSAGES_ALL_HEADER = '''\
+// DO NOT EDIT. This is code generated via package:intl/generate_localized.dart
+// This is a library that looks up messages for specific locales by
+// delegating to the appropriate library.
+
+// Ignore issues from commonly used lints in this file.
+// ignore_for_file:implementation_imports, file_names, unnecessary_new
+// ignore_for_file:unnecessary_brace_in_string_interps, directives_ordering
+// ignore_for_file:argument_type_not_assignable, invalid_assignment
+// ignore_for_file:prefer_single_quotes, prefer_generic_function_type_aliases
+// ignore_for_file:comment_references
+
+import 'dart:async';
+
+import 'package:intl/intl.dart';
+import 'package:intl/message_lookup_by_library.dart';
+import 'package:intl/src/intl_helpers.dart';
+
+'''
+
+MESSAGES_ALL_FOOTER = '''\
+    default:
+      return null;
+  }
+}
+
+/// User programs should call this before using [localeName] for messages.
+Future<bool> initializeMessages(String localeName) async {
+  var availableLocale = Intl.verifiedLocale(
+    localeName,
+    (locale) => _deferredLibraries[locale] != null,
+    onFailure: (_) => null,
+  );
+  if (availableLocale == null) {
+    return new Future.value(false);
+  }
+  var lib = _deferredLibraries[availableLocale];
+  await (lib == null ? new Future.value(false) : lib());
+  initializeInternalMessageLookup(() => new CompositeMessageLookup());
+  messageLookup.addLocale(availableLocale, _findGeneratedMessagesFor);
+  return new Future.value(true);
+}
+
+bool _messagesExistFor(String locale) {
+  try {
+    return _findExact(locale) != null;
+  } catch (e) {
+    return false;
+  }
+}
+
+MessageLookupByLibrary? _findGeneratedMessagesFor(String locale) {
+  var actualLocale = Intl.verifiedLocale(
+    locale,
+    _messagesExistFor,
+    onFailure: (_) => null,
+  );
+  if (actualLocale == null) return null;
+  return _findExact(actualLocale);
+}
+'''
+
+class UnsupportedMessage(Exception):
+    """A message this generator cannot emit the way intl_utils does (ICU plural, select or gender)."""
+
+def arguments(message: str) -> List[str]:
+    """Names of the ``{arguments}`` of a message in order of first appearance."""
+    if _LOOSE_ARGUMENT.sub('', message).count('{'):
+        raise UnsupportedMessage(f"ICU syntax in {message[:60]!r}")
+    return list(dict.fromkeys(_ARGUMENT.findall(message)))
+
+def _dart_length(text: str) -> int:
+    """Length in UTF-16 code units, which is what dart format measures."""
+    return len(text.encode('utf-16-le')) // 2
+
+def _escape(text: str, escapes: Dict[str, str]) -> str:
+    return ''.join(escapes.get(ch, ch) for ch in text)
+
+def message_segments(message: str, args: List[str]) -> List[Union[str, int]]:
+    """A message split into its literal text and, for each argument, the argument's index in ``args``."""
+    names = {arg.lower(): index for index, arg in enumerate(args)}
+    segments: List[Union[str, int]] = []
+    position = 0
+    for match in _LOOSE_ARGUMENT.finditer(message):
+        index = names.get(match.group(1).lower())
+        if index is not None:
+            if match.start() > position:
+                segments.append(message[position:match.start()])
+            segments.append(index)
+            position = match.end()
+    if position < len(message):
+        segments.append(message[position:])
+    return segments
+
+def message_literal(message: str, args: List[str]) -> str:
+    """A message as a double-quoted Dart string, its arguments interpolated as ``${name}``."""
+    return '"' + ''.join('${' + args[segment] + '}' if isinstance(segment, int) else _escape(segment, _MESSAGE_ESCAPES)
+                         for segment in message_segments(message, args)) + '"'
+
+def _overflow(layout: str) -> int:
+    return sum(max(0, _dart_length(line) - LINE_LENGTH) for line in layout.split('\n'))
+
+def _layout(*candidates: str) -> str:
+    """The layout dart format picks: the fewest characters past the line length, then the fewest splits.
+
+    Candidates are given from the fewest splits to the most.
+    """
+    return min(candidates, key=_overflow)
+
+def render_messages(locale: str, messages: Dict[str, str], base_args: Dict[str, List[str]]) -> str:
+    """The ``messages_<locale>.dart`` file of a locale's messages, as intl_utils and dart format emit it.
+
+    Only keys of the English file are emitted, sorted; keys whose English
+    text has arguments become ``m<n>`` functions numbered in that order.
+    """
+    keys = sorted(key for key in messages if key in base_args)
+    functions = []
+    entries = []
+    for key in keys:
+        args = base_args[key]
+        if args:
+            name = f'm{len(functions)}'
+            signature = f'  static String {name}({", ".join(args)}) =>'
+            literal = message_literal(messages[key], args)
+            functions.append(_layout(f'{signature} {literal};', f'{signature}\n      {literal};') + '\n\n')
+            entries.append(_layout(f'    "{key}": {name},', f'    "{key}":\n        {name},') + '\n')
+        else:
+            literal = message_literal(messages[key], [])
+            call = 'MessageLookupByLibrary.simpleMessage('
+            entries.append(_layout(
+                f'    "{key}": {call}{literal}),',
+                f'    "{key}": {call}\n      {literal},\n    ),',
+                f'    "{key}":\n        {call}{literal}),',
+                f'    "{key}":\n        {call}\n          {literal},\n        ),',
+            ) + '\n')
+
+    return (MESSAGES_HEADER.format(locale=locale) + ''.join(functions)
+            + '  final messages = _notInlinedMessages(_notInlinedMessages);\n'
+            + '  static Map<String, Function> _notInlinedMessages(_) => <String, Function>{\n'
+            + ''.join(entries) + '  };\n}\n')
+
+def default_literal(message: str, args: List[str]) -> str:
+    """An English message as the single-quoted default of ``Intl.message``, arguments as ``$name``."""
+    parts = []
+    position = 0
+    for match in _ARGUMENT.finditer(message):
+        if match.group(1) in args:
+            parts.append(_escape(message[position:match.start()], _DEFAULT_ESCAPES))
+            # Braces are needed when the next character would extend the name
+            following = message[match.end():match.end() + 1]
+            braced = following.isalnum() or following == '_'
+            parts.append('${' + match.group(1) + '}' if braced else '$' + match.group(1))
+            position = match.end()
+    parts.append(_escape(message[position:], _DEFAULT_ESCAPES))
+    return "'" + ''.join(parts) + "'"
+
+def render_l10n(english: Dict[str, str], locales: List[str]) -> str:
+    """``l10n.dart``: one member of ``S`` per English key, in file order, and the supported locales."""
+    members = []
+    for key, message in english.items():
+        args = arguments(message)
+        if args:
+            parameters = [f'Object {arg}' for arg in args]
+            header = _layout(f'  String {key}({", ".join(parameters)}) {{',
+                             f'  String {key}(\n' + ''.join(f'    {parameter},\n' for parameter in parameters) + '  ) {')
+        else:
+            header = f'  String get {key} {{'
+        fields = [default_literal(message, args), f"name: '{key}'", "desc: ''", f"args: [{', '.join(args)}]"]
+        call = _layout(f"    return Intl.message({', '.join(fields)});",
+                       '    return Intl.message(\n' + ''.join(f'      {field},\n' for field in fields) + '    );')
+        doc = message.replace('\n', '\\n')
+        members.append(f'  /// `{doc}`\n{header}\n{call}\n  }}\n')
+
+    supported = []
+    for locale in [BASE_LOCALE] + sorted(locale for locale in locales if locale != BASE_LOCALE):
+        subtags = locale.split('_')
+        fields = [f"languageCode: '{subtags[0]}'"]
+        for subtag in subtags[1:]:
+            fields.append(f"scriptCode: '{subtag}'" if len(subtag) == 4 else f"countryCode: '{subtag}'")
+        supported.append(f"      Locale.fromSubtags({', '.join(fields)}),\n")
+
+    return L10N_HEADER + '\n'.join(members) + L10N_FOOTER_START + ''.join(supported) + L10N_FOOTER_END
+
+def render_messages_all(locales: List[str]) -> str:
+    """``intl/messages_all.dart``: the deferred import and lookup of every locale's messages."""
+    locales = sorted(locales)
+    libraries = {locale: f'messages_{locale.lower()}' for locale in locales}
+    return (MESSAGES_ALL_HEADER
+            + ''.join(f"import 'messages_{locale}.dart' deferred as {libraries[locale]};\n" for locale in locales)
+            + '\ntypedef Future<dynamic> LibraryLoader();\nMap<String, LibraryLoader> _deferredLibraries = {\n'
+            + ''.join(f"  '{locale}': {libraries[locale]}.loadLibrary,\n" for locale in locales)
+            + '};\n\nMessageLookupByLibrary? _findExact(String localeName) {\n  switch (localeName) {\n'
+            + ''.join(f"    case '{locale}':\n      return {libraries[locale]}.messages;\n" for locale in locales)
+            + MESSAGES_ALL_FOOTER)
+
+# The English arguments of every key, set once per worker process
+_base_args: Dict[str, List[str]] = {}
+
+def _init_worker(base_args: Dict[str, List[str]]):
+    _base_args.clear()
+    _base_args.update(base_args)
+
+def _digest(*parts: bytes) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(hashlib.sha256(part).digest())
+    return digest.hexdigest()[:16]
+
+def _read_messages(path: Path) -> Dict[str, str]:
+    return {key: value for key, value in json.loads(path.read_bytes().decode('utf-8')).items()
+            if not key.startswith('@') and isinstance(value, str)}
+
+def generate_locale(arb_path: str, output_path: str) -> str:
+    """Write the message file of one ARB file and return the digest of what was written."""
+    text = render_messages(locale_of(Path(arb_path)), _read_messages(Path(arb_path)), _base_args)
+    data = text.encode('utf-8')
+    atomic_write_text(output_path, text)
+    return _digest(data)
+
+class MessageGenerator:
+    """Regenerate ``messages_<locale>.dart`` only for the ARB files whose content changed.
+
+    Produces the same files as ``flutter pub global run intl_utils:generate``
+    with its dart format pass, byte for byte, for messages with ``{name}``
+    arguments; ICU plural, select and gender messages are left to
+    intl_utils. ``.l10n_state/generate_messages.json`` records a digest of
+    every input (the ARB file, plus the English keys and arguments the
+    generated code depends on) and of every output, so a file is rewritten
+    when its input changed or the file on disk is not the one last
+    generated. ``l10n.dart`` is regenerated when the English file or the
+    set of locales changes, ``messages_all.dart`` when the set of locales
+    changes. Stale locales are rendered in a process pool.
+    """
+
+    def __init__(self, l10n_dir: Optional[str] = None, generated_dir: Optional[str] = None,
+                 state_path: Optional[str] = None, workers: int = 0):
+        self.l10n_dir = Path(l10n_dir) if l10n_dir else DEFAULT_L10N_DIR
+        self.generated_dir = Path(generated_dir) if generated_dir else DEFAULT_GENERATED_DIR
+        self.state_path = Path(state_path) if state_path else DEFAULT_STATE_PATH
+        self.workers = workers or os.cpu_count() or 1
+        self.generated: List[str] = []
+        self.removed: List[str] = []
+        self.seconds = 0.0
+
+    def _read_state(self) -> Dict:
+        if not self.state_path.exists():
+            return {}
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            return state if state.get('version') == GENERATOR_VERSION else {}
+        except (OSError, ValueError, AttributeError) as e:
+            logger.warning(f"Ignoring unreadable generation state {self.state_path}: {str(e)}")
+            return {}
+
+    @staticmethod
+    def _current(path: Path, entry: Optional[Dict[str, str]], input_digest: str) -> bool:
+        """Whether ``path`` is the file generated from ``input_digest`` and was not changed since."""
+        return (entry is not None and entry.get('input') == input_digest and path.exists()
+                and entry.get('output') == _digest(path.read_bytes()))
+
+    def generate(self, full: bool = False) -> List[str]:
+        """Bring the generated files up to date; returns what was written (locales, ``l10n``, ``messages_all``).
+
+        Raises UnsupportedMessage when an English message uses ICU syntax.
+        """
+        start = time.perf_counter()
+        intl_dir = self.generated_dir / 'intl'
+        arb_paths = {locale_of(path): path for path in sorted(self.l10n_dir.glob('intl_*.arb'))}
+        base_raw = arb_paths[BASE_LOCALE].read_bytes()
+        english = _read_messages(arb_paths[BASE_LOCALE])
+        base_args = {key: arguments(message) for key, message in english.items()}
+        base_digest = _digest(str(GENERATOR_VERSION).encode(), json.dumps(base_args, sort_keys=True).encode())
+        locales_digest = _digest(' '.join(sorted(arb_paths)).encode())
+
+        state = {} if full else self._read_state()
+        entries = state.get('locales', {})
+        new_entries = {}
+        stale = []
+        for locale, path in arb_paths.items():
+            input_digest = _digest(base_digest.encode(), path.read_bytes())
+            if self._current(intl_dir / f'messages_{locale}.dart', entries.get(locale), input_digest):
+                new_entries[locale] = entries[locale]
+            else:
+                new_entries[locale] = {'input': input_digest}
+                stale.append(locale)
+
+        intl_dir.mkdir(parents=True, exist_ok=True)
+        jobs = [(str(arb_paths[locale]), str(intl_dir / f'messages_{locale}.dart')) for locale in stale]
+        if self.workers == 1 or len(jobs) < 2:
+            _init_worker(base_args)
+            outputs = [generate_locale(*job) for job in jobs]
+        else:
+            with ProcessPoolExecutor(max_workers=min(self.workers, len(jobs)), initializer=_init_worker,
+                                     initargs=(base_args,)) as pool:
+                outputs = list(pool.map(generate_locale, *zip(*jobs)))
+        for locale, output in zip(stale, outputs):
+            new_entries[locale]['output'] = output
+        self.generated = list(stale)
+
+        # Message files of ARB files that no longer exist
+        for path in intl_dir.glob('messages_*.dart'):
+            locale = path.stem[len('messages_'):]
+            if locale != 'all' and locale not in arb_paths:
+                path.unlink()
+                self.removed.append(locale)
+
+        shared = {}
+        for name, path, input_digest, render in (
+                ('l10n', self.generated_dir / 'l10n.dart', _digest(str(GENERATOR_VERSION).encode(), base_raw,
+                                                                   locales_digest.encode()),
+                 lambda: render_l10n(english, list(arb_paths))),
+                ('messages_all', intl_dir / 'messages_all.dart', _digest(str(GENERATOR_VERSION).encode(),
+                                                                         locales_digest.encode()),
+                 lambda: render_messages_all(list(arb_paths)))):
+            entry = state.get(name)
+            if self._current(path, entry, input_digest):
+                shared[name] = entry
+                continue
+            text = render()
+            atomic_write_text(str(path), text)
+            shared[name] = {'input': input_digest, 'output': _digest(text.encode('utf-8'))}
+            self.generated.append(name)
+
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write_text(str(self.state_path), json.dumps({'version': GENERATOR_VERSION, 'locales': new_entries,
+                                                            **shared}, indent=2, sort_keys=True) + '\n')
+        self.seconds = time.perf_counter() - start
+        return self.generated
+
+    def log_summary(self):
+        logger.info(f"🧬 Message Generation Summary:")
+        locales = [name for name in self.generated if name not in ('l10n', 'messages_all')]
+        logger.info(f"   - Regenerated: {len(locales)} locale files"
+                    f"{' (' + ', '.join(locales) + ')' if locales else ''}"
+                    + ''.join(f", {name}.dart" for name in self.generated if name in ('l10n', 'messages_all')))
+        if self.removed:
+            logger.info(f"   - Removed: {', '.join(f'messages_{locale}.dart' for locale in self.removed)}")
+        logger.info(f"   - Time: {self.seconds * 1000:.0f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description='Regenerate the Dart message files of the ARB files that changed')
+    parser.add_argument('--l10n-dir', default=str(DEFAULT_L10N_DIR), help='Directory containing intl_*.arb files')
+    parser.add_argument('--generated-dir', default=str(DEFAULT_GENERATED_DIR),
+                        help='Output directory of intl_utils (l10n.dart and intl/)')
+    parser.add_argument('--state', default=str(DEFAULT_STATE_PATH),
+                        help='Digests of the last generation (default: .l10n_state/generate_messages.json)')
+    parser.add_argument('--workers', type=int, default=0, help='Worker processes (default: one per CPU; 1 runs in-process)')
+    parser.add_argument('--full', action='store_true', help='Regenerate every file regardless of the recorded digests')
+
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    generator = MessageGenerator(args.l10n_dir, args.generated_dir, args.state, args.workers)
+    try:
+        generator.generate(args.full)
+    except UnsupportedMessage as e:
+        logger.error(f"{str(e)}; run intl_utils:generate instead")
+        sys.exit(2)
+    generator.log_summary()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,480 @@
+#!/usr/bin/env python3
+"""
+Build compact per-locale message bundles from the ARB files and the experimental Dart loader that reads them
+"""
+
+import argparse
+import json
+import logging
+import struct
+import sys
+import time
+import zlib
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+from arb_corpus import DEFAULT_L10N_DIR, locale_of
+from arb_io import atomic_write_text
+from generate_messages import BASE_LOCALE, UnsupportedMessage, _read_messages, arguments, message_segments
+
+logger = logging.getLogger(__name__)
+
+# Git-ignored and excluded from analysis: the loader is not part of the library until it is verified in an app
+DEFAULT_BUNDLE_DIR = Path(__file__).resolve().parent.parent / 'tool' / 'message_bundles'
+# Asset path of the bundle directory as the app sees it (assets of a package are prefixed with its name)
+DEFAULT_ASSET_PREFIX = 'packages/flux_localization/tool/message_bundles'
+
+KEYS_MAGIC = b'FLXK'
+BUNDLE_MAGIC = b'FLXB'
+# Bump whenever the layout changes; the loader rejects other versions
+BUNDLE_VERSION = 2
+
+Segment = Union[str, int]
+
+def _write_varint(out: bytearray, value: int):
+    while value >= 0x80:
+        out.append((value & 0x7f) | 0x80)
+        value >>= 7
+    out.append(value)
+
+def _read_varint(data: bytes, offset: int):
+    value = shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+def _write_string(out: bytearray, text: str):
+    raw = text.encode('utf-8')
+    _write_varint(out, len(raw))
+    out += raw
+
+def encode_keys(keys: List[str]) -> bytes:
+    """``keys.bin``: the message names shared by every bundle, in the order bundles list their messages.
+
+    ``KEYS_MAGIC``, the version byte and the CRC-32 of the rest of the file
+    (4 bytes, little endian) come first. Bundles store the same checksum, so
+    the loader matches them by comparing two stored values.
+    """
+    body = bytearray()
+    _write_varint(body, len(keys))
+    for key in keys:
+        _write_string(body, key)
+    out = bytearray(KEYS_MAGIC)
+    out.append(BUNDLE_VERSION)
+    out += struct.pack('<I', zlib.crc32(body))
+    return bytes(out + body)
+
+def decode_keys(data: bytes) -> List[str]:
+    if data[:4] != KEYS_MAGIC or data[4] != BUNDLE_VERSION:
+        raise ValueError("not a version %d keys file" % BUNDLE_VERSION)
+    if struct.unpack_from('<I', data, 5)[0] != zlib.crc32(data[9:]):
+        raise ValueError("keys file is corrupt")
+    count, offset = _read_varint(data, 9)
+    keys = []
+    for _ in range(count):
+        length, offset = _read_varint(data, offset)
+        keys.append(data[offset:offset + length].decode('utf-8'))
+        offset += length
+    return keys
+
+def encode_bundle(messages: Dict[str, str], keys: List[str], base_args: Dict[str, List[str]],
+                  keys_data: bytes) -> bytes:
+    """The bundle of one locale.
+
+    Layout, all integers unsigned LEB128 varints unless noted:
+
+    - ``FLXB``, the version byte and the checksum stored in ``keys.bin``
+      (4 bytes, little endian), so a bundle is never read against other keys
+    - the key count, then the string count and the interned strings
+      (byte length, UTF-8), most used first so common ones get 1-byte ids
+    - per key, in ``keys.bin`` order: 0 when the locale has no message,
+      else the segment count + 1 and the segments, ``id << 1`` for a
+      string and ``index << 1 | 1`` for an argument, ``index`` being its
+      position in the English message's arguments (the order of the
+      ``S`` method's parameters)
+
+    Placeholders are resolved here, once, the way intl_utils resolves
+    them, so the loader only concatenates.
+    """
+    split = [message_segments(messages[key], base_args[key]) if key in messages else None for key in keys]
+    counts = Counter(segment for segments in split if segments for segment in segments if isinstance(segment, str))
+    strings = [text for text, _ in sorted(counts.items(), key=lambda item: -item[1])]
+    ids = {text: index for index, text in enumerate(strings)}
+
+    out = bytearray(BUNDLE_MAGIC)
+    out.append(BUNDLE_VERSION)
+    out += keys_data[5:9]
+    _write_varint(out, len(keys))
+    _write_varint(out, len(strings))
+    for text in strings:
+        _write_string(out, text)
+    for segments in split:
+        if segments is None:
+            out.append(0)
+            continue
+        _write_varint(out, len(segments) + 1)
+        for segment in segments:
+            _write_varint(out, segment << 1 | 1 if isinstance(segment, int) else ids[segment] << 1)
+    return bytes(out)
+
+class Bundle:
+    """A bundle read the way the Dart loader reads it.
+
+    Opening one only records where each string and message starts;
+    strings are decoded the first time a message using them is formatted.
+    """
+
+    def __init__(self, data: bytes, keys_data: Optional[bytes] = None):
+        if data[:4] != BUNDLE_MAGIC or data[4] != BUNDLE_VERSION:
+            raise ValueError("not a version %d message bundle" % BUNDLE_VERSION)
+        if keys_data is not None and data[5:9] != keys_data[5:9]:
+            raise ValueError("bundle was built against other keys")
+        self.data = data
+        key_count, offset = _read_varint(data, 9)
+        string_count, offset = _read_varint(data, offset)
+        self._string_starts = []
+        for _ in range(string_count):
+            length, start = _read_varint(data, offset)
+            self._string_starts.append((start, length))
+            offset = start + length
+        self._strings: List[Optional[str]] = [None] * string_count
+        self._message_starts = []
+        for _ in range(key_count):
+            self._message_starts.append(offset)
+            count, offset = _read_varint(data, offset)
+            for _ in range(count - 1 if count else 0):
+                while data[offset] >= 0x80:
+                    offset += 1
+                offset += 1
+
+    def _string(self, index: int) -> str:
+        text = self._strings[index]
+        if text is None:
+            start, length = self._string_starts[index]
+            text = self._strings[index] = self.data[start:start + length].decode('utf-8')
+        return text
+
+    def segments(self, key_id: int) -> Optional[List[Segment]]:
+        count, offset = _read_varint(self.data, self._message_starts[key_id])
+        if not count:
+            return None
+        segments: List[Segment] = []
+        for _ in range(count - 1):
+            value, offset = _read_varint(self.data, offset)
+            segments.append(value >> 1 if value & 1 else self._string(value >> 1))
+        return segments
+
+    def message(self, key_id: int, args: List[object]) -> Optional[str]:
+        segments = self.segments(key_id)
+        if segments is None:
+            return None
+        return ''.join(str(args[segment]) if isinstance(segment, int) else segment for segment in segments)
+
+LOADER_TEMPLATE = """\
+// GENERATED CODE - DO NOT MODIFY BY HAND
+// Generated by scripts/message_bundles.py from lib/src/l10n/intl_*.arb.
+// A drop-in replacement of intl/messages_all.dart that reads the messages
+// of the active locale from a bundle asset instead of compiled Dart maps.
+// EXPERIMENTAL: not yet compiled, analyzed or timed in an app.
+
+// initializeInternalMessageLookup and messageLookup are only exported by
+// intl's src/, which the generated intl/messages_all.dart imports as well.
+// ignore_for_file: implementation_imports
+
+import 'dart:convert';
+import 'dart:typed_data';
+
+import 'package:flutter/services.dart' show rootBundle;
+import 'package:intl/intl.dart';
+import 'package:intl/message_lookup_by_library.dart';
+import 'package:intl/src/intl_helpers.dart';
+
+const _assetPrefix = '{asset_prefix}';
+const _version = {version};
+
+const _locales = <String>{{
+{locales}
+}};
+
+int? _keysChecksum;
+Map<String, int>? _keyIds;
+final _bundles = <String, _BundleLookup>{{}};
+
+class _Reader {{
+  _Reader(this.bytes, this.offset);
+
+  final Uint8List bytes;
+  int offset;
+
+  int varint() {{
+    var value = 0;
+    var shift = 0;
+    while (true) {{
+      final byte = bytes[offset++];
+      value |= (byte & 0x7f) << shift;
+      if (byte < 0x80) return value;
+      shift += 7;
+    }}
+  }}
+}}
+
+bool _hasMagic(Uint8List bytes, String magic) =>
+    bytes.length > 9 &&
+    ascii.decode(bytes.sublist(0, 4), allowInvalid: true) == magic &&
+    bytes[4] == _version;
+
+int _checksum(Uint8List bytes) =>
+    ByteData.sublistView(bytes, 5, 9).getUint32(0, Endian.little);
+
+Future<Uint8List> _load(String name) async {{
+  final data = await rootBundle.load('$_assetPrefix/$name');
+  return data.buffer.asUint8List(data.offsetInBytes, data.lengthInBytes);
+}}
+
+Future<void> _loadKeys() async {{
+  if (_keyIds != null) return;
+  final bytes = await _load('keys.bin');
+  if (!_hasMagic(bytes, 'FLXK')) {{
+    throw StateError('keys.bin is not a version $_version keys file');
+  }}
+  final reader = _Reader(bytes, 9);
+  final count = reader.varint();
+  final ids = <String, int>{{}};
+  for (var index = 0; index < count; index++) {{
+    final length = reader.varint();
+    final end = reader.offset + length;
+    ids[utf8.decode(bytes.sublist(reader.offset, end))] = index;
+    reader.offset = end;
+  }}
+  _keysChecksum = _checksum(bytes);
+  _keyIds = ids;
+}}
+
+/// The messages of one locale; strings are decoded the first time a message
+/// using them is looked up.
+class _BundleLookup extends MessageLookupByLibrary {{
+  _BundleLookup(this.localeName, this._bytes) {{
+    if (!_hasMagic(_bytes, 'FLXB')) {{
+      throw StateError('$localeName.bin is not a version $_version bundle');
+    }}
+    if (_checksum(_bytes) != _keysChecksum) {{
+      throw StateError('$localeName.bin was built against other keys');
+    }}
+    final reader = _Reader(_bytes, 9);
+    final keyCount = reader.varint();
+    final stringCount = reader.varint();
+    _stringStarts = Int32List(stringCount);
+    _stringLengths = Int32List(stringCount);
+    _strings = List<String?>.filled(stringCount, null);
+    for (var index = 0; index < stringCount; index++) {{
+      _stringLengths[index] = reader.varint();
+      _stringStarts[index] = reader.offset;
+      reader.offset += _stringLengths[index];
+    }}
+    _messageStarts = Int32List(keyCount);
+    for (var index = 0; index < keyCount; index++) {{
+      _messageStarts[index] = reader.offset;
+      final count = reader.varint();
+      for (var segment = 1; segment < count; segment++) {{
+        reader.varint();
+      }}
+    }}
+  }}
+
+  @override
+  final String localeName;
+
+  final Uint8List _bytes;
+  late final Int32List _stringStarts;
+  late final Int32List _stringLengths;
+  late final List<String?> _strings;
+  late final Int32List _messageStarts;
+
+  @override
+  Map<String, dynamic> get messages => const {{}};
+
+  String _string(int index) => _strings[index] ??= utf8.decode(
+        Uint8List.sublistView(
+          _bytes,
+          _stringStarts[index],
+          _stringStarts[index] + _stringLengths[index],
+        ),
+      );
+
+  String? _format(int keyId, List<Object> args) {{
+    final reader = _Reader(_bytes, _messageStarts[keyId]);
+    final count = reader.varint();
+    if (count == 0) return null;
+    if (count == 2) {{
+      final value = reader.varint();
+      if (value & 1 == 0) return _string(value >> 1);
+      return '${{args[value >> 1]}}';
+    }}
+    final buffer = StringBuffer();
+    for (var segment = 1; segment < count; segment++) {{
+      final value = reader.varint();
+      buffer.write(value & 1 == 0 ? _string(value >> 1) : args[value >> 1]);
+    }}
+    return buffer.toString();
+  }}
+
+  @override
+  String? lookupMessage(
+    String? messageText,
+    String? locale,
+    String? name,
+    List<Object>? args,
+    String? meaning, {{
+    MessageIfAbsent? ifAbsent,
+  }}) {{
+    final keyId = name == null ? null : _keyIds![name];
+    final message = keyId == null ? null : _format(keyId, args ?? const []);
+    if (message != null) return message;
+    return ifAbsent == null ? messageText : ifAbsent(messageText, args);
+  }}
+}}
+
+/// User programs should call this before using [localeName] for messages.
+Future<bool> initializeMessages(String localeName) async {{
+  final availableLocale = Intl.verifiedLocale(
+    localeName,
+    _locales.contains,
+    onFailure: (_) => null,
+  );
+  if (availableLocale == null) return false;
+  if (!_bundles.containsKey(availableLocale)) {{
+    await _loadKeys();
+    _bundles[availableLocale] =
+        _BundleLookup(availableLocale, await _load('$availableLocale.bin'));
+  }}
+  initializeInternalMessageLookup(() => CompositeMessageLookup());
+  messageLookup.addLocale(availableLocale, _findBundleFor);
+  return true;
+}}
+
+MessageLookupByLibrary? _findBundleFor(String locale) {{
+  final actualLocale = Intl.verifiedLocale(
+    locale,
+    _bundles.containsKey,
+    onFailure: (_) => null,
+  );
+  return actualLocale == null ? null : _bundles[actualLocale];
+}}
+"""
+
+def render_loader(locales: List[str], asset_prefix: str = DEFAULT_ASSET_PREFIX) -> str:
+    """The Dart loader of the bundles of ``locales``, formatted as dart format would."""
+    return LOADER_TEMPLATE.format(asset_prefix=asset_prefix, version=BUNDLE_VERSION,
+                                  locales='\n'.join(f"  '{locale}'," for locale in sorted(locales)))
+
+class BundleBuilder:
+    """Write ``keys.bin``, one ``<locale>.bin`` per ARB file and the ``messages_all.dart`` loader.
+
+    A bundle holds the messages of the English keys, like the generated
+    ``messages_<locale>.dart`` files: each distinct literal stored once and
+    every placeholder already resolved to the position of its argument. The
+    loader has the ``initializeMessages`` of ``intl/messages_all.dart`` and
+    reads the bundle of the requested locale only, on first use; nothing of
+    the other locales is compiled into the app. Files whose content did not
+    change are not rewritten.
+    """
+
+    def __init__(self, l10n_dir: Optional[str] = None, output_dir: Optional[str] = None,
+                 asset_prefix: str = DEFAULT_ASSET_PREFIX):
+        self.l10n_dir = Path(l10n_dir) if l10n_dir else DEFAULT_L10N_DIR
+        self.output_dir = Path(output_dir) if output_dir else DEFAULT_BUNDLE_DIR
+        self.asset_prefix = asset_prefix
+        self.sizes: Dict[str, int] = {}
+        self.written: List[str] = []
+        self.removed: List[str] = []
+        self.seconds = 0.0
+
+    def _write(self, name: str, data: bytes):
+        self.sizes[name] = len(data)
+        path = self.output_dir / name
+        if path.exists() and path.read_bytes() == data:
+            return
+        tmp = path.with_name(path.name + '.tmp')
+        tmp.write_bytes(data)
+        tmp.replace(path)
+        self.written.append(name)
+
+    def build(self) -> Dict[str, int]:
+        """Bring the bundles and the loader up to date; returns the size of every bundle file.
+
+        Raises UnsupportedMessage when an English message uses ICU syntax.
+        """
+        start = time.perf_counter()
+        arb_paths = {locale_of(path): path for path in sorted(self.l10n_dir.glob('intl_*.arb'))}
+        english = _read_messages(arb_paths[BASE_LOCALE])
+        base_args = {key: arguments(message) for key, message in english.items()}
+        keys = sorted(english)
+
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        keys_data = encode_keys(keys)
+        self._write('keys.bin', keys_data)
+        for locale, path in arb_paths.items():
+            self._write(f'{locale}.bin', encode_bundle(_read_messages(path), keys, base_args, keys_data))
+
+        loader = render_loader(list(arb_paths), self.asset_prefix)
+        loader_path = self.output_dir / 'messages_all.dart'
+        if not loader_path.exists() or loader_path.read_text(encoding='utf-8') != loader:
+            atomic_write_text(str(loader_path), loader)
+            self.written.append(loader_path.name)
+
+        for path in self.output_dir.glob('*.bin'):
+            if path.name not in self.sizes:
+                path.unlink()
+                self.removed.append(path.name)
+        self.seconds = time.perf_counter() - start
+        return dict(self.sizes)
+
+    def log_summary(self):
+        locales = [name for name in self.sizes if name != 'keys.bin']
+        logger.info(f"📦 Message Bundle Summary:")
+        logger.info(f"   - Bundles: {len(locales)} locales, {sum(self.sizes.values()) / 1024:.0f} KB "
+                    f"(largest {max(self.sizes[name] for name in locales) / 1024:.0f} KB, "
+                    f"keys.bin {self.sizes['keys.bin'] / 1024:.1f} KB)")
+        logger.info(f"   - Written: {len(self.written)} files" + (f", removed {', '.join(self.removed)}" if self.removed else ''))
+        logger.info(f"   - Time: {self.seconds * 1000:.0f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description='Build compact per-locale message bundles and their Dart loader')
+    parser.add_argument('--l10n-dir', default=str(DEFAULT_L10N_DIR), help='Directory containing intl_*.arb files')
+    parser.add_argument('--output-dir', default=str(DEFAULT_BUNDLE_DIR),
+                        help='Directory of the bundles and the loader (default: tool/message_bundles)')
+    parser.add_argument('--asset-prefix', default=DEFAULT_ASSET_PREFIX,
+                        help=f'Asset path the loader reads the bundles from (default: {DEFAULT_ASSET_PREFIX})')
+    parser.add_argument('--dump', metavar='LOCALE', help='Print the messages of one built bundle as JSON and exit')
+
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    if args.dump:
+        output_dir = Path(args.output_dir)
+        keys_data = (output_dir / 'keys.bin').read_bytes()
+        bundle = Bundle((output_dir / f'{args.dump}.bin').read_bytes(), keys_data)
+        messages = {}
+        for key_id, key in enumerate(decode_keys(keys_data)):
+            segments = bundle.segments(key_id)
+            if segments is not None:
+                messages[key] = ''.join('{%d}' % segment if isinstance(segment, int) else segment
+                                        for segment in segments)
+        print(json.dumps(messages, ensure_ascii=False, indent=2))
+        return
+
+    builder = BundleBuilder(args.l10n_dir, args.output_dir, args.asset_prefix)
+    try:
+        builder.build()
+    except UnsupportedMessage as e:
+        logger.error(f"{str(e)}; bundles support {{name}} arguments only")
+        sys.exit(2)
+    builder.log_summary()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Per-call instrumentation of chat completion requests with JSONL traces, per-locale
+summaries and Prometheus textfile export
+"""
+
+import json
+import logging
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+from arb_io import atomic_write_text
+
+logger = logging.getLogger(__name__)
+
+# What a call was for: a regular batch, a bisection resend, a single-key
+# fallback or a batch for several languages at once
+CALL_KINDS = ('batch', 'recovery', 'single', 'multi')
+
+class CallTrace:
+    """One logical chat completion call, filled in by the caller, the rate limiter and the parser.
+
+    Used as a context manager around the call: the record is written when
+    the block exits, with ``status`` set to ``error`` if it raised.
+    """
+
+    def __init__(self, metrics: 'CallMetrics', locale: str, kind: str, attempt: int, keys: int):
+        self.metrics = metrics
+        self.locale = locale
+        self.kind = kind
+        self.attempt = attempt
+        self.keys = keys
+
+        self.http_attempts = 0
+        self.throttled = 0
+        self.pacing = 0.0
+        self.latency = 0.0
+        self.wall = 0.0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.finish_reason: Optional[str] = None
+        self.first_result: Optional[float] = None
+        self.parse: Optional[str] = None
+        self.status = 'ok'
+        self.error: Optional[str] = None
+        self.started = 0.0
+
+    def observe(self, response):
+        """Take token usage and finish reason from a parsed completion."""
+        usage = getattr(response, 'usage', None)
+        if usage:
+            self.prompt_tokens = usage.prompt_tokens or 0
+            self.completion_tokens = usage.completion_tokens or 0
+        if response.choices:
+            self.finish_reason = response.choices[0].finish_reason
+
+    def __enter__(self) -> 'CallTrace':
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.wall = time.perf_counter() - self.started
+        if exc_type is not None:
+            self.status = 'error'
+            self.error = exc_type.__name__
+        self.metrics.record(self)
+        return False
+
+    def as_dict(self) -> Dict:
+        return {
+            'ts': round(time.time(), 3),
+            'locale': self.locale,
+            'kind': self.kind,
+            'attempt': self.attempt,
+            'keys': self.keys,
+            'http_attempts': self.http_attempts,
+            'throttled': self.throttled,
+            'pacing_s': round(self.pacing, 4),
+            'latency_s': round(self.latency, 4),
+            'wall_s': round(self.wall, 4),
+            'prompt_tokens': self.prompt_tokens,
+            'completion_tokens': self.completion_tokens,
+            'finish_reason': self.finish_reason,
+            'first_result_s': None if self.first_result is None else round(self.first_result, 4),
+            'parse': self.parse,
+            'status': self.status,
+            'error': self.error,
+        }
+
+class CallMetrics:
+    """Aggregate call traces per locale and optionally stream them to a JSONL file.
+
+    Costs are computed from per-1K-token prices when given; with the default
+    price of 0 only token counts are reported.
+    """
+
+    def __init__(self, trace_path: Optional[str] = None, input_cost_per_1k: float = 0.0,
+                 output_cost_per_1k: float = 0.0):
+        self.trace_path = trace_path
+        self.input_cost_per_1k = input_cost_per_1k
+        self.output_cost_per_1k = output_cost_per_1k
+
+        self._lock = threading.Lock()
+        self._trace_file = None
+        self._locales: Dict[str, Dict] = {}
+
+    def call(self, locale: str, kind: str, attempt: int = 1, keys: int = 1) -> CallTrace:
+        return CallTrace(self, locale, kind, attempt, keys)
+
+    def _totals(self, locale: str) -> Dict:
+        totals = self._locales.get(locale)
+        if totals is None:
+            totals = {'calls': 0, 'kinds': Counter(), 'retries': 0, 'throttled': 0, 'errors': 0,
+                      'truncated': 0, 'keys': 0, 'prompt_tokens': 0, 'completion_tokens': 0,
+                      'latency': 0.0, 'wall': 0.0, 'parse': Counter()}
+            self._locales[locale] = totals
+        return totals
+
+    def record(self, trace: CallTrace):
+        line = json.dumps(trace.as_dict(), ensure_ascii=False)
+        with self._lock:
+            totals = self._totals(trace.locale)
+            totals['calls'] += 1
+            totals['kinds'][trace.kind] += 1
+            # Retries of the caller's loop plus the limiter's own retries of the same request
+            totals['retries'] += (trace.attempt > 1) + max(0, trace.http_attempts - 1)
+            totals['throttled'] += trace.throttled
+            totals['errors'] += trace.status == 'error'
+            totals['truncated'] += trace.finish_reason == 'length'
+            totals['keys'] += trace.keys
+            totals['prompt_tokens'] += trace.prompt_tokens
+            totals['completion_tokens'] += trace.completion_tokens
+            totals['latency'] += trace.latency
+            totals['wall'] += trace.wall
+            if trace.parse:
+                totals['parse'][trace.parse] += 1
+
+            if self.trace_path:
+                if self._trace_file is None:
+                    self._trace_file = open(self.trace_path, 'a', encoding='utf-8')
+                self._trace_file.write(line + '\n')
+                self._trace_file.flush()
+
+    def cost(self, prompt_tokens: int, completion_tokens: int) -> float:
+        return prompt_tokens / 1000 * self.input_cost_per_1k + completion_tokens / 1000 * self.output_cost_per_1k
+
+    def rows(self) -> List[Dict]:
+        """Per-locale totals, sorted by tokens spent."""
+        with self._lock:
+            rows = [{'locale': locale, **totals, 'kinds': dict(totals['kinds']), 'parse': dict(totals['parse']),
+                     'cost': self.cost(totals['prompt_tokens'], totals['completion_tokens'])}
+                    for locale, totals in self._locales.items()]
+        return sorted(rows, key=lambda row: row['prompt_tokens'] + row['completion_tokens'], reverse=True)
+
+    def log_summary(self):
+        rows = self.rows()
+        if not rows:
+            return
+
+        show_cost = bool(self.input_cost_per_1k or self.output_cost_per_1k)
+        logger.info(f"📈 Call Metrics by Locale:")
+        logger.info(f"   {'locale':<10} {'calls':>6} {'fallback':>8} {'retries':>7} {'errors':>6} "
+                    f"{'prompt tok':>10} {'compl tok':>9} {'api s':>7}" + (f" {'cost':>8}" if show_cost else ''))
+        for row in rows:
+            fallback = row['kinds'].get('recovery', 0) + row['kinds'].get('single', 0)
+            logger.info(f"   {row['locale']:<10} {row['calls']:>6} {fallback:>8} {row['retries']:>7} {row['errors']:>6} "
+                        f"{row['prompt_tokens']:>10} {row['completion_tokens']:>9} {row['latency']:>7.1f}"
+                        + (f" {row['cost']:>8.4f}" if show_cost else ''))
+
+        parse = Counter()
+        for row in rows:
+            parse.update(row['parse'])
+        logger.info(f"   - Parse strategies: {', '.join(f'{name} {count}' for name, count in parse.most_common()) or 'none'}")
+        if self.trace_path:
+            logger.info(f"   - Trace: {self.trace_path}")
+
+    def write_prometheus(self, path: str):
+        """Write the totals in the Prometheus text exposition format (for node_exporter's textfile collector)."""
+        lines = []
+
+        def metric(name: str, kind: str, help_text: str, samples: List):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                label_text = ','.join(f'{key}="{val}"' for key, val in labels.items())
+                lines.append(f"{name}{{{label_text}}} {value}")
+
+        rows = self.rows()
+        metric('l10n_api_calls_total', 'counter', 'Chat completion calls by locale and purpose.',
+               [({'locale': row['locale'], 'kind': kind}, count) for row in rows for kind, count in sorted(row['kinds'].items())])
+        metric('l10n_api_retries_total', 'counter', 'Retried chat completion calls.',
+               [({'locale': row['locale']}, row['retries']) for row in rows])
+        metric('l10n_api_errors_total', 'counter', 'Chat completion calls that failed.',
+               [({'locale': row['locale']}, row['errors']) for row in rows])
+        metric('l10n_api_tokens_total', 'counter', 'Tokens reported by the API.',
+               [({'locale': row['locale'], 'type': token_type}, row[f'{token_type}_tokens'])
+                for row in rows for token_type in ('prompt', 'completion')])
+        metric('l10n_api_seconds_total', 'counter', 'Seconds spent waiting for API responses.',
+               [({'locale': row['locale']}, round(row['latency'], 3)) for row in rows])
+        if self.input_cost_per_1k or self.output_cost_per_1k:
+            metric('l10n_api_cost_total', 'counter', 'Estimated cost from the configured token prices.',
+                   [({'locale': row['locale']}, round(row['cost'], 6)) for row in rows])
+
+        atomic_write_text(path, '\n'.join(lines) + '\n')
+        logger.info(f"Wrote Prometheus metrics to {path}")
+
+    def close(self):
+        with self._lock:
+            if self._trace_file is not None:
+                self._trace_file.close()
+                self._trace_file = None
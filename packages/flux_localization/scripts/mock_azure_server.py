@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Azure OpenAI chat completions endpoint, used for benchmarks
+"""
+
+import argparse
+import json
+import logging
+import math
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+LANGUAGE_PATTERN = re.compile(r'\bto ([A-Z][\w ()]*?)(?:[.:]|$)', re.MULTILINE)
+TARGET_LIST_PATTERN = re.compile(r'^- (\w+): (.+)$', re.MULTILINE)
+# A masked placeholder tag or a raw {placeholder}, for the dropped-placeholder fault
+PLACEHOLDER_PATTERN = re.compile(r'<x\d+/>|\{\w+\}')
+
+def extract_payload(prompt: str) -> Optional[Dict[str, str]]:
+    """Return the first JSON object embedded in a prompt, if any."""
+    decoder = json.JSONDecoder()
+    marker = prompt.find('Input texts:')
+    idx = prompt.find('{', marker if marker != -1 else 0)
+    while idx != -1:
+        try:
+            payload, _ = decoder.raw_decode(prompt, idx)
+            if isinstance(payload, dict):
+                return payload
+        except json.JSONDecodeError:
+            pass
+        idx = prompt.find('{', idx + 1)
+    return None
+
+def fake_translate(prompt: str) -> str:
+    """Produce a deterministic "translation" for a batch, multi-target or single-text prompt."""
+    match = LANGUAGE_PATTERN.search(prompt)
+    language = match.group(1).strip() if match else "Unknown"
+
+    payload = extract_payload(prompt)
+    targets = TARGET_LIST_PATTERN.findall(prompt)
+    if payload is not None and targets:
+        return json.dumps({
+            key: {code: f"[{name.strip()}] {value}" for code, name in targets}
+            for key, value in payload.items()
+        }, ensure_ascii=False, separators=(',', ':'))
+    if payload is not None:
+        return json.dumps({key: f"[{language}] {value}" for key, value in payload.items()}, ensure_ascii=False,
+                          separators=(',', ':'))
+
+    start, end = prompt.find('"'), prompt.rfind('"')
+    text = prompt[start + 1:end] if end > start else prompt
+    return f"[{language}] {text}"
+
+class LatencyModel:
+    """Per-request latency: ``fixed``, ``uniform`` (mean ± spread), ``lognormal`` or ``exponential``."""
+
+    KINDS = ('fixed', 'uniform', 'lognormal', 'exponential')
+
+    def __init__(self, mean: float = 0.0, kind: str = 'fixed', spread: float = 0.5, seed: Optional[int] = None):
+        if kind not in self.KINDS:
+            raise ValueError(f"Unknown latency distribution: {kind}")
+        self.mean = mean
+        self.kind = kind
+        self.spread = spread
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sample(self) -> float:
+        if self.mean <= 0:
+            return 0.0
+        with self._lock:
+            if self.kind == 'uniform':
+                return self._random.uniform(self.mean * (1 - self.spread), self.mean * (1 + self.spread))
+            if self.kind == 'lognormal':
+                # spread is sigma; mu chosen so the distribution keeps the requested mean
+                mu = math.log(self.mean) - self.spread ** 2 / 2
+                return self._random.lognormvariate(mu, self.spread)
+            if self.kind == 'exponential':
+                return self._random.expovariate(1 / self.mean)
+        return self.mean
+
+class FaultConfig:
+    """Probabilities of the misbehaviours the mock can inject into responses."""
+
+    def __init__(self, rate_limit: float = 0.0, truncated: float = 0.0, malformed: float = 0.0,
+                 fenced: float = 0.0, retry_after_ms: int = 200, seed: Optional[int] = None,
+                 dropped_placeholder: float = 0.0):
+        self.rate_limit = rate_limit
+        self.truncated = truncated
+        self.malformed = malformed
+        self.fenced = fenced
+        self.dropped_placeholder = dropped_placeholder
+        self.retry_after_ms = retry_after_ms
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def roll(self, probability: float) -> bool:
+        if probability <= 0:
+            return False
+        with self._lock:
+            return self._random.random() < probability
+
+class MockAzureOpenAIServer:
+    """Threaded HTTP server speaking the subset of the chat completions API the scripts use.
+
+    Besides plain successes it can inject 429s (with ``retry-after-ms``),
+    responses truncated at ``max_tokens``, malformed JSON, markdown-fenced
+    JSON and values missing a placeholder, and enforce a requests-per-minute quota the way Azure does (per
+    ten-second window), so the scripts' recovery paths can be exercised
+    and benchmarked without a deployment. ``stream: true`` requests get
+    server-sent events. Latency is the time to the first token; with
+    ``tokens_per_second`` the output then takes time to generate as well.
+    ``handshake_latency`` delays the first request of every new connection,
+    standing in for the TCP and TLS setup of a real endpoint.
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, latency: float = 0.0,
+                 latency_model: Optional[LatencyModel] = None, faults: Optional[FaultConfig] = None,
+                 requests_per_minute: int = 0, tokens_per_second: float = 0.0, handshake_latency: float = 0.0):
+        self.latency_model = latency_model or LatencyModel(latency)
+        self.faults = faults or FaultConfig()
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_second = tokens_per_second
+        self.handshake_latency = handshake_latency
+        self.connection_count = 0
+        self.request_count = 0
+        self.prompt_tokens = 0
+        self.counters = {'rate_limited': 0, 'truncated': 0, 'malformed': 0, 'fenced': 0, 'dropped_placeholder': 0}
+        self._window: List[float] = []
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # Headers and body are written separately; without this the body waits on a delayed ACK
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                logger.debug(format % args)
+
+            def setup(self):
+                super().setup()
+                with server._lock:
+                    server.connection_count += 1
+                if server.handshake_latency:
+                    time.sleep(server.handshake_latency)
+
+            def handle(self):
+                try:
+                    super().handle()
+                except (BrokenPipeError, ConnectionResetError):
+                    # A client closing a stream early may reset the connection
+                    pass
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                request = json.loads(self.rfile.read(length) or b'{}')
+                status, headers, body = server.handle_request(request)
+                if status == 200 and request.get('stream'):
+                    self.send_stream(headers, body)
+                    return
+                data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def send_stream(self, headers: Dict[str, str], body: Dict):
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream')
+                self.send_header('Transfer-Encoding', 'chunked')
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                try:
+                    for event in server.stream_events(body):
+                        data = f"data: {event}\n\n".encode('utf-8')
+                        self.wfile.write(f"{len(data):x}\r\n".encode('ascii') + data + b"\r\n")
+                        self.wfile.flush()
+                    self.wfile.write(b"0\r\n\r\n")
+                except (BrokenPipeError, ConnectionResetError):
+                    # The client stopped reading once it had every key
+                    self.close_connection = True
+
+        class Server(ThreadingHTTPServer):
+            # The default backlog of 5 drops connections when many clients open them at once
+            request_queue_size = 256
+            daemon_threads = True
+
+        self.httpd = Server((host, port), Handler)
+
+    @property
+    def endpoint(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _count(self, counter: str):
+        with self._lock:
+            self.counters[counter] += 1
+
+    def _over_quota(self) -> Tuple[bool, int]:
+        """Sliding ten-second window holding a sixth of the per-minute quota; returns (over, remaining)."""
+        if self.requests_per_minute <= 0:
+            return False, -1
+        limit = max(1, self.requests_per_minute // 6)
+        with self._lock:
+            now = time.monotonic()
+            self._window = [stamp for stamp in self._window if now - stamp < 10]
+            if len(self._window) >= limit:
+                return True, 0
+            self._window.append(now)
+            return False, limit - len(self._window)
+
+    def handle_request(self, request: Dict) -> Tuple[int, Dict[str, str], Dict]:
+        """Return ``(status, headers, body)`` for one chat completion request."""
+        with self._lock:
+            self.request_count += 1
+
+        over_quota, remaining = self._over_quota()
+        if over_quota or self.faults.roll(self.faults.rate_limit):
+            self._count('rate_limited')
+            return 429, {'retry-after-ms': str(self.faults.retry_after_ms)}, {
+                "error": {"code": "429", "message": "Requests to the ChatCompletions operation have exceeded the rate limit."}
+            }
+
+        headers = {'x-ratelimit-remaining-requests': str(remaining)} if remaining >= 0 else {}
+        return 200, headers, self.handle_completion(request)
+
+    def _mangle(self, content: str) -> Tuple[str, str]:
+        """Apply the configured content faults to a JSON batch response."""
+        if self.faults.roll(self.faults.dropped_placeholder):
+            match = PLACEHOLDER_PATTERN.search(content)
+            if match:
+                # Lose one placeholder in an otherwise valid response
+                self._count('dropped_placeholder')
+                content = content[:match.start()] + content[match.end():]
+        if self.faults.roll(self.faults.truncated):
+            self._count('truncated')
+            return content[:max(1, int(len(content) * 0.6))], 'length'
+        if self.faults.roll(self.faults.malformed):
+            self._count('malformed')
+            # Drop the quote after the first value, a common way model JSON breaks
+            cut = content.find('",')
+            return (content[:cut] + content[cut + 1:] if cut != -1 else content[:-1]), 'stop'
+        if self.faults.roll(self.faults.fenced):
+            self._count('fenced')
+            return f"```json\n{content}\n```", 'stop'
+        return content, 'stop'
+
+    def stream_events(self, body: Dict, piece_size: int = 16):
+        """Yield the server-sent event payloads of a completion, pacing them at ``tokens_per_second``."""
+        choice = body['choices'][0]
+        content = choice['message']['content']
+        chunk = {key: body[key] for key in ('id', 'created', 'model')}
+        chunk['object'] = 'chat.completion.chunk'
+
+        # Azure opens with a chunk that has no choices (prompt filter results)
+        yield json.dumps({**chunk, 'choices': []})
+        for start in range(0, len(content), piece_size):
+            piece = content[start:start + piece_size]
+            if self.tokens_per_second:
+                time.sleep(len(piece) / 4 / self.tokens_per_second)
+            yield json.dumps({**chunk, 'choices': [{'index': 0, 'delta': {'content': piece}, 'finish_reason': None}]},
+                             ensure_ascii=False)
+        yield json.dumps({**chunk, 'choices': [{'index': 0, 'delta': {}, 'finish_reason': choice['finish_reason']}]})
+        yield '[DONE]'
+
+    def handle_completion(self, request: Dict) -> Dict:
+        """Build a chat completion response for one request."""
+        latency = self.latency_model.sample()
+        if latency:
+            time.sleep(latency)
+
+        messages = request.get('messages', [])
+        prompt = messages[-1]['content'] if messages else ''
+        content = fake_translate(prompt)
+        finish_reason = 'stop'
+        if content.startswith('{'):
+            content, finish_reason = self._mangle(content)
+
+        prompt_tokens = sum(len(m.get('content', '')) for m in messages) // 4
+        completion_tokens = len(content) // 4
+        if self.tokens_per_second and not request.get('stream'):
+            # Streamed responses are paced while they are sent
+            time.sleep(completion_tokens / self.tokens_per_second)
+        with self._lock:
+            self.prompt_tokens += prompt_tokens
+        return {
+            "id": f"chatcmpl-mock-{self.request_count}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get('model', 'mock'),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": finish_reason
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens
+            }
+        }
+
+    def start(self) -> 'MockAzureOpenAIServer':
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self) -> 'MockAzureOpenAIServer':
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+def main():
+    parser = argparse.ArgumentParser(description='Run a local mock Azure OpenAI endpoint')
+    parser.add_argument('--host', default='127.0.0.1', help='Host to bind (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8765, help='Port to bind (default: 8765)')
+    parser.add_argument('--latency', type=float, default=0.2, help='Mean seconds to wait per request (default: 0.2)')
+    parser.add_argument('--latency-dist', choices=LatencyModel.KINDS, default='fixed',
+                        help='Latency distribution (default: fixed)')
+    parser.add_argument('--latency-spread', type=float, default=0.5,
+                        help='Relative spread for uniform, sigma for lognormal (default: 0.5)')
+    parser.add_argument('--rate-429', type=float, default=0.0, help='Probability of a 429 response (default: 0)')
+    parser.add_argument('--retry-after-ms', type=int, default=200, help='retry-after-ms sent with 429s (default: 200)')
+    parser.add_argument('--truncated', type=float, default=0.0,
+                        help='Probability of a batch response cut off at max_tokens (default: 0)')
+    parser.add_argument('--malformed', type=float, default=0.0, help='Probability of malformed batch JSON (default: 0)')
+    parser.add_argument('--fenced', type=float, default=0.0,
+                        help='Probability of batch JSON wrapped in a markdown fence (default: 0)')
+    parser.add_argument('--drop-placeholder', type=float, default=0.0,
+                        help='Probability of a batch response losing one placeholder (default: 0)')
+    parser.add_argument('--rpm', type=int, default=0, help='Requests-per-minute quota to enforce (default: none)')
+    parser.add_argument('--tokens-per-second', type=float, default=0.0,
+                        help='Output generation speed after the first token (default: instant)')
+    parser.add_argument('--handshake-latency', type=float, default=0.0,
+                        help='Seconds added to the first request of each new connection (default: 0)')
+    parser.add_argument('--seed', type=int, help='Random seed for latencies and faults')
+
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    server = MockAzureOpenAIServer(
+        args.host, args.port,
+        latency_model=LatencyModel(args.latency, args.latency_dist, args.latency_spread, args.seed),
+        faults=FaultConfig(args.rate_429, args.truncated, args.malformed, args.fenced, args.retry_after_ms, args.seed,
+                           args.drop_placeholder),
+        requests_per_minute=args.rpm,
+        tokens_per_second=args.tokens_per_second,
+        handshake_latency=args.handshake_latency
+    )
+    logger.info(f"Mock Azure OpenAI endpoint listening on {server.endpoint}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,391 @@
+#!/usr/bin/env python3
+"""
+Mask placeholders and ICU plural/select syntax before translation and check they survived
+"""
+
+import argparse
+import json
+import logging
+import re
+import sys
+import time
+from collections import Counter
+from typing import Dict, FrozenSet, List, Optional, Tuple, Union
+
+from arb_corpus import DEFAULT_L10N_DIR, ArbCorpus
+
+logger = logging.getLogger(__name__)
+
+# Opaque tokens the model sees instead of placeholders: <x0/> for a value,
+# <x1>...</x1> around ICU syntax whose inner text is still translated
+TAG_PATTERN = re.compile(r'<(/?)x(\d+)(/?)>')
+
+CHOICE_TYPES = ('plural', 'select', 'selectordinal')
+
+class PlaceholderError(ValueError):
+    """A message whose braces do not form valid ICU syntax."""
+
+class Choice:
+    """An ICU ``{name, plural|select|selectordinal, selector{message} ...}`` argument."""
+
+    def __init__(self, name: str, kind: str, prefix: str, branches: List[Tuple[str, list]]):
+        self.name = name
+        self.kind = kind
+        # Everything between the opening brace and the first selector, e.g. "count, plural, offset:1 "
+        self.prefix = prefix
+        self.branches = branches
+
+# A parsed message is a list of literal strings, ('arg', text) tuples for
+# simple arguments like {name} or {date, date, short}, '#' markers and Choices
+Part = Union[str, Tuple[str, str], Choice]
+
+def _parse(text: str, pos: int, depth: int, in_plural: bool) -> Tuple[List[Part], int]:
+    parts: List[Part] = []
+    literal = []
+    length = len(text)
+
+    def flush():
+        if literal:
+            parts.append(''.join(literal))
+            literal.clear()
+
+    while pos < length:
+        ch = text[pos]
+        # Apostrophes are plain text here: the intl_utils generator does not
+        # use ICU quoting, so "'{keyword}'" is a placeholder in quotes
+        if ch == '{':
+            flush()
+            part, pos = _parse_argument(text, pos + 1, depth)
+            parts.append(part)
+        elif ch == '}':
+            if depth == 0:
+                raise PlaceholderError(f"Unmatched '}}' at {pos}")
+            flush()
+            return parts, pos
+        elif ch == '#' and in_plural:
+            flush()
+            parts.append('#')
+            pos += 1
+        else:
+            literal.append(ch)
+            pos += 1
+
+    if depth > 0:
+        raise PlaceholderError("Unclosed '{'")
+    flush()
+    return parts, pos
+
+def _parse_argument(text: str, pos: int, depth: int) -> Tuple[Part, int]:
+    """Parse after an opening brace up to and including its closing brace."""
+    close = text.find('}', pos)
+    comma = text.find(',', pos)
+    if close == -1:
+        raise PlaceholderError("Unclosed '{'")
+    if comma == -1 or comma > close:
+        return ('arg', text[pos - 1:close + 1]), close + 1
+
+    name = text[pos:comma].strip()
+    type_end = text.find(',', comma + 1)
+    kind = text[comma + 1:(type_end if type_end != -1 else close)].strip()
+    if kind not in CHOICE_TYPES or type_end == -1:
+        # {date, date, short} and the like are plain values
+        return ('arg', text[pos - 1:close + 1]), close + 1
+    if not name:
+        raise PlaceholderError("Argument without a name")
+
+    cursor = type_end + 1
+    branches = []
+    prefix_end = None
+    while True:
+        while cursor < len(text) and text[cursor].isspace():
+            cursor += 1
+        if cursor >= len(text):
+            raise PlaceholderError(f"Unclosed {kind} argument '{name}'")
+        if text[cursor] == '}':
+            break
+        if text.startswith('offset:', cursor):
+            cursor += len('offset:')
+            while cursor < len(text) and (text[cursor].isdigit() or text[cursor].isspace()):
+                cursor += 1
+            continue
+
+        selector_start = cursor
+        while cursor < len(text) and not text[cursor].isspace() and text[cursor] != '{':
+            cursor += 1
+        selector = text[selector_start:cursor]
+        while cursor < len(text) and text[cursor].isspace():
+            cursor += 1
+        if not selector or cursor >= len(text) or text[cursor] != '{':
+            raise PlaceholderError(f"Malformed selector in {kind} argument '{name}'")
+        if prefix_end is None:
+            prefix_end = selector_start
+
+        message, cursor = _parse(text, cursor + 1, depth + 1, kind != 'select')
+        branches.append((selector, message))
+        cursor += 1
+
+    if not branches:
+        raise PlaceholderError(f"{kind} argument '{name}' has no branches")
+    return Choice(name, kind, text[pos:prefix_end], branches), cursor + 1
+
+def parse(text: str) -> List[Part]:
+    """Parse an ARB message into literals, arguments and ICU choices."""
+    return _parse(text, 0, 0, False)[0]
+
+Signature = Tuple[FrozenSet[str], FrozenSet[Tuple[str, str, FrozenSet[str]]]]
+EMPTY_SIGNATURE: Signature = (frozenset(), frozenset())
+
+def _argument_name(arg_text: str) -> str:
+    return arg_text[1:-1].split(',')[0].strip()
+
+def signature(text: str) -> Signature:
+    """The placeholders a translation must keep: argument names, and ICU choices with their selectors.
+
+    Plural selectors legitimately differ between languages (Russian adds
+    ``few``/``many``), so plurals only record ``other``, which every language
+    needs. Raises ``PlaceholderError`` for unbalanced braces.
+    """
+    if '{' not in text and '}' not in text:
+        return EMPTY_SIGNATURE
+
+    args = set()
+    choices = set()
+
+    def walk(parts: List[Part]):
+        for part in parts:
+            if isinstance(part, tuple):
+                args.add(_argument_name(part[1]))
+            elif isinstance(part, Choice):
+                selectors = {selector for selector, _ in part.branches}
+                if part.kind != 'select':
+                    selectors = selectors & {'other'}
+                choices.add((part.name, part.kind, frozenset(selectors)))
+                for _, message in part.branches:
+                    walk(message)
+
+    walk(parse(text))
+    return frozenset(args), frozenset(choices)
+
+def check(source: str, translation: str, source_signature: Optional[Signature] = None) -> Optional[str]:
+    """Why ``translation`` breaks the placeholders of ``source``, or None if it keeps them."""
+    if source_signature is None:
+        source_signature = signature(source)
+    if source_signature is EMPTY_SIGNATURE and '{' not in translation and '}' not in translation:
+        return None
+
+    try:
+        translated = signature(translation)
+    except PlaceholderError as e:
+        return f"invalid ICU syntax: {e}"
+    if translated[0] != source_signature[0]:
+        missing = sorted(source_signature[0] - translated[0])
+        extra = sorted(translated[0] - source_signature[0])
+        return f"placeholders differ (missing {missing}, unexpected {extra})"
+    if translated[1] != source_signature[1]:
+        return "plural/select structure differs"
+    return None
+
+def mask(text: str) -> Tuple[str, List[Union[str, Tuple[str, str]]]]:
+    """Replace placeholders with numbered tags; return the masked text and the tag table.
+
+    Table entry ``i`` is the literal a self-closing ``<xi/>`` stands for, or
+    the ``(opening, closing)`` literals around ``<xi>...</xi>``.
+    """
+    if '{' not in text:
+        return text, []
+
+    table: List[Union[str, Tuple[str, str]]] = []
+
+    def render(parts: List[Part]) -> str:
+        out = []
+        for part in parts:
+            if isinstance(part, str) and part != '#':
+                out.append(part)
+            elif isinstance(part, Choice):
+                tag = len(table)
+                table.append(('{' + part.prefix, '}'))
+                branches = []
+                for index, (selector, message) in enumerate(part.branches):
+                    branch_tag = len(table)
+                    table.append((('' if index == 0 else ' ') + selector + '{', '}'))
+                    branches.append(f'<x{branch_tag}>{render(message)}</x{branch_tag}>')
+                out.append(f'<x{tag}>{"".join(branches)}</x{tag}>')
+            else:
+                table.append('#' if part == '#' else part[1])
+                out.append(f'<x{len(table) - 1}/>')
+        return ''.join(out)
+
+    return render(parse(text)), table
+
+def unmask(masked: str, table: List[Union[str, Tuple[str, str]]]) -> str:
+    """Put the literals of ``table`` back in place of the tags; raises ``PlaceholderError`` for unknown tags."""
+    if not table:
+        return masked
+
+    def replace(match: re.Match) -> str:
+        closing, index, self_closing = match.group(1), int(match.group(2)), match.group(3)
+        if index >= len(table):
+            raise PlaceholderError(f"Unknown tag <x{index}>")
+        entry = table[index]
+        if isinstance(entry, str):
+            if closing or not self_closing:
+                raise PlaceholderError(f"<x{index}/> used as an open/close tag")
+            return entry
+        if self_closing:
+            raise PlaceholderError(f"<x{index}> used as a self-closing tag")
+        return entry[1] if closing else entry[0]
+
+    return TAG_PATTERN.sub(replace, masked)
+
+def mask_example(source: str, translation: str) -> Optional[Tuple[str, str]]:
+    """Mask an existing (English, translation) pair with the tags of the English, or None if that is not possible.
+
+    Only simple placeholders are carried over; pairs with ICU choices, whose
+    selectors differ between languages, or whose translation uses a
+    placeholder the English does not have are left out.
+    """
+    masked_source, table = mask(source)
+    if not table:
+        return (source, translation) if '{' not in translation else None
+    if any(isinstance(entry, tuple) for entry in table):
+        return None
+
+    tags: Dict[str, str] = {}
+    for index, literal in enumerate(table):
+        tags.setdefault(literal, f'<x{index}/>')
+    masked = []
+    for part in parse(translation):
+        if isinstance(part, str):
+            masked.append(part)
+        elif isinstance(part, tuple) and part[1] in tags:
+            masked.append(tags[part[1]])
+        else:
+            return None
+    return masked_source, ''.join(masked)
+
+def tags_match(source: str, translation: str) -> bool:
+    """Whether a translation of masked text has the same tags as its source (order may differ)."""
+    if '<x' not in source:
+        return '<x' not in translation or not TAG_PATTERN.search(translation)
+    return Counter(TAG_PATTERN.findall(source)) == Counter(TAG_PATTERN.findall(translation))
+
+class PlaceholderMasker:
+    """Mask the texts of translation jobs and restore and check the translations.
+
+    Keys whose translation still breaks its placeholders after unmasking are
+    dropped rather than written, so they stay missing and are requested
+    again on the next run.
+    """
+
+    def __init__(self):
+        self._tables: Dict[Tuple[str, str], List] = {}
+        self.masked_keys = 0
+        self.rejected: List[Tuple[str, str, str]] = []
+
+    def mask_texts(self, texts: Dict[str, str], target_language: str) -> Dict[str, str]:
+        masked = {}
+        for key, text in texts.items():
+            try:
+                masked_text, table = mask(text)
+            except PlaceholderError as e:
+                logger.warning(f"⚠️ {key}: English text is not valid ICU ({e}); sending it unmasked")
+                masked_text, table = text, []
+            if table:
+                self._tables[(target_language, key)] = table
+                self.masked_keys += 1
+            masked[key] = masked_text
+        return masked
+
+    def mask_examples(self, examples: Dict[str, str]) -> Dict[str, str]:
+        """Few-shot ``{English: translation}`` examples with placeholders as the same tags the batch uses."""
+        masked = {}
+        for source, translation in examples.items():
+            try:
+                pair = mask_example(source, translation)
+            except PlaceholderError:
+                continue
+            if pair:
+                masked[pair[0]] = pair[1]
+        return masked
+
+    def unmask_translations(self, texts: Dict[str, str], translations: Dict[str, str],
+                            target_language: str) -> Dict[str, str]:
+        """Restore placeholders in ``translations`` of the original ``texts``, dropping broken keys."""
+        restored = {}
+        for key, translation in translations.items():
+            table = self._tables.pop((target_language, key), [])
+            try:
+                translation = unmask(translation, table)
+            except PlaceholderError as e:
+                self._reject(target_language, key, str(e))
+                continue
+            try:
+                problem = check(texts[key], translation) if key in texts else None
+            except PlaceholderError as e:
+                problem = f"English text is not valid ICU: {e}"
+            if problem:
+                self._reject(target_language, key, problem)
+                continue
+            restored[key] = translation
+        return restored
+
+    def _reject(self, target_language: str, key: str, problem: str):
+        logger.warning(f"⚠️ [{target_language}] {key}: {problem}; not writing this translation")
+        self.rejected.append((target_language, key, problem))
+
+    def log_summary(self):
+        if not self.masked_keys:
+            return
+
+        logger.info(f"🔒 Placeholder Summary:")
+        logger.info(f"   - Texts sent with masked placeholders: {self.masked_keys}")
+        logger.info(f"   - Translations rejected for broken placeholders: {len(self.rejected)}")
+
+def validate_corpus(corpus: ArbCorpus) -> List[Dict[str, str]]:
+    """Check every translation of the corpus against the placeholders of its English text."""
+    findings = []
+    base = corpus.base_locale
+    signatures = {}
+    for key in corpus.keys_of(base):
+        text = corpus.get(base, key)
+        try:
+            signatures[key] = signature(text)
+        except PlaceholderError as e:
+            findings.append({'locale': base, 'key': key, 'problem': f"invalid ICU syntax: {e}"})
+
+    for locale in corpus.target_locales:
+        for key, value in corpus.data(locale).items():
+            source_signature = signatures.get(key)
+            if source_signature is None:
+                continue
+            # Fast path for the common case of no placeholders on either side
+            if source_signature is EMPTY_SIGNATURE and '{' not in value and '}' not in value:
+                continue
+            problem = check(corpus.get(base, key), value, source_signature)
+            if problem:
+                findings.append({'locale': locale, 'key': key, 'problem': problem})
+    return findings
+
+def main():
+    parser = argparse.ArgumentParser(description='Check that every translation keeps the placeholders of its English text')
+    parser.add_argument('--l10n-dir', default=str(DEFAULT_L10N_DIR), help='Directory containing intl_*.arb files')
+    parser.add_argument('--json', action='store_true', help='Print findings as JSON')
+
+    args = parser.parse_args()
+
+    corpus = ArbCorpus.load(args.l10n_dir)
+    start = time.perf_counter()
+    findings = validate_corpus(corpus)
+    elapsed = time.perf_counter() - start
+    values = sum(len(corpus.keys_of(locale)) for locale in corpus.target_locales)
+
+    if args.json:
+        print(json.dumps(findings, ensure_ascii=False, indent=2))
+    else:
+        for finding in findings:
+            print(f"{finding['locale']:<8} {finding['key']}: {finding['problem']}")
+        print(f"Checked {values} translations in {elapsed * 1000:.0f} ms, {len(findings)} problems")
+    sys.exit(1 if findings else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Per-locale provenance sidecars recording how each translation was produced
+"""
+
+import argparse
+import json
+import logging
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from arb_io import atomic_write_text
+from sync_manifest import source_hash
+from translation_memory import STATE_DIR
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROVENANCE_DIR = STATE_DIR / 'provenance'
+
+FORMAT_VERSION = 1
+
+# How a translation was produced:
+#   batch       a batch response that passed validation
+#   recovery    kept from a failed batch or re-requested by bisection
+#   multi       a multi-target batch
+#   single      the single-key fallback
+#   error       the single-key fallback failed and the text it was given was kept
+#   memory      served from the translation memory
+#   checkpoint  resumed from the journal of an interrupted run
+#   fuzzy       reused from the existing translation of an identical English string
+METHODS = ('batch', 'recovery', 'multi', 'single', 'error', 'memory', 'checkpoint', 'fuzzy')
+
+# Methods whose output is worth retrying on a later run
+UNTRUSTED_METHODS = ('single', 'error')
+
+class Provenance(NamedTuple):
+    source_hash: str
+    method: str
+    model: str
+    prompt_version: str
+    timestamp: int
+
+class ProvenanceStore:
+    """One compact JSON sidecar per locale in ``.l10n_state/provenance``.
+
+    The files live outside ``lib/src/l10n`` so the Flutter generator never
+    sees them. Model names and prompt versions are interned into tables and
+    every entry is a short ``[source hash, method, model, prompt, time]``
+    row.
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = Path(directory) if directory else DEFAULT_PROVENANCE_DIR
+        self._locales: Dict[str, Dict[str, Provenance]] = {}
+        self._dirty = set()
+        self.recorded = Counter()
+
+    def path(self, locale: str) -> Path:
+        return self.directory / f'{locale}.json'
+
+    def entries(self, locale: str) -> Dict[str, Provenance]:
+        """The provenance of every recorded key of a locale, read on first use."""
+        if locale not in self._locales:
+            self._locales[locale] = self._read(locale)
+        return self._locales[locale]
+
+    def _read(self, locale: str) -> Dict[str, Provenance]:
+        path = self.path(locale)
+        if not path.exists():
+            return {}
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            models, prompts = data['models'], data['prompts']
+            return {key: Provenance(digest, METHODS[method], models[model], prompts[prompt], timestamp)
+                    for key, (digest, method, model, prompt, timestamp) in data['entries'].items()}
+        except (OSError, ValueError, KeyError, IndexError, TypeError) as e:
+            logger.warning(f"Ignoring unreadable provenance file {path}: {str(e)}")
+            return {}
+
+    def get(self, locale: str, key: str) -> Optional[Provenance]:
+        return self.entries(locale).get(key)
+
+    def record(self, locale: str, translations: Dict[str, str], sources: Dict[str, str], methods: Dict[str, str],
+               model: str, prompt_version: str):
+        """Record freshly written translations of ``sources``; keys without a method came from a batch."""
+        entries = self.entries(locale)
+        now = int(time.time())
+        for key in translations:
+            if key not in sources:
+                continue
+            method = methods.get(key, 'batch')
+            entries[key] = Provenance(source_hash(sources[key]), method, model, prompt_version, now)
+            self.recorded[method] += 1
+        self._dirty.add(locale)
+
+    def forget(self, locale: str, keys: Iterable[str]):
+        """Drop keys that no longer exist in the English file."""
+        entries = self.entries(locale)
+        for key in keys:
+            if entries.pop(key, None) is not None:
+                self._dirty.add(locale)
+
+    def untrusted(self, locale: str) -> List[str]:
+        """Keys of a locale whose current translation came from the fallback or an error."""
+        return [key for key, entry in self.entries(locale).items() if entry.method in UNTRUSTED_METHODS]
+
+    def save(self):
+        """Write every locale changed since the last save."""
+        if not self._dirty:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        for locale in sorted(self._dirty):
+            models: Dict[str, int] = {}
+            prompts: Dict[str, int] = {}
+            entries = {}
+            for key, entry in sorted(self._locales[locale].items()):
+                model = models.setdefault(entry.model, len(models))
+                prompt = prompts.setdefault(entry.prompt_version, len(prompts))
+                entries[key] = [entry.source_hash, METHODS.index(entry.method), model, prompt, entry.timestamp]
+            data = {'version': FORMAT_VERSION, 'models': list(models), 'prompts': list(prompts), 'entries': entries}
+            atomic_write_text(str(self.path(locale)), json.dumps(data, ensure_ascii=False, separators=(',', ':')) + '\n')
+        self._dirty.clear()
+
+    def log_summary(self):
+        if not self.recorded:
+            return
+
+        logger.info(f"🧾 Provenance Summary:")
+        logger.info(f"   - Translations recorded: {sum(self.recorded.values())} "
+                    f"({', '.join(f'{method} {count}' for method, count in self.recorded.most_common())})")
+        untrusted = sum(self.recorded[method] for method in UNTRUSTED_METHODS)
+        if untrusted:
+            logger.info(f"   - Untrusted (retried by --retry-untrusted): {untrusted}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Summarize how the translations of each locale were produced')
+    parser.add_argument('--dir', default=str(DEFAULT_PROVENANCE_DIR),
+                        help='Provenance directory (default: .l10n_state/provenance)')
+    parser.add_argument('--locale', help='List the untrusted keys of this locale')
+
+    args = parser.parse_args()
+
+    store = ProvenanceStore(args.dir)
+    if args.locale:
+        for key in store.untrusted(args.locale):
+            entry = store.get(args.locale, key)
+            print(f"{key:<40} {entry.method:<10} {entry.model} {entry.prompt_version} "
+                  f"{time.strftime('%Y-%m-%d %H:%M', time.localtime(entry.timestamp))}")
+        return
+
+    print(f"{'locale':<8} {'entries':>8} " + ' '.join(f'{method:>10}' for method in METHODS))
+    for path in sorted(store.directory.glob('*.json')):
+        methods = Counter(entry.method for entry in store.entries(path.stem).values())
+        print(f"{path.stem:<8} {sum(methods.values()):>8} " + ' '.join(f'{methods[method]:>10}' for method in METHODS))
+
+if __name__ == "__main__":
+    main()
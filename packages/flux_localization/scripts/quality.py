@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Score existing translations with cheap local heuristics to pick the ones worth retranslating
+"""
+
+import argparse
+import json
+import logging
+import math
+import re
+import statistics
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+
+from arb_corpus import DEFAULT_L10N_DIR, ArbCorpus
+from placeholders import EMPTY_SIGNATURE, PlaceholderError, check, signature
+from provenance import DEFAULT_PROVENANCE_DIR, ProvenanceStore
+
+logger = logging.getLogger(__name__)
+
+# Weight of each signal; a key's score is the sum of the signals it trips
+WEIGHTS = {
+    'empty': 5.0,
+    'placeholder': 4.0,
+    'identical': 3.0,
+    'script': 3.0,
+    'fallback': 2.0,
+    'length': 1.0,
+}
+
+# Unicode blocks of the scripts used by the supported languages
+SCRIPT_RANGES = {
+    'latin': ((0x0041, 0x024F), (0x1E00, 0x1EFF)),
+    'greek': ((0x0370, 0x03FF),),
+    'cyrillic': ((0x0400, 0x052F),),
+    'armenian': ((0x0530, 0x058F),),
+    'hebrew': ((0x0590, 0x05FF),),
+    'arabic': ((0x0600, 0x06FF), (0x0750, 0x077F), (0xFB50, 0xFDFF), (0xFE70, 0xFEFF)),
+    'devanagari': ((0x0900, 0x097F),),
+    'bengali': ((0x0980, 0x09FF),),
+    'tamil': ((0x0B80, 0x0BFF),),
+    'telugu': ((0x0C00, 0x0C7F),),
+    'kannada': ((0x0C80, 0x0CFF),),
+    'sinhala': ((0x0D80, 0x0DFF),),
+    'thai': ((0x0E00, 0x0E7F),),
+    'lao': ((0x0E80, 0x0EFF),),
+    'myanmar': ((0x1000, 0x109F),),
+    'georgian': ((0x10A0, 0x10FF),),
+    'hangul': ((0x1100, 0x11FF), (0x3130, 0x318F), (0xAC00, 0xD7AF)),
+    'ethiopic': ((0x1200, 0x139F),),
+    'khmer': ((0x1780, 0x17FF),),
+    'kana': ((0x3040, 0x30FF),),
+    'han': ((0x3400, 0x4DBF), (0x4E00, 0x9FFF), (0xF900, 0xFAFF)),
+}
+
+# Scripts a locale is written in; locales not listed use Latin
+LOCALE_SCRIPTS = {
+    'am': ('ethiopic',), 'ti': ('ethiopic',),
+    'ar': ('arabic',), 'fa': ('arabic',), 'ur': ('arabic',), 'ku': ('arabic',),
+    'bg': ('cyrillic',), 'kk': ('cyrillic',), 'ru': ('cyrillic',), 'uk': ('cyrillic',),
+    'sr': ('cyrillic', 'latin'),
+    'el': ('greek',), 'he': ('hebrew',), 'ka': ('georgian',),
+    'hi': ('devanagari',), 'mr': ('devanagari',),
+    'bn': ('bengali',), 'ta': ('tamil',), 'te': ('telugu',), 'kn': ('kannada',), 'si': ('sinhala',),
+    'th': ('thai',), 'lo': ('lao',), 'km': ('khmer',), 'my': ('myanmar',),
+    'ja': ('kana', 'han'), 'ko': ('hangul',),
+    'zh': ('han',), 'zh_CN': ('han',), 'zh_TW': ('han',),
+}
+
+# Simple {arguments}, whose names are Latin in every language
+_ARGUMENTS = re.compile(r'\{[^{}]*\}')
+
+# A value is off-script when fewer than this share of its letters are in the locale's scripts
+MIN_SCRIPT_SHARE = 0.5
+# Robust z-score of the length ratio above which a value is an outlier
+LENGTH_Z_THRESHOLD = 3.5
+# Shorter sources ("OK", "Go") give meaningless length ratios
+MIN_LENGTH_SOURCE = 8
+
+def _in_scripts(codepoint: int, scripts: Iterable[str]) -> bool:
+    return any(low <= codepoint <= high for script in scripts for low, high in SCRIPT_RANGES[script])
+
+def is_language_neutral(text: str) -> bool:
+    """Whether a string reads the same in every language: no words outside placeholders, or only acronyms."""
+    letters = [ch for ch in _ARGUMENTS.sub('', text) if ch.isalpha()]
+    return not letters or all(ch.isupper() for ch in letters)
+
+def script_share(text: str, locale: str) -> Optional[float]:
+    """Share of the letters of ``text`` written in the locale's scripts; None without enough letters."""
+    scripts = LOCALE_SCRIPTS.get(locale, ('latin',))
+    letters = [ord(ch) for ch in _ARGUMENTS.sub('', text) if ch.isalpha()]
+    if len(letters) < 3:
+        return None
+    return sum(_in_scripts(codepoint, scripts) for codepoint in letters) / len(letters)
+
+class Flag:
+    """A suspect translation and the signals it tripped."""
+
+    def __init__(self, key: str, score: float, reasons: List[str]):
+        self.key = key
+        self.score = score
+        self.reasons = reasons
+
+    def as_dict(self) -> Dict:
+        return {'key': self.key, 'score': round(self.score, 2), 'reasons': self.reasons}
+
+class QualityScorer:
+    """Flag translations of a corpus that are probably wrong, worst first.
+
+    Signals: the value is blank, it is still the English text, most of its
+    letters are in the wrong script, its placeholders differ from English,
+    its length ratio to English is an outlier for the locale, or it came from
+    the single-key fallback according to its provenance. Acronyms and strings without words are never
+    flagged as identical.
+    """
+
+    def __init__(self, corpus: ArbCorpus, provenance: Optional[ProvenanceStore] = None):
+        self.corpus = corpus
+        self.provenance = provenance
+        self._flags: Dict[str, List[Flag]] = {}
+        self._signatures = {}
+
+    def _signature(self, key: str, source: str):
+        if key not in self._signatures:
+            try:
+                self._signatures[key] = signature(source)
+            except PlaceholderError:
+                self._signatures[key] = None
+        return self._signatures[key]
+
+    def _length_outliers(self, locale: str, data: Dict[str, str]) -> Dict[str, float]:
+        """Robust z-scores (median/MAD of log length ratios) of the keys beyond the threshold."""
+        base = self.corpus.base_locale
+        ratios = {}
+        for key, value in data.items():
+            source = self.corpus.get(base, key)
+            if source and len(source) >= MIN_LENGTH_SOURCE and value.strip():
+                ratios[key] = math.log(len(value) / len(source))
+        if len(ratios) < 20:
+            return {}
+
+        median = statistics.median(ratios.values())
+        mad = statistics.median(abs(ratio - median) for ratio in ratios.values())
+        if not mad:
+            return {}
+        scores = {key: 0.6745 * (ratio - median) / mad for key, ratio in ratios.items()}
+        return {key: abs(z) for key, z in scores.items() if abs(z) > LENGTH_Z_THRESHOLD}
+
+    def flags(self, locale: str) -> List[Flag]:
+        """Every flagged key of a locale, highest score first."""
+        if locale in self._flags:
+            return self._flags[locale]
+
+        base = self.corpus.base_locale
+        data = {key: value for key, value in self.corpus.data(locale).items()
+                if key != '@@locale' and isinstance(value, str) and self.corpus.has(base, key)}
+        outliers = self._length_outliers(locale, data)
+        fallback = set(self.provenance.untrusted(locale)) if self.provenance else set()
+
+        flags = []
+        for key, value in data.items():
+            source = self.corpus.get(base, key)
+            score = 0.0
+            reasons = []
+
+            if not value.strip() and source.strip():
+                flags.append(Flag(key, WEIGHTS['empty'], ['empty']))
+                continue
+
+            source_signature = self._signature(key, source)
+            if source_signature is not None and (source_signature is not EMPTY_SIGNATURE or '{' in value or '}' in value):
+                if check(source, value, source_signature):
+                    score += WEIGHTS['placeholder']
+                    reasons.append('placeholder')
+
+            if value == source:
+                if not is_language_neutral(value):
+                    score += WEIGHTS['identical']
+                    reasons.append('identical')
+            else:
+                share = script_share(value, locale)
+                if share is not None and share < MIN_SCRIPT_SHARE:
+                    score += WEIGHTS['script'] * (1 - share)
+                    reasons.append('script')
+
+            if key in outliers:
+                # Grows with the distance from the locale's typical ratio, capped at 3x
+                score += WEIGHTS['length'] * min(3.0, outliers[key] / LENGTH_Z_THRESHOLD)
+                reasons.append('length')
+
+            if key in fallback:
+                score += WEIGHTS['fallback']
+                reasons.append('fallback')
+
+            if reasons:
+                flags.append(Flag(key, score, reasons))
+
+        flags.sort(key=lambda flag: flag.score, reverse=True)
+        self._flags[locale] = flags
+        return flags
+
+    def top(self, locale: str, limit: int) -> List[Flag]:
+        return self.flags(locale)[:limit]
+
+    def log_summary(self, limit: int = 0):
+        if not self._flags:
+            return
+
+        reasons = Counter(reason for flags in self._flags.values() for flag in flags for reason in flag.reasons)
+        flagged = sum(len(flags) for flags in self._flags.values())
+        logger.info(f"🎯 Quality Targeting Summary:")
+        logger.info(f"   - Flagged translations: {flagged} across {len(self._flags)} languages")
+        if limit:
+            selected = sum(min(limit, len(flags)) for flags in self._flags.values())
+            logger.info(f"   - Selected for retranslation: {selected} (top {limit} per language)")
+        logger.info(f"   - Signals: {', '.join(f'{name} {count}' for name, count in reasons.most_common()) or 'none'}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Flag suspect translations with local heuristics (no API calls)')
+    parser.add_argument('--l10n-dir', default=str(DEFAULT_L10N_DIR), help='Directory containing intl_*.arb files')
+    parser.add_argument('--languages', nargs='+', help='Languages to score (default: all)')
+    parser.add_argument('--top', type=int, default=10, help='Entries to list per language (default: 10)')
+    parser.add_argument('--provenance-dir', default=str(DEFAULT_PROVENANCE_DIR),
+                        help='Provenance sidecars used for the fallback signal (default: .l10n_state/provenance)')
+    parser.add_argument('--json', action='store_true', help='Print the top entries per language as JSON')
+
+    args = parser.parse_args()
+
+    corpus = ArbCorpus.load(args.l10n_dir)
+    scorer = QualityScorer(corpus, ProvenanceStore(args.provenance_dir))
+    report = {}
+    for locale in corpus.select(args.languages):
+        report[locale] = [flag.as_dict() for flag in scorer.top(locale, args.top)]
+        if not args.json:
+            print(f"{locale}: {len(scorer.flags(locale))} flagged")
+            for flag in scorer.top(locale, args.top):
+                print(f"   {flag.score:5.2f} {flag.key:<40} {','.join(flag.reasons):<24} "
+                      f"{corpus.get(locale, flag.key)[:60]!r}")
+
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Request and token rate limiting with server-guided backoff for Azure OpenAI calls
+"""
+
+import asyncio
+import logging
+import random
+import threading
+import time
+from typing import Dict, Optional
+import openai
+
+from batching import estimate_prompt_tokens
+
+logger = logging.getLogger(__name__)
+
+# Errors worth retrying after a pause; anything else (bad request, auth,
+# content filter) fails the same way on every attempt
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+)
+
+class TokenBucket:
+    """Refill ``per_minute`` units evenly over a minute, holding at most ``capacity``."""
+
+    def __init__(self, per_minute: float, capacity: float):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity
+        self.level = capacity
+        self._updated = time.monotonic()
+
+    def refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def take(self, amount: float) -> float:
+        """Take ``amount`` units, going into debt if needed; return the seconds until the debt is paid."""
+        self.level -= amount
+        return -self.level / self.rate if self.level < 0 else 0.0
+
+class RateLimiter:
+    """Pace chat completion calls to the deployment's RPM/TPM quota.
+
+    Every call reserves one request and its estimated tokens up front and
+    waits until both buckets allow it. Azure enforces the quota over short
+    windows as well as per minute, so each bucket only holds ten seconds'
+    worth of quota. ``x-ratelimit-remaining-*`` response headers pull the
+    buckets down to what the server reports, and a 429 pauses every caller
+    for the ``retry-after`` time rather than letting each one hammer the
+    deployment on its own schedule. A quota of 0 disables that bucket.
+    """
+
+    BURST_SECONDS = 10
+
+    def __init__(self, requests_per_minute: int = 0, tokens_per_minute: int = 0, max_retries: int = 5,
+                 base_delay: float = 1.0, max_delay: float = 60.0):
+        self.requests = TokenBucket(requests_per_minute, requests_per_minute * self.BURST_SECONDS / 60) if requests_per_minute > 0 else None
+        self.tokens = TokenBucket(tokens_per_minute, tokens_per_minute * self.BURST_SECONDS / 60) if tokens_per_minute > 0 else None
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self._lock = threading.Lock()
+        self._paused_until = 0.0
+
+        self.calls = 0
+        self.throttled = 0
+        self.retries = 0
+        self.wait_time = 0.0
+
+    @classmethod
+    def from_quota(cls, tokens_per_minute: int = 0, requests_per_minute: int = 0) -> 'RateLimiter':
+        """Build a limiter from a deployment quota; Azure grants 6 RPM per 1000 TPM unless told otherwise."""
+        if tokens_per_minute > 0 and requests_per_minute <= 0:
+            requests_per_minute = tokens_per_minute * 6 // 1000
+        return cls(requests_per_minute, tokens_per_minute)
+
+    @staticmethod
+    def request_tokens(request_kwargs: Dict) -> int:
+        """Tokens Azure counts against the TPM quota: the prompt plus the requested ``max_tokens``."""
+        return estimate_prompt_tokens(request_kwargs.get('messages', [])) + request_kwargs.get('max_tokens', 0)
+
+    def reserve(self, tokens: int) -> float:
+        """Book one request of ``tokens`` tokens and return how long to wait before sending it."""
+        with self._lock:
+            now = time.monotonic()
+            delay = max(0.0, self._paused_until - now)
+            if self.requests:
+                self.requests.refill(now)
+                delay = max(delay, self.requests.take(1))
+            if self.tokens:
+                self.tokens.refill(now)
+                delay = max(delay, self.tokens.take(tokens))
+            self.calls += 1
+            self.wait_time += delay
+            return delay
+
+    def backoff_delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Seconds to wait before retry ``attempt`` (0-based): the server's hint, else full-jitter exponential."""
+        if retry_after is not None:
+            # A little jitter so callers told the same time do not all return at once
+            return retry_after + random.uniform(0, self.base_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    @staticmethod
+    def retry_after(headers) -> Optional[float]:
+        """Read ``retry-after-ms`` or ``retry-after`` (in seconds) from response headers."""
+        if headers is None:
+            return None
+        for name, scale in (('retry-after-ms', 0.001), ('retry-after', 1.0)):
+            value = headers.get(name)
+            if value is None:
+                continue
+            try:
+                return max(0.0, float(value) * scale)
+            except ValueError:
+                # HTTP-date form; fall back to exponential backoff
+                return None
+        return None
+
+    def observe_headers(self, headers):
+        """Lower the local buckets to the remaining quota the server reports."""
+        if headers is None:
+            return
+        with self._lock:
+            now = time.monotonic()
+            for bucket, name in ((self.requests, 'x-ratelimit-remaining-requests'),
+                                 (self.tokens, 'x-ratelimit-remaining-tokens')):
+                value = headers.get(name)
+                if bucket is None or value is None:
+                    continue
+                try:
+                    remaining = float(value)
+                except ValueError:
+                    continue
+                bucket.refill(now)
+                bucket.level = min(bucket.level, remaining)
+
+    def _on_error(self, error: Exception, attempt: int) -> float:
+        """Record a retryable failure and return the delay before the next attempt."""
+        headers = getattr(getattr(error, 'response', None), 'headers', None)
+        hint = self.retry_after(headers)
+        delay = self.backoff_delay(attempt, hint)
+
+        with self._lock:
+            self.retries += 1
+            if isinstance(error, openai.RateLimitError):
+                self.throttled += 1
+                # Hold back every caller, not just this one
+                self._paused_until = max(self._paused_until, time.monotonic() + delay)
+        logger.warning(f"⏳ {type(error).__name__}, retrying in {delay:.1f}s"
+                       f"{' (server hint)' if hint is not None else ''}")
+        return delay
+
+    def create(self, client: openai.AzureOpenAI, request_kwargs: Dict, call=None):
+        """Send a chat completion through the limiter, retrying throttled and transient failures.
+
+        ``call`` is an optional ``metrics.CallTrace`` that receives the HTTP
+        attempts, pacing and response times and the token usage.
+        """
+        tokens = self.request_tokens(request_kwargs)
+        for attempt in range(self.max_retries + 1):
+            delay = self.reserve(tokens)
+            time.sleep(delay)
+            started = time.perf_counter()
+            try:
+                raw = client.chat.completions.with_raw_response.create(**request_kwargs)
+            except RETRYABLE_ERRORS as e:
+                self._trace_attempt(call, e, delay, started)
+                if attempt == self.max_retries:
+                    raise
+                time.sleep(self._on_error(e, attempt))
+                continue
+            self._trace_attempt(call, None, delay, started)
+            return self._accept(raw, request_kwargs, call)
+
+    async def create_async(self, client: openai.AsyncAzureOpenAI, request_kwargs: Dict, call=None):
+        """Asyncio version of ``create``."""
+        tokens = self.request_tokens(request_kwargs)
+        for attempt in range(self.max_retries + 1):
+            delay = self.reserve(tokens)
+            await asyncio.sleep(delay)
+            started = time.perf_counter()
+            try:
+                raw = await client.chat.completions.with_raw_response.create(**request_kwargs)
+            except RETRYABLE_ERRORS as e:
+                self._trace_attempt(call, e, delay, started)
+                if attempt == self.max_retries:
+                    raise
+                await asyncio.sleep(self._on_error(e, attempt))
+                continue
+            self._trace_attempt(call, None, delay, started)
+            return self._accept(raw, request_kwargs, call)
+
+    @staticmethod
+    def _trace_attempt(call, error: Optional[Exception], delay: float, started: float):
+        if call is None:
+            return
+        call.http_attempts += 1
+        call.pacing += delay
+        call.latency += time.perf_counter() - started
+        if isinstance(error, openai.RateLimitError):
+            call.throttled += 1
+
+    def _accept(self, raw, request_kwargs: Dict, call):
+        self.observe_headers(raw.headers)
+        response = raw.parse()
+        if call is None:
+            return response
+        if request_kwargs.get('stream'):
+            # Streams carry no usage; the stream consumer counts the completion
+            call.prompt_tokens = estimate_prompt_tokens(request_kwargs.get('messages', []))
+        else:
+            call.observe(response)
+        return response
+
+    def log_summary(self):
+        logger.info(f"⏱️ Rate Limiter Summary:")
+        logger.info(f"   - Requests sent: {self.calls}")
+        logger.info(f"   - Throttled (429) responses: {self.throttled}")
+        logger.info(f"   - Retried calls: {self.retries}")
+        logger.info(f"   - Time spent pacing: {self.wait_time:.1f}s")
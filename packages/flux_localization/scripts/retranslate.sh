@@ -110,6 +110,7 @@ show_help() {
     echo "  --azure-endpoint URL    Azure OpenAI endpoint"
     echo "  --api-key KEY           Azure OpenAI API key"
     echo "  --deployment-name NAME  Azure OpenAI deployment name"
+    echo "  --concurrency N         Maximum API calls in flight across all languages (default: serial)"
     echo
     echo "Examples:"
     echo "  $0                                    # Retranslate all languages"
@@ -137,6 +138,7 @@ run_retranslation() {
     local batch_size="$6"
     local filters="$7"
     local no_backup="$8"
+    local concurrency="$9"
     
     print_info "Starting retranslation process..."
     
@@ -175,6 +177,10 @@ run_retranslation() {
         cmd="$cmd --no-backup"
     fi
     
+    if [ -n "$concurrency" ]; then
+        cmd="$cmd --concurrency $concurrency"
+    fi
+    
     print_info "Executing: $cmd"
     eval $cmd
 }
@@ -191,6 +197,7 @@ main() {
     local batch_size="100"
     local filters=""
     local no_backup=false
+    local concurrency=""
     
     while [[ $# -gt 0 ]]; do
         case $1 in
@@ -234,6 +241,10 @@ main() {
                 no_backup=true
                 shift
                 ;;
+            --concurrency)
+                concurrency="$2"
+                shift 2
+                ;;
             *)
                 print_error "Unknown option: $1"
                 show_help
@@ -255,7 +266,7 @@ main() {
     check_environment
     
     # Run retranslation
-    run_retranslation "$languages" "$l10n_dir" "$azure_endpoint" "$api_key" "$deployment_name" "$batch_size" "$filters" "$no_backup"
+    run_retranslation "$languages" "$l10n_dir" "$azure_endpoint" "$api_key" "$deployment_name" "$batch_size" "$filters" "$no_backup" "$concurrency"
 }
 
 # Run main function
@@ -10,10 +10,28 @@ import argparse
 import logging
 import time
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple
 import openai
 from dotenv import load_dotenv
 
+from arb_corpus import ArbCorpus, locale_of
+from async_engine import AsyncTranslationEngine
+from backup_store import DEFAULT_BACKUP_DIR, BackupStore
+from batch_recovery import RecoveryStats, bisect_recover, is_usable, keep_best, salvage_translations
+from batching import AdaptiveBatcher
+from checkpoint import DEFAULT_CHECKPOINT_DIR, CheckpointJournal
+from dart_usage import UsageIndex
+from fuzzy_memory import DEFAULT_HINT_THRESHOLD, FuzzyMemory
+from metrics import CallMetrics
+from placeholders import PlaceholderError, PlaceholderMasker, check
+from provenance import DEFAULT_PROVENANCE_DIR, ProvenanceStore
+from quality import QualityScorer
+from rate_limiter import RateLimiter
+from streaming_json import StreamResult, consume_stream
+from translation_memory import DEFAULT_CACHE_PATH, DEFAULT_MAX_ENTRIES, TranslationMemory
+from transport import DEFAULT_CONNECT_TIMEOUT, HttpTransport
+from wire_format import encode_examples, encode_payload, from_wire
+
 # Load environment variables
 load_dotenv()
 
@@ -22,8 +40,59 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(
 logger = logging.getLogger(__name__)
 
 class Retranslator:
-    def __init__(self, azure_endpoint: str = None, api_key: str = None, deployment_name: str = None):
+    # Completion budget of one batch request; adaptive batching packs keys against it
+    BATCH_MAX_TOKENS = 4000
+
+    # Bump whenever the batch prompt, system message or sampling settings change
+    # so the translation memory stops serving results of the old prompt
+    PROMPT_VERSION = "retranslate-4"
+
+    # Guidelines shared by every batch call; the user message carries only the
+    # language and the texts, keyed by short ids (see wire_format.py)
+    BATCH_SYSTEM_PROMPT = """You are a professional translator specializing in mobile app localization. The user names the target language and sends a JSON object of English texts keyed by short ids. You MUST return ONLY a valid JSON object with the same ids mapped to high-quality, natural translations, written compactly like the input. Do not include any explanations or additional text.
+
+Translation guidelines:
+1. Keep placeholders like {variable} and tags like <x0/> or <x1>...</x1> unchanged; translate only the text around and between tags
+2. Maintain the same tone and style as the original
+3. Ensure translations are natural, culturally appropriate, and suitable for a mobile app
+4. Use proper grammar and punctuation for the target language
+5. When existing translations of similar texts follow the input, keep their terminology and wording"""
+
+    def __init__(self, azure_endpoint: str = None, api_key: str = None, deployment_name: str = None,
+                 translation_memory: Optional[TranslationMemory] = None, adaptive_batching: bool = False,
+                 rate_limiter: Optional[RateLimiter] = None, checkpoint_dir: Optional[str] = None,
+                 backup_store: Optional[BackupStore] = None, metrics: Optional[CallMetrics] = None,
+                 stream: bool = False, placeholders: Optional[PlaceholderMasker] = None,
+                 provenance: Optional[ProvenanceStore] = None, quality_top: int = 0,
+                 transport: Optional[HttpTransport] = None, usage: Optional[UsageIndex] = None,
+                 fuzzy: Optional[FuzzyMemory] = None):
         """Initialize the retranslator with Azure OpenAI credentials."""
+        self.translation_memory = translation_memory
+        self.adaptive_batching = adaptive_batching
+        # Stream batch responses and keep each translation as soon as its pair is complete
+        self.stream = stream
+        # Send placeholders as opaque tags and reject translations that lose them
+        self.placeholders = placeholders
+        # How each written translation was produced, kept in sidecars next to the run state
+        self.provenance = provenance
+        self.methods: Dict[str, Dict[str, str]] = {}
+        # With quality_top > 0 only the worst-scoring entries of each file are retranslated
+        self.quality_top = quality_top
+        self.quality: Optional[QualityScorer] = None
+        # Keys no Dart file uses are left out when a usage index is given
+        self.usage = usage
+        # Nearest existing translations, sent as examples with each batch
+        self.fuzzy = fuzzy
+        self._batchers: Dict[str, AdaptiveBatcher] = {}
+        self.recovery_stats = RecoveryStats()
+        # Wall-clock seconds of every batch including retries and recovery
+        self.batch_latencies: List[float] = []
+        self.corpus: Optional[ArbCorpus] = None
+        self.backup_store = backup_store or BackupStore()
+        self.rate_limiter = rate_limiter or RateLimiter()
+        # Connection pool and timeouts shared by the sync client and the asyncio engine
+        self.transport = transport or HttpTransport()
+        self.metrics = metrics or CallMetrics()
         self.azure_endpoint = azure_endpoint or os.getenv('AZURE_OPENAI_ENDPOINT')
         self.api_key = api_key or os.getenv('AZURE_OPENAI_API_KEY')
         self.deployment_name = deployment_name or os.getenv('AZURE_OPENAI_DEPLOYMENT_NAME')
@@ -31,10 +100,17 @@ class Retranslator:
         if not all([self.azure_endpoint, self.api_key, self.deployment_name]):
             raise ValueError("Missing Azure OpenAI credentials")
         
+        # Completed batches are journaled so an interrupted run resumes where it stopped
+        self.checkpoint = CheckpointJournal(checkpoint_dir, f"{self.PROMPT_VERSION}:{self.deployment_name}") if checkpoint_dir else None
+        
+        self.api_version = "2024-02-15-preview"
         self.client = openai.AzureOpenAI(
             azure_endpoint=self.azure_endpoint,
             api_key=self.api_key,
-            api_version="2024-02-15-preview"
+            api_version=self.api_version,
+            # Retries and backoff are handled by the rate limiter
+            max_retries=0,
+            http_client=self.transport.client()
         )
         
         # Language mapping
@@ -57,13 +133,17 @@ class Retranslator:
             'zh_TW': 'Chinese (Traditional)'
         }
 
+    def _corpus_for(self, file_path: str, reload: bool = False) -> ArbCorpus:
+        """The loaded ARB corpus containing ``file_path``, reading its directory once."""
+        if reload or self.corpus is None or self.corpus.locale_for(file_path) is None:
+            self.corpus = ArbCorpus.load(str(Path(file_path).parent))
+        return self.corpus
+
     def load_language_file(self, file_path: str) -> Tuple[Dict[str, str], str]:
         """Load a language file and return its data and language code."""
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
         # Extract language code from filename
-        language_code = Path(file_path).stem.replace('intl_', '')
+        language_code = locale_of(file_path)
+        data = self._corpus_for(file_path).data(language_code)
         return data, language_code
 
     def should_retranslate(self, key: str, value: str, filters: List[str] = None) -> bool:
@@ -81,7 +161,17 @@ class Retranslator:
     def retranslate_batch(self, texts: Dict[str, str], target_language: str, batch_size: int = 200) -> Dict[str, str]:
         """Retranslate texts in batches with high-quality LLM translations."""
         language_name = self.language_names.get(target_language, target_language)
-        translations = {}
+        
+        # Serve unchanged strings from the translation memory before batching
+        translations, texts = self._recall(texts, target_language)
+        
+        if self.adaptive_batching:
+            batcher = self._get_batcher(target_language, batch_size)
+            total_batches, batch_success_count, individual_fallback_count = self._retranslate_adaptive(
+                texts, translations, target_language, language_name, batcher)
+            self._log_batch_summary(total_batches, batch_success_count, individual_fallback_count)
+            batcher.log_summary()
+            return translations
         
         # Split texts into batches
         text_items = list(texts.items())
@@ -95,25 +185,21 @@ class Retranslator:
         for batch_idx, batch in enumerate(batches, 1):
             batch_texts = {key: text for key, text in batch}
             
-            # Try batch retranslation with retries
-            batch_translations = self._try_batch_retranslation(batch_texts, target_language, language_name, batch_idx)
+            batch_translations, batch_ok = self._retranslate_one_batch(batch_texts, target_language, language_name, batch_idx)
+            translations.update(batch_translations)
+            self._checkpoint(batch_texts, batch_translations, target_language)
             
-            if batch_translations:
-                translations.update(batch_translations)
+            if batch_ok:
                 batch_success_count += 1
                 logger.info(f"✅ Batch {batch_idx}/{len(batches)} completed successfully")
             else:
-                # Fallback to individual retranslation
-                logger.warning(f"⚠️ Batch {batch_idx} failed, using individual retranslation")
                 individual_fallback_count += 1
-                
-                for key, text in batch:
-                    translation = self._retranslate_single(text, target_language, language_name)
-                    translations[key] = translation
-                    time.sleep(0.1)  # Small delay to avoid rate limits
         
-        # Summary
-        total_batches = len(batches)
+        self._log_batch_summary(len(batches), batch_success_count, individual_fallback_count)
+        return translations
+
+    def _log_batch_summary(self, total_batches: int, batch_success_count: int, individual_fallback_count: int):
+        """Log the batch success statistics for one language."""
         success_rate = (batch_success_count / total_batches) * 100 if total_batches > 0 else 0
         
         logger.info(f"📊 Retranslation Summary:")
@@ -121,87 +207,293 @@ class Retranslator:
         logger.info(f"   - Successful batches: {batch_success_count}")
         logger.info(f"   - Individual fallbacks: {individual_fallback_count}")
         logger.info(f"   - Batch success rate: {success_rate:.1f}%")
+
+
+    def _get_batcher(self, target_language: str, batch_size: int) -> AdaptiveBatcher:
+        """Return the adaptive batcher of a language, keeping what it learned across calls."""
+        if target_language not in self._batchers:
+            self._batchers[target_language] = AdaptiveBatcher(target_language, self.BATCH_MAX_TOKENS, max_keys=batch_size)
+        return self._batchers[target_language]
+
+    def _retranslate_adaptive(self, texts: Dict[str, str], translations: Dict[str, str], target_language: str,
+                              language_name: str, batcher: AdaptiveBatcher) -> Tuple[int, int, int]:
+        """Retranslate texts in batches packed by estimated tokens.
+
+        A truncated or unparseable batch is not retried as is: the batcher
+        shrinks and the same keys are repacked, so only a failing single key
+        ever reaches the individual fallback.
+        """
+        remaining = list(texts.items())
+        total_batches = 0
+        batch_success_count = 0
+        individual_fallback_count = 0
         
-        return translations
+        logger.info(f"Retranslating {len(texts)} texts to {language_name} in adaptive batches "
+                    f"(budget {batcher.token_budget} tokens, max {batcher.max_keys} keys)")
+        
+        while remaining:
+            total_batches += 1
+            batch_texts = batcher.next_batch(remaining)
+            
+            if len(batch_texts) == 1:
+                batch_translations, batch_ok = self._retranslate_one_batch(batch_texts, target_language, language_name, total_batches)
+            else:
+                started = time.perf_counter()
+                salvaged = {}
+                batch_translations = self._try_batch_retranslation(batch_texts, target_language, language_name, total_batches,
+                                                  batcher=batcher, salvage=salvaged)
+                self.batch_latencies.append(time.perf_counter() - started)
+                batch_ok = bool(batch_translations)
+                if not batch_ok:
+                    if batcher.max_keys >= len(batch_texts):
+                        # Failed on errors rather than a bad response: still make the next batch smaller
+                        batcher.record_parse_failure(len(batch_texts))
+                    if salvaged:
+                        # Keep the keys that arrived complete and repack only the missing ones
+                        translations.update(salvaged)
+                        self._note(target_language, salvaged, 'recovery')
+                        self._checkpoint(batch_texts, salvaged, target_language)
+                        remaining = [(key, text) for key, text in remaining if key not in salvaged]
+                    logger.warning(f"⚠️ Batch {total_batches} ({len(batch_texts)} keys) failed, kept {len(salvaged)}, "
+                                   f"repacking the rest with max {batcher.max_keys} keys")
+                    continue
+                self._remember_batch(batch_texts, batch_translations, target_language)
+            
+            translations.update(batch_translations)
+            self._checkpoint(batch_texts, batch_translations, target_language)
+            remaining = remaining[len(batch_texts):]
+            if batch_ok:
+                batch_success_count += 1
+                logger.info(f"✅ Batch {total_batches} ({len(batch_texts)} keys) completed successfully")
+            else:
+                individual_fallback_count += 1
+        
+        return total_batches, batch_success_count, individual_fallback_count
+
+    def _retranslate_one_batch(self, batch_texts: Dict[str, str], target_language: str, language_name: str,
+                               batch_idx: int) -> Tuple[Dict[str, str], bool]:
+        """Retranslate one batch, falling back to individual retranslation if every retry fails."""
+        # Try batch retranslation with retries
+        started = time.perf_counter()
+        salvaged = {}
+        batch_translations = self._try_batch_retranslation(batch_texts, target_language, language_name, batch_idx,
+                                                  salvage=salvaged)
+        
+        if batch_translations:
+            self._remember_batch(batch_texts, batch_translations, target_language)
+            self.batch_latencies.append(time.perf_counter() - started)
+            return batch_translations, True
+        
+        # Recover by re-requesting only the keys that did not come back, in halves
+        logger.warning(f"⚠️ Batch {batch_idx} failed, kept {len(salvaged)}/{len(batch_texts)} keys; "
+                       f"recovering the rest by bisection")
+        
+        translations = bisect_recover(batch_texts, salvaged,
+                                      lambda texts: self._request_batch_partial(texts, target_language, language_name),
+                                      lambda text: self._retranslate_single(text, target_language, language_name), self.recovery_stats,
+                                      lambda key, method: self._note(target_language, [key], method))
+        self._note(target_language, translations, 'recovery')
+        self.batch_latencies.append(time.perf_counter() - started)
+        return translations, False
+
+    def _note(self, target_language: str, keys: Iterable[str], method: str):
+        """Remember how keys were translated for the provenance record; the first method noted wins."""
+        methods = self.methods.setdefault(target_language, {})
+        for key in keys:
+            methods.setdefault(key, method)
 
-    def _try_batch_retranslation(self, texts: Dict[str, str], target_language: str, language_name: str, batch_idx: int, max_retries: int = 2) -> Optional[Dict[str, str]]:
+    def _request_batch_partial(self, texts: Dict[str, str], target_language: str, language_name: str) -> Dict[str, str]:
+        """Make one batch call and return whichever keys came back usable."""
+        try:
+            with self.metrics.call(target_language, 'recovery', keys=len(texts)) as call:
+                if self.stream:
+                    return self._stream_batch(texts, language_name, call, target_language).ordered()
+                response = self.rate_limiter.create(self.client, self._batch_request_kwargs(texts, language_name, target_language),
+                                                    call)
+                response_text = response.choices[0].message.content.strip()
+                translations = self._parse_json_response(response_text, texts, call)
+                if translations:
+                    return {key: translations[key] for key in texts}
+                call.parse = 'salvaged'
+                return salvage_translations(response_text, texts)
+        except Exception as e:
+            logger.warning(f"Recovery call for {len(texts)} keys failed: {str(e)}")
+            return {}
+
+    def _recall(self, texts: Dict[str, str], target_language: str) -> Tuple[Dict[str, str], Dict[str, str]]:
+        """Split texts into translations already available and texts to send.
+
+        Translations come from the checkpoint of an interrupted run first,
+        then from the translation memory.
+        """
+        done = {}
+        if self.checkpoint:
+            done, texts = self.checkpoint.resume(target_language, texts)
+            self._note(target_language, done, 'checkpoint')
+        
+        if not self.translation_memory:
+            return done, texts
+        
+        cached, missing = self.translation_memory.lookup_many(texts, target_language, self.deployment_name, self.PROMPT_VERSION)
+        self._note(target_language, cached, 'memory')
+        if cached:
+            logger.info(f"🗄️ {len(cached)}/{len(texts)} texts for {target_language} served from translation memory")
+        return {**done, **cached}, missing
+
+    def _checkpoint(self, texts: Dict[str, str], translations: Dict[str, str], target_language: str):
+        """Journal a completed batch so a rerun does not request it again."""
+        if self.checkpoint:
+            self.checkpoint.record(target_language, texts, translations)
+
+    def _remember_batch(self, texts: Dict[str, str], translations: Dict[str, str], target_language: str):
+        """Store the result of a successful batch in the translation memory."""
+        if not self.translation_memory:
+            return
+        
+        self.translation_memory.store_many(texts, translations, target_language, self.deployment_name, self.PROMPT_VERSION)
+        # Retranslation feeds the file's current values back in, so the next run
+        # sends this batch's output. Record it as its own translation so an
+        # unchanged file costs no API calls on the following run.
+        outputs = {key: translations[key] for key in texts if isinstance(translations.get(key), str)}
+        self.translation_memory.store_many(outputs, outputs, target_language, self.deployment_name, self.PROMPT_VERSION)
+
+    def _try_batch_retranslation(self, texts: Dict[str, str], target_language: str, language_name: str, batch_idx: int, max_retries: int = 2,
+                  batcher: Optional[AdaptiveBatcher] = None, salvage: Optional[Dict[str, str]] = None) -> Optional[Dict[str, str]]:
         """Try batch retranslation with retries and improved prompts."""
         
         for attempt in range(max_retries + 1):
             try:
-                # Improved prompt for high-quality retranslation
-                prompt = self._create_retranslation_prompt(texts, language_name)
-                
                 logger.info(f"Making API call for batch {batch_idx} (attempt {attempt + 1})")
                 
-                response = self.client.chat.completions.create(
-                    model=self.deployment_name,
-                    messages=[
-                        {
-                            "role": "system", 
-                            "content": "You are a professional translator specializing in mobile app localization. You MUST return ONLY a valid JSON object with the exact same keys as the input, providing high-quality, natural translations to the target language. Focus on accuracy, cultural appropriateness, and maintaining the app's tone."
-                        },
-                        {"role": "user", "content": prompt}
-                    ],
-                    temperature=0.2,  # Slightly higher for better quality
-                    max_tokens=4000,
-                    timeout=120
-                )
-                
-                response_text = response.choices[0].message.content.strip()
-                
-                # Try to parse JSON with multiple strategies
-                translations = self._parse_json_response(response_text, texts)
+                with self.metrics.call(target_language, 'batch', attempt + 1, len(texts)) as call:
+                    if self.stream:
+                        streamed = self._stream_batch(texts, language_name, call, target_language)
+                        response_text, finish_reason = streamed.text, streamed.finish_reason
+                    else:
+                        response = self.rate_limiter.create(
+                            self.client, self._batch_request_kwargs(texts, language_name, target_language), call)
+                        response_text = response.choices[0].message.content.strip()
+                        finish_reason = response.choices[0].finish_reason
+                    
+                    if batcher and finish_reason == 'length' and len(texts) > 1:
+                        # Retrying the same batch would truncate again; let the batcher repack smaller
+                        logger.warning(f"Batch {batch_idx} attempt {attempt + 1}: Response truncated at max_tokens")
+                        batcher.record_truncation(len(texts))
+                        if salvage is not None:
+                            # The keys before the cut are complete; only the rest needs repacking
+                            keep_best(salvage, streamed.translations if self.stream
+                                      else salvage_translations(response_text, texts))
+                        return None
+                    
+                    # Try to parse JSON with multiple strategies
+                    if self.stream:
+                        translations = streamed.ordered() if streamed.complete else None
+                    else:
+                        translations = self._parse_json_response(response_text, texts, call)
                 
                 if translations:
+                    if batcher:
+                        batcher.record_success()
                     return translations
                 else:
-                    logger.warning(f"Batch {batch_idx} attempt {attempt + 1}: Invalid JSON response")
+                    logger.warning(f"Batch {batch_idx} attempt {attempt + 1}: Invalid or incomplete response")
+                    if salvage is not None:
+                        # Keep the best partial answer for recovery if every attempt fails
+                        keep_best(salvage, streamed.translations if self.stream
+                                  else salvage_translations(response_text, texts))
+                        if salvage:
+                            # Keep the usable keys and let recovery request only the rest
+                            return None
+                    if batcher and len(texts) > 1:
+                        batcher.record_parse_failure(len(texts))
+                        return None
                     
             except Exception as e:
                 logger.warning(f"Batch {batch_idx} attempt {attempt + 1} failed: {str(e)}")
                 
             # Wait before retry
             if attempt < max_retries:
-                time.sleep(3)
+                time.sleep(self.rate_limiter.backoff_delay(attempt))
         
         return None
 
-    def _create_retranslation_prompt(self, texts: Dict[str, str], language_name: str) -> str:
-        """Create an optimized prompt for high-quality retranslation."""
-        
-        # Create a cleaner JSON structure
-        clean_texts = {}
-        for key, text in texts.items():
-            # Clean the text for better translation
-            clean_text = text.strip()
-            if clean_text:
-                clean_texts[key] = clean_text
-        
-        return f"""Please provide high-quality translations of the following English texts to {language_name}.
+    def _batch_request_kwargs(self, texts: Dict[str, str], language_name: str, target_language: Optional[str] = None) -> Dict:
+        """Build the chat completion arguments for a batch of texts."""
+        examples = self.fuzzy.examples(texts, target_language) if self.fuzzy and target_language else None
+        if examples and self.placeholders:
+            examples = self.placeholders.mask_examples(examples)
+        prompt = self._create_retranslation_prompt(texts, language_name, examples)
 
-IMPORTANT: Return ONLY a JSON object with the exact same keys and translated values.
+        return {
+            "model": self.deployment_name,
+            "messages": [
+                {"role": "system", "content": self.BATCH_SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ],
+            "temperature": 0.2,  # Slightly higher for better quality
+            "max_tokens": self.BATCH_MAX_TOKENS,
+            "timeout": self.transport.timeout(120)
+        }
 
-Input texts:
-{json.dumps(clean_texts, ensure_ascii=False, indent=2)}
+    def _stream_batch(self, texts: Dict[str, str], language_name: str, call=None,
+                      target_language: Optional[str] = None) -> StreamResult:
+        """Send a batch as a streamed request, collecting each translation as soon as it is complete."""
+        request_kwargs = {**self._batch_request_kwargs(texts, language_name, target_language), "stream": True}
+        stream = self.rate_limiter.create(self.client, request_kwargs, call)
+        return consume_stream(stream, texts, call)
 
-Translation Guidelines:
-1. Keep placeholders like {{variable}} unchanged
-2. Maintain the same tone and style as the original
-3. Ensure translations are natural, culturally appropriate, and suitable for a mobile app
-4. Use proper grammar and punctuation for {language_name}
-5. Consider the context of mobile app localization
-6. Return ONLY the JSON object, no explanations
+    def _single_request_kwargs(self, text: str, language_name: str) -> Dict:
+        """Build the chat completion arguments for a single text."""
+        prompt = f"""Please provide a high-quality translation of this text to {language_name}:
+
+"{text}"
+
+Guidelines:
+- Keep placeholders like {{variable}} and tags like <x0/> unchanged
+- Ensure natural, culturally appropriate translation
+- Maintain the app's tone and style
+- Use proper grammar and punctuation
+
+Return only the translation:"""
+
+        return {
+            "model": self.deployment_name,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": 0.3,
+            "max_tokens": 300,
+            "timeout": self.transport.timeout(60)
+        }
 
-JSON response:"""
+    def _clean_single_translation(self, translation: str) -> str:
+        """Strip the quotes the model sometimes wraps single translations in."""
+        translation = translation.strip()
+        if translation.startswith('"') and translation.endswith('"'):
+            translation = translation[1:-1]
+        return translation
 
-    def _parse_json_response(self, response_text: str, original_texts: Dict[str, str]) -> Optional[Dict[str, str]]:
-        """Parse JSON response with multiple fallback strategies."""
+    def _create_retranslation_prompt(self, texts: Dict[str, str], language_name: str,
+                                     examples: Optional[Dict[str, str]] = None) -> str:
+        """Create the user message of a batch: the target language, the texts keyed by short ids and any examples."""
+        prompt = f"Translate to {language_name}:\n{encode_payload(texts)}"
+        if examples:
+            prompt += f"\nExisting translations of similar texts:\n{encode_examples(examples)}"
+        return prompt
+
+    def _parse_json_response(self, response_text: str, original_texts: Dict[str, str], call=None) -> Optional[Dict[str, str]]:
+        """Parse JSON response with multiple fallback strategies.
+
+        The strategy that worked (``direct``, ``extracted``, ``fenced`` or
+        ``invalid``) is noted on ``call`` when a call trace is given.
+        """
+        if call is not None:
+            call.parse = 'invalid'
         
         # Strategy 1: Direct JSON parsing
         try:
-            translations = json.loads(response_text)
+            translations = from_wire(json.loads(response_text), original_texts)
             if self._validate_translations(translations, original_texts):
+                if call is not None:
+                    call.parse = 'direct'
                 return translations
         except json.JSONDecodeError:
             pass
@@ -213,8 +505,10 @@ JSON response:"""
             
             if start_idx != -1 and end_idx > start_idx:
                 json_text = response_text[start_idx:end_idx]
-                translations = json.loads(json_text)
+                translations = from_wire(json.loads(json_text), original_texts)
                 if self._validate_translations(translations, original_texts):
+                    if call is not None:
+                        call.parse = 'extracted'
                     return translations
         except (json.JSONDecodeError, ValueError):
             pass
@@ -228,8 +522,10 @@ JSON response:"""
             if cleaned.endswith('```'):
                 cleaned = cleaned[:-3]
             
-            translations = json.loads(cleaned)
+            translations = from_wire(json.loads(cleaned), original_texts)
             if self._validate_translations(translations, original_texts):
+                if call is not None:
+                    call.parse = 'fenced'
                 return translations
         except (json.JSONDecodeError, ValueError):
             pass
@@ -237,7 +533,7 @@ JSON response:"""
         return None
 
     def _validate_translations(self, translations: Dict[str, str], original_texts: Dict[str, str]) -> bool:
-        """Validate that all required keys are present in translations."""
+        """Validate that all required keys are present in translations with their placeholders intact."""
         if not isinstance(translations, dict):
             return False
         
@@ -245,69 +541,137 @@ JSON response:"""
         for key in original_texts.keys():
             if key not in translations:
                 return False
+            if not is_usable(translations[key], original_texts[key]):
+                return False
         
         return True
 
-    def _retranslate_single(self, text: str, target_language: str, language_name: str) -> str:
+    def _retranslate_single(self, text: str, target_language: str, language_name: str) -> Optional[str]:
         """High-quality single text retranslation."""
         try:
-            prompt = f"""Please provide a high-quality translation of this text to {language_name}:
-
-"{text}"
-
-Guidelines:
-- Keep placeholders like {{variable}} unchanged
-- Ensure natural, culturally appropriate translation
-- Maintain the app's tone and style
-- Use proper grammar and punctuation
-
-Return only the translation:"""
-
-            response = self.client.chat.completions.create(
-                model=self.deployment_name,
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.3,
-                max_tokens=300,
-                timeout=60
-            )
-            
-            translation = response.choices[0].message.content.strip()
+            with self.metrics.call(target_language, 'single') as call:
+                response = self.rate_limiter.create(self.client, self._single_request_kwargs(text, language_name), call)
             
             # Clean up common issues
-            if translation.startswith('"') and translation.endswith('"'):
-                translation = translation[1:-1]
-            
-            return translation
+            return self._clean_single_translation(response.choices[0].message.content)
             
         except Exception as e:
             logger.error(f"Single retranslation failed for '{text}': {str(e)}")
-            return text  # Return original as fallback
+            return None  # The caller keeps the original and records an error
 
     def backup_file(self, file_path: str) -> str:
-        """Create a backup of the original file."""
-        backup_path = f"{file_path}.backup.{int(time.time())}"
-        with open(file_path, 'r', encoding='utf-8') as src:
-            with open(backup_path, 'w', encoding='utf-8') as dst:
-                dst.write(src.read())
-        logger.info(f"Created backup: {backup_path}")
-        return backup_path
+        """Create a backup of the original file and return its content hash."""
+        # Back up the content the corpus read instead of reading the file again
+        raw = self._corpus_for(file_path).raw_bytes(locale_of(file_path))
+        digest = self.backup_store.backup(file_path, raw)
+        logger.info(f"Created backup: {Path(file_path).name} -> {digest[:12]} (run {self.backup_store.run_id})")
+        return digest
+
+    def backup_files(self, file_paths: List[Path]):
+        """Back up several files in one backup run; unchanged content costs no write."""
+        corpus = self.corpus
+        self.backup_store.backup_many({str(path): corpus.raw_bytes(locale_of(path)) for path in file_paths})
+        logger.info(f"Backed up {len(file_paths)} files (run {self.backup_store.run_id})")
+
+    def _prepare_file(self, file_path: str, filters: List[str] = None, create_backup: bool = True) -> Tuple[Dict[str, str], str, Dict[str, str]]:
+        """Load a language file, back it up and select the texts to retranslate."""
+        # Load the file
+        data, language_code = self.load_language_file(file_path)
+        logger.info(f"Processing {language_code} file with {len(data)} entries")
+        
+        # Create backup if requested
+        if create_backup:
+            self.backup_file(file_path)
+        
+        corpus = self._corpus_for(file_path)
+        if self.quality_top and language_code != corpus.base_locale:
+            return data, language_code, self._select_by_quality(corpus, data, language_code, filters)
+        
+        # Filter texts to retranslate
+        texts_to_retranslate = {}
+        for key, value in data.items():
+            if key != "@@locale" and self.should_retranslate(key, value, filters):
+                texts_to_retranslate[key] = value
+        if self.usage:
+            texts_to_retranslate = {key: texts_to_retranslate[key] for key in self.usage.skip_unused(list(texts_to_retranslate))}
+        
+        return data, language_code, texts_to_retranslate
+
+    def _select_by_quality(self, corpus: ArbCorpus, data: Dict[str, str], language_code: str,
+                           filters: List[str] = None) -> Dict[str, str]:
+        """The English text of the ``quality_top`` worst-scoring entries of a file.
+
+        Flagged entries are translated again from English rather than from
+        their current (suspect) value.
+        """
+        if self.quality is None or self.quality.corpus is not corpus:
+            self.quality = QualityScorer(corpus, self.provenance)
+        
+        flagged = [flag for flag in self.quality.flags(language_code) if self.should_retranslate(flag.key, data[flag.key], filters)]
+        if self.usage:
+            used = set(self.usage.skip_unused([flag.key for flag in flagged]))
+            flagged = [flag for flag in flagged if flag.key in used]
+        selected = flagged[:self.quality_top]
+        logger.info(f"🎯 {len(flagged)} flagged entries in {language_code}, retranslating the top {len(selected)}")
+        return {flag.key: corpus.get(corpus.base_locale, flag.key) for flag in selected}
+
+    def _sources(self, texts: Dict[str, str]) -> Dict[str, str]:
+        """The English text of each key, whose placeholders its translation must keep."""
+        return {key: self.corpus.get(self.corpus.base_locale, key, text) for key, text in texts.items()}
+
+    def _mask(self, texts: Dict[str, str], language_code: str) -> Dict[str, str]:
+        """Texts to send, with placeholders as opaque tags when masking is enabled.
+
+        A current value whose placeholders no longer match the English is
+        replaced by the English, so its broken placeholders are not sent again.
+        """
+        if not self.placeholders:
+            return texts
+        sources = self._sources(texts)
+        sent = {}
+        for key, text in texts.items():
+            try:
+                sent[key] = text if check(sources[key], text) is None else sources[key]
+            except PlaceholderError:
+                sent[key] = sources[key]
+        return self.placeholders.mask_texts(sent, language_code)
+
+    def _unmask(self, texts: Dict[str, str], translations: Dict[str, str], language_code: str) -> Dict[str, str]:
+        """Restore placeholders in translations of ``texts`` and drop the ones that broke those of the English."""
+        if not self.placeholders:
+            return translations
+        return self.placeholders.unmask_translations(self._sources(texts), translations, language_code)
+
+    def _apply_translations(self, file_path: str, data: Dict[str, str], new_translations: Dict[str, str]) -> int:
+        """Merge new translations into the loaded data and atomically replace the file."""
+        # Update the data with new translations
+        updated_count = 0
+        for key, translation in new_translations.items():
+            if key in data and data[key] != translation:
+                data[key] = translation
+                updated_count += 1
+        
+        # Write back to file
+        language_code = locale_of(file_path)
+        corpus = self._corpus_for(file_path)
+        corpus.write(language_code, data)
+        if self.checkpoint:
+            self.checkpoint.clear(language_code)
+        if self.provenance and language_code != corpus.base_locale:
+            english = {key: corpus.get(corpus.base_locale, key) for key in new_translations if corpus.has(corpus.base_locale, key)}
+            self.provenance.record(language_code, new_translations, english, self.methods.pop(language_code, {}),
+                                   self.deployment_name, self.PROMPT_VERSION)
+            self.provenance.forget(language_code, [key for key in self.provenance.entries(language_code)
+                                                   if not corpus.has(corpus.base_locale, key)])
+            self.provenance.save()
+        
+        logger.info(f"✅ Updated {file_path} with {updated_count} improved translations")
+        return updated_count
 
     def retranslate_file(self, file_path: str, batch_size: int = 20, filters: List[str] = None, create_backup: bool = True) -> bool:
         """Retranslate an entire language file."""
         try:
-            # Load the file
-            data, language_code = self.load_language_file(file_path)
-            logger.info(f"Processing {language_code} file with {len(data)} entries")
-            
-            # Create backup if requested
-            if create_backup:
-                self.backup_file(file_path)
-            
-            # Filter texts to retranslate
-            texts_to_retranslate = {}
-            for key, value in data.items():
-                if key != "@@locale" and self.should_retranslate(key, value, filters):
-                    texts_to_retranslate[key] = value
+            data, language_code, texts_to_retranslate = self._prepare_file(file_path, filters, create_backup)
             
             if not texts_to_retranslate:
                 logger.info(f"No texts to retranslate for {language_code}")
@@ -316,69 +680,106 @@ Return only the translation:"""
             logger.info(f"Retranslating {len(texts_to_retranslate)} texts for {language_code}")
             
             # Retranslate in batches
-            new_translations = self.retranslate_batch(texts_to_retranslate, language_code, batch_size)
+            new_translations = self.retranslate_batch(self._mask(texts_to_retranslate, language_code), language_code, batch_size)
+            new_translations = self._unmask(texts_to_retranslate, new_translations, language_code)
             
-            # Update the data with new translations
-            updated_count = 0
-            for key, translation in new_translations.items():
-                if key in data and data[key] != translation:
-                    data[key] = translation
-                    updated_count += 1
-            
-            # Write back to file
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent='\t')
-            
-            logger.info(f"✅ Updated {file_path} with {updated_count} improved translations")
+            self._apply_translations(file_path, data, new_translations)
             return True
             
         except Exception as e:
             logger.error(f"Failed to retranslate {file_path}: {str(e)}")
             return False
 
-    def retranslate_language_files(self, l10n_dir: str, languages_to_process: List[str] = None, 
-                                 batch_size: int = 20, filters: List[str] = None, create_backup: bool = True):
-        """Retranslate multiple language files."""
-        l10n_path = Path(l10n_dir)
+    def _retranslate_files_concurrently(self, target_files: List[Path], batch_size: int, filters: List[str],
+                                        create_backup: bool, concurrency: int, per_locale_concurrency: int) -> int:
+        """Retranslate all files at once through the asyncio engine."""
+        jobs = {}
+        prepared = {}
+        success_count = 0
+        for target_file in target_files:
+            try:
+                data, language_code, texts_to_retranslate = self._prepare_file(str(target_file), filters, create_backup)
+            except Exception as e:
+                logger.error(f"Failed to retranslate {target_file}: {str(e)}")
+                continue
+            
+            if not texts_to_retranslate:
+                logger.info(f"No texts to retranslate for {language_code}")
+                success_count += 1
+                continue
+            
+            jobs[language_code] = self._mask(texts_to_retranslate, language_code)
+            prepared[language_code] = (str(target_file), data, texts_to_retranslate)
         
-        # Get all language files
-        all_files = list(l10n_path.glob("intl_*.arb"))
+        written = []
         
-        # If specific languages are requested, include English if it's in the list
-        if languages_to_process and 'en' in languages_to_process:
-            target_files = all_files  # Include all files including English
-        else:
-            target_files = [f for f in all_files if f.name != "intl_en.arb"]  # Exclude English by default
-        
-        # Filter by specified languages with exact matching
-        if languages_to_process:
-            filtered_files = []
-            for f in target_files:
-                # Extract language code from filename (remove 'intl_' prefix and '.arb' suffix)
-                file_lang = f.name.replace('intl_', '').replace('.arb', '')
-                
-                # Check for exact language code match
-                if file_lang in languages_to_process:
-                    filtered_files.append(f)
-                else:
-                    # Also check for language codes that might be part of compound codes
-                    # e.g., 'zh' should match 'zh_CN' and 'zh_TW'
-                    for lang in languages_to_process:
-                        if file_lang.startswith(lang + '_') or file_lang == lang:
-                            filtered_files.append(f)
-                            break
-            
-            target_files = filtered_files
+        def on_locale_done(language_code: str, new_translations: Dict[str, str]):
+            file_path, data, texts = prepared[language_code]
+            try:
+                self._apply_translations(file_path, data, self._unmask(texts, new_translations, language_code))
+                written.append(language_code)
+            except Exception as e:
+                logger.error(f"Failed to retranslate {file_path}: {str(e)}")
+        
+        if jobs:
+            engine = AsyncTranslationEngine(self, max_in_flight=concurrency, per_locale_limit=per_locale_concurrency)
+            engine.translate_all(jobs, batch_size, on_locale_done=on_locale_done)
+        
+        return success_count + len(written)
+
+    def retranslate_language_files(self, l10n_dir: str, languages_to_process: List[str] = None, 
+                                 batch_size: int = 20, filters: List[str] = None, create_backup: bool = True,
+                                 concurrency: int = 0, per_locale_concurrency: int = 4):
+        """Retranslate multiple language files.
+
+        With ``concurrency`` > 0 all files are retranslated at once through the
+        asyncio engine instead of one file and one batch at a time.
+        """
+        # Read every language file once
+        corpus = self._corpus_for(str(Path(l10n_dir) / "intl_en.arb"), reload=True)
+        
+        # English is only included when it is requested explicitly; 'zh' also
+        # matches compound codes such as 'zh_CN' and 'zh_TW'
+        target_files = sorted(corpus.paths[language_code] for language_code in corpus.select(languages_to_process))
         
         logger.info(f"Found {len(target_files)} language files to retranslate")
         
-        success_count = 0
-        for target_file in target_files:
-            logger.info(f"Processing {target_file.name}")
-            if self.retranslate_file(str(target_file), batch_size, filters, create_backup):
-                success_count += 1
+        # One backup run for the whole set, taken before anything is modified
+        if create_backup and target_files:
+            self.backup_store.start_run(label=f"retranslate {' '.join(languages_to_process or ['all'])}")
+            self.backup_files(target_files)
+            create_backup = False
+        
+        if concurrency > 0:
+            success_count = self._retranslate_files_concurrently(target_files, batch_size, filters, create_backup,
+                                                                 concurrency, per_locale_concurrency)
+        else:
+            success_count = 0
+            for target_file in target_files:
+                logger.info(f"Processing {target_file.name}")
+                if self.retranslate_file(str(target_file), batch_size, filters, create_backup):
+                    success_count += 1
         
         logger.info(f"✅ Retranslation complete: {success_count}/{len(target_files)} files processed successfully")
+        
+        self.recovery_stats.log_summary()
+        self.rate_limiter.log_summary()
+        self.metrics.log_summary()
+        self.transport.log_summary()
+        self.backup_store.log_summary()
+        if self.placeholders:
+            self.placeholders.log_summary()
+        if self.quality:
+            self.quality.log_summary(self.quality_top)
+        if self.provenance:
+            self.provenance.log_summary()
+        if self.usage:
+            self.usage.log_summary()
+        if self.fuzzy:
+            self.fuzzy.log_summary()
+        
+        if self.translation_memory:
+            self.translation_memory.log_summary()
 
 def main():
     parser = argparse.ArgumentParser(description='Retranslate existing language files with high-quality LLM translations')
@@ -387,17 +788,94 @@ def main():
     parser.add_argument('--batch-size', type=int, default=20, help='Batch size (default: 20)')
     parser.add_argument('--filters', nargs='+', help='Only retranslate keys containing these strings')
     parser.add_argument('--no-backup', action='store_true', help='Skip creating backup files')
+    parser.add_argument('--backup-dir', default=str(DEFAULT_BACKUP_DIR),
+                        help='Content-addressed backup store (default: .l10n_state/backups)')
     parser.add_argument('--azure-endpoint', help='Azure OpenAI endpoint')
     parser.add_argument('--api-key', help='Azure OpenAI API key')
     parser.add_argument('--deployment-name', help='Azure OpenAI deployment name')
+    parser.add_argument('--concurrency', type=int, default=0,
+                        help='Maximum API calls in flight across all languages (default: 0, serial)')
+    parser.add_argument('--per-locale-concurrency', type=int, default=4,
+                        help='Maximum API calls in flight per language when --concurrency is set (default: 4)')
+    parser.add_argument('--cache-db', default=str(DEFAULT_CACHE_PATH),
+                        help='Translation memory database (default: .l10n_state/translation_memory.sqlite3)')
+    parser.add_argument('--cache-max-entries', type=int, default=DEFAULT_MAX_ENTRIES,
+                        help=f'Maximum translation memory entries before LRU eviction (default: {DEFAULT_MAX_ENTRIES})')
+    parser.add_argument('--no-cache', action='store_true', help='Do not read or write the translation memory')
+    parser.add_argument('--checkpoint-dir', default=str(DEFAULT_CHECKPOINT_DIR / 'retranslate_existing'),
+                        help='Journal of completed batches used to resume an interrupted run '
+                             '(default: .l10n_state/checkpoints/retranslate_existing)')
+    parser.add_argument('--no-checkpoint', action='store_true', help='Do not journal batches or resume interrupted runs')
+    parser.add_argument('--tpm', type=int, default=int(os.getenv('AZURE_OPENAI_TPM', 0)),
+                        help='Deployment tokens-per-minute quota to pace calls to (default: $AZURE_OPENAI_TPM or unlimited)')
+    parser.add_argument('--rpm', type=int, default=int(os.getenv('AZURE_OPENAI_RPM', 0)),
+                        help='Deployment requests-per-minute quota (default: $AZURE_OPENAI_RPM, or 6 per 1000 TPM)')
+    parser.add_argument('--adaptive-batching', action='store_true',
+                        help='Pack batches by estimated tokens and shrink/grow them on truncated or invalid responses; '
+                             '--batch-size becomes the maximum keys per batch')
+    parser.add_argument('--quality-top', type=int, default=0,
+                        help='Retranslate only the N entries per language that score worst on local quality checks '
+                             '(identical to English, wrong script, broken placeholders, length outliers, fallback output), '
+                             'from their English text; --filters narrows the candidates (default: 0, off)')
+    parser.add_argument('--provenance-dir', default=str(DEFAULT_PROVENANCE_DIR),
+                        help='Per-language record of how each translation was produced (default: .l10n_state/provenance)')
+    parser.add_argument('--skip-unused', action='store_true',
+                        help='Leave out keys that no Dart file of the app uses, according to the usage index '
+                             'of dart_usage.py')
+    parser.add_argument('--fuzzy', action='store_true',
+                        help='Send the nearest existing translations, by character n-gram similarity of the English, '
+                             'as examples with each batch')
+    parser.add_argument('--fuzzy-hint', type=float, default=DEFAULT_HINT_THRESHOLD,
+                        help=f'With --fuzzy: similarity from which a match is sent as an example (default: {DEFAULT_HINT_THRESHOLD})')
+    parser.add_argument('--no-mask-placeholders', action='store_true',
+                        help='Send {placeholders} and ICU plural/select syntax as they are instead of as opaque tags')
+    parser.add_argument('--stream', action='store_true',
+                        help='Stream batch responses, keeping each key as soon as it arrives and the keys '
+                             'received before a truncated or timed-out response ends')
+    parser.add_argument('--max-connections', type=int, default=0,
+                        help='Connection pool size; every connection is kept alive between calls. '
+                             'Setting it also sends --concurrency calls through this pool instead of '
+                             "the SDK's own client (default: --concurrency, at least 32)")
+    parser.add_argument('--http2', action='store_true',
+                        help='Multiplex requests over HTTP/2 connections (needs: pip install "httpx[http2]")')
+    parser.add_argument('--connect-timeout', type=float, default=DEFAULT_CONNECT_TIMEOUT,
+                        help=f'Seconds allowed to open a connection (default: {DEFAULT_CONNECT_TIMEOUT:.0f})')
+    parser.add_argument('--read-timeout', type=float, default=0,
+                        help='Seconds to wait for a response, for every kind of request '
+                             '(default: 120 per batch, 60 per single text)')
+    parser.add_argument('--metrics-trace', help='Append one JSON line per API call to this file')
+    parser.add_argument('--metrics-prom', help='Write per-locale call, token and time totals as a Prometheus textfile')
+    parser.add_argument('--input-cost', type=float, default=float(os.getenv('AZURE_OPENAI_INPUT_COST', 0)),
+                        help='Price per 1K prompt tokens for the cost column (default: $AZURE_OPENAI_INPUT_COST or 0)')
+    parser.add_argument('--output-cost', type=float, default=float(os.getenv('AZURE_OPENAI_OUTPUT_COST', 0)),
+                        help='Price per 1K completion tokens (default: $AZURE_OPENAI_OUTPUT_COST or 0)')
     
     args = parser.parse_args()
     
     try:
+        translation_memory = None if args.no_cache else TranslationMemory(args.cache_db, args.cache_max_entries)
+        
+        metrics = CallMetrics(args.metrics_trace, args.input_cost, args.output_cost)
+        
         retranslator = Retranslator(
             azure_endpoint=args.azure_endpoint,
             api_key=args.api_key,
-            deployment_name=args.deployment_name
+            deployment_name=args.deployment_name,
+            translation_memory=translation_memory,
+            adaptive_batching=args.adaptive_batching,
+            rate_limiter=RateLimiter.from_quota(args.tpm, args.rpm),
+            checkpoint_dir=None if args.no_checkpoint else args.checkpoint_dir,
+            backup_store=BackupStore(args.backup_dir),
+            metrics=metrics,
+            stream=args.stream,
+            placeholders=None if args.no_mask_placeholders else PlaceholderMasker(),
+            provenance=ProvenanceStore(args.provenance_dir),
+            quality_top=args.quality_top,
+            usage=UsageIndex.build() if args.skip_unused else None,
+            fuzzy=FuzzyMemory.from_corpus(ArbCorpus.load(args.l10n_dir), hint_threshold=args.fuzzy_hint) if args.fuzzy else None,
+            transport=HttpTransport.for_concurrency(args.concurrency, args.max_connections, http2=args.http2,
+                                                    connect_timeout=args.connect_timeout,
+                                                    read_timeout=args.read_timeout or None)
         )
         
         retranslator.retranslate_language_files(
@@ -405,9 +883,16 @@ def main():
             args.languages, 
             args.batch_size, 
             args.filters, 
-            not args.no_backup
+            not args.no_backup,
+            args.concurrency,
+            args.per_locale_concurrency
         )
         
+        if args.metrics_prom:
+            metrics.write_prometheus(args.metrics_prom)
+        metrics.close()
+        retranslator.transport.close()
+        
     except Exception as e:
         logger.error(f"Script failed: {str(e)}")
 
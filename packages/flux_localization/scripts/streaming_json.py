@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Incremental parsing of streamed batch responses into translations as each key arrives
+"""
+
+import json
+import logging
+import time
+from typing import Dict, List, Optional, Tuple
+
+from batch_recovery import is_usable, salvage_translations
+from batching import estimate_tokens
+from wire_format import wire_ids
+
+logger = logging.getLogger(__name__)
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = ' \t\r\n'
+# Characters a number can still continue with once a prefix of it decodes ("12" of "12.5")
+_NUMBER_TAIL = frozenset('0123456789.eE+-')
+# Chunks still read after the last expected key; a response that goes on longer is cut off
+DRAIN_CHUNKS = 8
+
+class IncrementalObjectParser:
+    """Pull complete top-level ``"key": value`` pairs out of a JSON object as its text arrives.
+
+    Anything before the opening brace (a markdown fence, a sentence) is
+    skipped. A pair is only emitted once its value is complete, so a response
+    cut off mid-value loses that value alone. Text that stops being valid JSON
+    marks the parser ``broken``; the pairs emitted up to then stand.
+    """
+
+    def __init__(self):
+        self._buffer = ''
+        self._pos = 0
+        self._started = False
+        self.done = False
+        self.broken = False
+
+    def feed(self, chunk: str) -> List[Tuple[str, object]]:
+        """Add a piece of text and return the pairs it completed."""
+        if self.done or self.broken:
+            return []
+
+        # Drop what is already consumed so the buffer stays small
+        self._buffer = self._buffer[self._pos:] + chunk
+        self._pos = 0
+        pairs = []
+
+        if not self._started:
+            start = self._buffer.find('{')
+            if start == -1:
+                self._pos = len(self._buffer)
+                return pairs
+            self._pos = start + 1
+            self._started = True
+
+        while True:
+            pos = self._skip(self._pos, ',')
+            if pos >= len(self._buffer):
+                return pairs
+            if self._buffer[pos] == '}':
+                self.done = True
+                return pairs
+            if self._buffer[pos] != '"':
+                self.broken = True
+                return pairs
+
+            pair = self._read_pair(pos)
+            if pair is None:
+                # Incomplete (or broken, which looks the same until more text arrives)
+                return pairs
+            key, value, end = pair
+            pairs.append((key, value))
+            self._pos = end
+
+    def _skip(self, pos: int, extra: str = '') -> int:
+        while pos < len(self._buffer) and self._buffer[pos] in _WHITESPACE + extra:
+            pos += 1
+        return pos
+
+    def _read_pair(self, pos: int) -> Optional[Tuple[str, object, int]]:
+        try:
+            key, pos = _decoder.raw_decode(self._buffer, pos)
+        except json.JSONDecodeError:
+            return None
+
+        pos = self._skip(pos)
+        if pos >= len(self._buffer):
+            return None
+        if self._buffer[pos] != ':':
+            self.broken = True
+            return None
+
+        pos = self._skip(pos + 1)
+        if pos >= len(self._buffer):
+            return None
+        try:
+            value, end = _decoder.raw_decode(self._buffer, pos)
+        except json.JSONDecodeError:
+            return None
+
+        # A number or literal may continue in the next chunk; strings,
+        # objects and arrays end with their own delimiter
+        after = self._skip(end)
+        if self._buffer[pos] not in '"{[' and (after >= len(self._buffer)
+                                               or all(ch in _NUMBER_TAIL for ch in self._buffer[end:])):
+            return None
+        if after < len(self._buffer) and self._buffer[after] not in ',}':
+            self.broken = True
+            return None
+        return key, value, end
+
+class StreamResult:
+    """The translations received from one streamed batch and how the stream ended."""
+
+    def __init__(self, expected: Dict[str, str], started: Optional[float] = None):
+        self.expected = expected
+        # Responses name the keys by their short ids (see wire_format.py)
+        self._ids = wire_ids(expected)
+        self.translations: Dict[str, str] = {}
+        self.finish_reason: Optional[str] = None
+        self.first_result: Optional[float] = None
+        self.stopped_early = False
+        self.error: Optional[Exception] = None
+        self._parts: List[str] = []
+        # Time to first result counts from the start of the call when there is a trace
+        self._started = started if started is not None else time.perf_counter()
+
+    @property
+    def text(self) -> str:
+        return ''.join(self._parts).strip()
+
+    @property
+    def complete(self) -> bool:
+        return len(self.translations) == len(self.expected)
+
+    def ordered(self) -> Dict[str, str]:
+        """The translations in the order of the request."""
+        return {key: self.translations[key] for key in self.expected if key in self.translations}
+
+    def _accept(self, key: str, value):
+        if key not in self.expected:
+            key = self._ids.get(key, key)
+        if key in self.expected and is_usable(value, self.expected[key]):
+            if self.first_result is None:
+                self.first_result = time.perf_counter() - self._started
+            self.translations[key] = value
+
+    def _finish(self, parser: IncrementalObjectParser, call):
+        if not self.complete and (parser.broken or not parser.done):
+            # Pairs after a break in the JSON can still be read one by one
+            for key, value in salvage_translations(self.text, self.expected).items():
+                self.translations.setdefault(key, value)
+
+        if call is not None:
+            call.finish_reason = self.finish_reason
+            call.completion_tokens = estimate_tokens(self.text)
+            call.first_result = self.first_result
+            call.parse = 'streamed' if self.complete else ('partial' if self.translations else 'invalid')
+
+        if self.error is not None and not self.translations:
+            # Nothing worth keeping: let the caller handle it as a failed call
+            raise self.error
+
+def _delta(chunk) -> Tuple[str, Optional[str]]:
+    """Content and finish reason of a chat completion chunk (Azure sends some chunks without choices)."""
+    if not chunk.choices:
+        return '', None
+    choice = chunk.choices[0]
+    return (choice.delta.content or '') if choice.delta else '', choice.finish_reason
+
+def consume_stream(stream, expected: Dict[str, str], call=None) -> StreamResult:
+    """Read a streamed batch response, stopping as soon as every expected key has arrived.
+
+    A stream that breaks off (timeout, dropped connection, ``max_tokens``)
+    keeps the pairs received before the break.
+    """
+    result = StreamResult(expected, call.started if call is not None else None)
+    parser = IncrementalObjectParser()
+    drained = 0
+    try:
+        for chunk in stream:
+            if result.complete:
+                # Read the few chunks left (closing brace, finish reason, [DONE]) so the
+                # connection goes back to the pool instead of being dropped
+                drained += 1
+                if drained > DRAIN_CHUNKS:
+                    break
+                continue
+            content, finish_reason = _delta(chunk)
+            if finish_reason:
+                result.finish_reason = finish_reason
+            if not content:
+                continue
+            result._parts.append(content)
+            for key, value in parser.feed(content):
+                result._accept(key, value)
+            if result.complete:
+                result.stopped_early = not parser.done
+    except Exception as e:
+        logger.warning(f"Stream ended early after {len(result.translations)}/{len(expected)} keys: {str(e)}")
+        result.error = e
+    finally:
+        stream.close()
+
+    result._finish(parser, call)
+    return result
+
+async def consume_stream_async(stream, expected: Dict[str, str], call=None) -> StreamResult:
+    """Asyncio version of ``consume_stream``."""
+    result = StreamResult(expected, call.started if call is not None else None)
+    parser = IncrementalObjectParser()
+    drained = 0
+    try:
+        async for chunk in stream:
+            if result.complete:
+                # Read the few chunks left (closing brace, finish reason, [DONE]) so the
+                # connection goes back to the pool instead of being dropped
+                drained += 1
+                if drained > DRAIN_CHUNKS:
+                    break
+                continue
+            content, finish_reason = _delta(chunk)
+            if finish_reason:
+                result.finish_reason = finish_reason
+            if not content:
+                continue
+            result._parts.append(content)
+            for key, value in parser.feed(content):
+                result._accept(key, value)
+            if result.complete:
+                result.stopped_early = not parser.done
+    except Exception as e:
+        logger.warning(f"Stream ended early after {len(result.translations)}/{len(expected)} keys: {str(e)}")
+        result.error = e
+    finally:
+        await stream.close()
+
+    result._finish(parser, call)
+    return result
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Per-locale manifest of the English source each translation was synced from
+"""
+
+import hashlib
+import json
+import logging
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+from arb_io import atomic_write_text
+from translation_memory import STATE_DIR
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MANIFEST_PATH = STATE_DIR / 'sync_manifest.json'
+
+def source_hash(text: str) -> str:
+    """Short content hash of an English value."""
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=8).hexdigest()
+
+class SyncManifest:
+    """Track, for every locale, the hash of the English value each key was translated from.
+
+    Comparing those hashes against the current ``intl_en.arb`` finds keys whose
+    English text was edited after the locale was last synced, which the
+    missing-key scan alone cannot see.
+    """
+
+    def __init__(self, path: str = None):
+        self.path = Path(path) if path else DEFAULT_MANIFEST_PATH
+        self.locales: Dict[str, Dict[str, str]] = {}
+
+        if self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.locales = json.load(f).get('locales', {})
+
+    @staticmethod
+    def hash_source(base_data: Dict[str, str]) -> Dict[str, str]:
+        """Hash every translatable value of the English base file."""
+        return {key: source_hash(value) for key, value in base_data.items()
+                if key != '@@locale' and isinstance(value, str)}
+
+    def changed_keys(self, locale: str, base_hashes: Dict[str, str], target_keys: Iterable[str]) -> List[str]:
+        """Keys present in the locale whose English value changed since the last sync, in base order."""
+        synced = self.locales.get(locale)
+        if synced is None:
+            return []
+
+        target_keys = set(target_keys)
+        return [key for key, digest in base_hashes.items()
+                if key in target_keys and key in synced and synced[key] != digest]
+
+    def mark_synced(self, locale: str, base_hashes: Dict[str, str], target_keys: Iterable[str],
+                    translated_keys: Iterable[str] = ()):
+        """Record the English hashes the locale is now in sync with.
+
+        Freshly translated keys take the current hash. Other keys present in
+        the locale only take it when the manifest has no record of them yet,
+        so a stale key stays detectable until it is actually retranslated.
+        """
+        synced = self.locales.setdefault(locale, {})
+        for key in translated_keys:
+            if key in base_hashes:
+                synced[key] = base_hashes[key]
+        for key in target_keys:
+            if key in base_hashes and key not in synced:
+                synced[key] = base_hashes[key]
+
+        # Forget keys that were removed from the English file
+        for key in [key for key in synced if key not in base_hashes]:
+            del synced[key]
+
+    def has_locale(self, locale: str) -> bool:
+        return locale in self.locales
+
+    def save(self):
+        """Write the manifest through a temporary file so it is never left half written."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write_text(self.path, json.dumps({'version': 1, 'locales': self.locales},
+                                                ensure_ascii=False, sort_keys=True, indent=1))
+        logger.info(f"Saved sync manifest: {self.path}")
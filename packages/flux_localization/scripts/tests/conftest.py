@@ -0,0 +1,8 @@
+"""
+Make the script modules importable from the tests, whichever directory pytest runs from
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,119 @@
+"""
+Salvaging failed batch responses and bisecting what is left
+"""
+
+import asyncio
+
+from batch_recovery import (RecoveryStats, bisect_recover, bisect_recover_async, is_usable, keep_best,
+                            salvage_translations)
+
+TEXTS = {'a': 'Apple', 'b': 'Banana', 'c': 'Cherry <x0/>', 'd': 'Date'}
+
+def fake_translate(text):
+    return f'fr:{text}'
+
+def test_salvage_keeps_complete_pairs_before_a_cut():
+    response = '```json\n{"1":"fr:Apple","2":"fr:Banana","3":"fr:Cher'
+    assert salvage_translations(response, TEXTS) == {'a': 'fr:Apple', 'b': 'fr:Banana'}
+
+def test_salvage_keeps_the_keys_of_a_parsed_but_incomplete_response():
+    response = 'Here you go: {"a": "fr:Apple", "4": "fr:Date", "zz": "?"}'
+    assert salvage_translations(response, TEXTS) == {'a': 'fr:Apple', 'd': 'fr:Date'}
+
+def test_salvage_drops_values_that_lose_a_tag_or_are_blank():
+    response = '{"1": "  ", "2": "fr:Banana", "3": "fr:Cherry"}'
+    assert salvage_translations(response, TEXTS) == {'b': 'fr:Banana'}
+
+def test_is_usable():
+    assert is_usable('fr:Cherry <x0/>', 'Cherry <x0/>')
+    assert not is_usable('fr:Cherry', 'Cherry <x0/>')
+    assert not is_usable(' ', 'Apple')
+    assert is_usable('', '  ')
+    assert not is_usable(['x'], 'Apple')
+
+class FakeApi:
+    """Batch calls fail whenever they contain the poison key; single calls fail for ``fail_single``."""
+
+    def __init__(self, poison='c', fail_single=None):
+        self.poison = poison
+        self.fail_single = fail_single
+        self.batches = []
+        self.singles = []
+        self.notes = []
+
+    def batch(self, pending):
+        self.batches.append(list(pending))
+        if self.poison in pending:
+            return {}
+        return {key: fake_translate(text) for key, text in pending.items()}
+
+    def single(self, text):
+        self.singles.append(text)
+        return None if text == self.fail_single else fake_translate(text)
+
+    def note(self, key, method):
+        self.notes.append((key, method))
+
+def test_bisect_isolates_a_poison_key():
+    api = FakeApi(poison='c', fail_single='Cherry <x0/>')
+    stats = RecoveryStats()
+    result = bisect_recover(TEXTS, {}, api.batch, api.single, stats, api.note)
+
+    # The failed batch is not re-sent as a whole: halves first, then the poisoned half one key at a time
+    assert api.batches == [['a', 'b'], ['c', 'd']]
+    assert api.singles == ['Cherry <x0/>', 'Date']
+    assert result == {'a': 'fr:Apple', 'b': 'fr:Banana', 'c': 'Cherry <x0/>', 'd': 'fr:Date'}
+    assert list(result) == list(TEXTS)
+    assert api.notes == [('c', 'error'), ('d', 'single')]
+    assert (stats.batch_calls, stats.single_calls, stats.failed_keys) == (2, 2, 4)
+    assert stats.calls_saved == 0
+
+def test_bisect_does_not_re_request_salvaged_keys():
+    api = FakeApi(poison=None)
+    stats = RecoveryStats()
+    result = bisect_recover(TEXTS, {'a': 'salvaged', 'x': 'not in batch'}, api.batch, api.single, stats)
+
+    assert api.batches == [['b', 'c', 'd']]
+    assert not api.singles
+    assert result['a'] == 'salvaged' and 'x' not in result
+    assert (stats.salvaged_keys, stats.calls_saved) == (1, 3)
+
+def test_bisect_resends_only_the_keys_a_partial_answer_missed():
+    calls = []
+
+    def batch(pending):
+        calls.append(list(pending))
+        # Every answer drops its last key
+        return {key: fake_translate(text) for key, text in list(pending.items())[:-1]}
+
+    singles = []
+
+    def single(text):
+        singles.append(text)
+        return fake_translate(text)
+
+    result = bisect_recover(TEXTS, {'a': 'salvaged'}, batch, single, RecoveryStats())
+    assert calls == [['b', 'c', 'd']]
+    assert singles == ['Date']
+    assert result == {'a': 'salvaged', 'b': 'fr:Banana', 'c': 'fr:Cherry <x0/>', 'd': 'fr:Date'}
+
+def test_bisect_async_matches_the_sync_version():
+    api = FakeApi(poison='c', fail_single='Cherry <x0/>')
+    sync_result = bisect_recover(TEXTS, {}, api.batch, api.single, RecoveryStats())
+
+    async def batch(pending):
+        return api.batch(pending)
+
+    async def single(text):
+        return api.single(text)
+
+    stats = RecoveryStats()
+    assert asyncio.run(bisect_recover_async(TEXTS, {}, batch, single, stats)) == sync_result
+    assert (stats.batch_calls, stats.single_calls) == (2, 2)
+
+def test_keep_best_keeps_the_larger_partial_answer():
+    salvage = {'a': '1'}
+    keep_best(salvage, {'b': '2', 'c': '3'})
+    assert salvage == {'b': '2', 'c': '3'}
+    keep_best(salvage, {'d': '4'})
+    assert salvage == {'b': '2', 'c': '3'}
@@ -0,0 +1,38 @@
+"""
+Resuming interrupted runs from the per-locale checkpoint journal
+"""
+
+from checkpoint import CheckpointJournal
+
+TEXTS = {'a': 'Apple', 'b': 'Banana', 'c': 'Cherry'}
+
+def test_resume_reuses_batches_of_unchanged_sources(tmp_path):
+    journal = CheckpointJournal(str(tmp_path), 'run-1')
+    journal.record('fr', {'a': 'Apple', 'b': 'Banana'}, {'a': 'Pomme', 'b': None})
+    journal.close()
+    # A batch cut off by the crash
+    with open(tmp_path / 'fr.jsonl', 'a', encoding='utf-8') as f:
+        f.write('{"batch": {"c": ["')
+
+    journal = CheckpointJournal(str(tmp_path), 'run-1')
+    done, pending = journal.resume('fr', TEXTS)
+    assert done == {'a': 'Pomme'} and pending == {'b': 'Banana', 'c': 'Cherry'}
+    assert journal.resumed == 1
+
+    # A journaled translation of an English text that changed since is not reused
+    assert journal.resume('fr', {'a': 'Green apple'}) == ({}, {'a': 'Green apple'})
+
+def test_a_journal_of_another_run_is_discarded(tmp_path):
+    journal = CheckpointJournal(str(tmp_path), 'run-1')
+    journal.record('fr', TEXTS, {'a': 'Pomme'})
+    journal.close()
+
+    other = CheckpointJournal(str(tmp_path), 'run-2')
+    assert other.resume('fr', TEXTS) == ({}, TEXTS)
+    assert not (tmp_path / 'fr.jsonl').exists()
+
+def test_clear_forgets_a_written_locale(tmp_path):
+    journal = CheckpointJournal(str(tmp_path), 'run-1')
+    journal.record('fr', TEXTS, {'a': 'Pomme'})
+    journal.clear('fr')
+    assert journal.resume('fr', TEXTS) == ({}, TEXTS)
@@ -0,0 +1,67 @@
+"""
+Dart message generation: intl_utils output byte for byte, and regeneration of changed locales only
+"""
+
+import json
+import shutil
+
+import pytest
+
+from arb_corpus import DEFAULT_L10N_DIR
+from dart_usage import DEFAULT_GENERATED_DIR
+from generate_messages import MessageGenerator, UnsupportedMessage, arguments, message_literal
+
+def test_arguments_in_order_of_first_appearance():
+    assert arguments('{b} and {a}, then {b} again') == ['b', 'a']
+    with pytest.raises(UnsupportedMessage):
+        arguments('{count, plural, one{# item} other{# items}}')
+
+def test_message_literal_escapes_and_interpolates():
+    assert message_literal('Say "hi" to {name}\n', ['name']) == '"Say \\"hi\\" to ${name}\\n"'
+    # Arguments match case-insensitively and with spaces, like intl_utils
+    assert message_literal('{ Name } paid {total}', ['name']) == '"${name} paid {total}"'
+
+@pytest.fixture(scope='module')
+def generated(tmp_path_factory):
+    if not DEFAULT_L10N_DIR.is_dir() or not DEFAULT_GENERATED_DIR.is_dir():
+        pytest.skip('no ARB files or generated Dart files next to the scripts')
+    root = tmp_path_factory.mktemp('generate')
+    l10n_dir = root / 'l10n'
+    shutil.copytree(DEFAULT_L10N_DIR, l10n_dir)
+    generator = MessageGenerator(l10n_dir=str(l10n_dir), generated_dir=str(root / 'generated'),
+                                 state_path=str(root / 'state.json'), workers=1)
+    written = generator.generate()
+    return root, written
+
+def committed_files():
+    return sorted(path.relative_to(DEFAULT_GENERATED_DIR) for path in
+                  [DEFAULT_GENERATED_DIR / 'l10n.dart', *(DEFAULT_GENERATED_DIR / 'intl').glob('messages_*.dart')])
+
+def test_output_matches_the_committed_files_byte_for_byte(generated):
+    root, written = generated
+    assert 'l10n' in written and 'messages_all' in written
+    files = committed_files()
+    assert len(files) == len(written)
+    for relative in files:
+        assert (root / 'generated' / relative).read_bytes() == (DEFAULT_GENERATED_DIR / relative).read_bytes(), relative
+
+def test_only_changed_locales_are_regenerated(generated):
+    root, _ = generated
+
+    def generator():
+        return MessageGenerator(l10n_dir=str(root / 'l10n'), generated_dir=str(root / 'generated'),
+                                state_path=str(root / 'state.json'), workers=1)
+
+    assert generator().generate() == []
+
+    path = root / 'l10n' / 'intl_fr.arb'
+    data = json.loads(path.read_text(encoding='utf-8'))
+    key = next(key for key in data if not key.startswith('@'))
+    data[key] = data[key] + ' (modifié)'
+    path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding='utf-8')
+    assert generator().generate() == ['fr']
+    assert '(modifié)' in (root / 'generated' / 'intl' / 'messages_fr.dart').read_text(encoding='utf-8')
+
+    # A hand edit of a generated file is overwritten on the next run
+    (root / 'generated' / 'intl' / 'messages_de.dart').write_text('// edited\n', encoding='utf-8')
+    assert generator().generate() == ['de']
@@ -0,0 +1,106 @@
+"""
+Placeholder masking round trips and the ICU structure check
+"""
+
+import pytest
+
+from arb_corpus import DEFAULT_L10N_DIR, ArbCorpus
+from placeholders import (PlaceholderError, PlaceholderMasker, check, mask, mask_example, parse, tags_match,
+                          unmask)
+
+ICU_MESSAGES = [
+    'Hello {name}!',
+    'Sent on {date, date, short} by {user}',
+    '{count, plural, =0{No items} =1{One item} other{# items}}',
+    'You have {count, plural, offset:1 one{# new message from {sender}} other{# new messages}}',
+    '{gender, select, male{He} female{She} other{They}} liked {count, plural, one{your post} other{# posts}}',
+    '{rank, selectordinal, one{#st} two{#nd} few{#rd} other{#th}} place',
+    "Search for '{keyword}'",
+    'No placeholders at all',
+    '',
+]
+
+@pytest.mark.parametrize('text', ICU_MESSAGES)
+def test_mask_unmask_round_trip(text):
+    masked, table = mask(text)
+    assert '{' not in masked and '}' not in masked
+    assert unmask(masked, table) == text
+
+def test_mask_tags_plural_branches_so_their_text_stays_translatable():
+    masked, table = mask('{count, plural, one{# item} other{# items}}')
+    assert masked == '<x0><x1><x2/> item</x1><x3><x4/> items</x3></x0>'
+    assert table == [('{count, plural, ', '}'), ('one{', '}'), '#', (' other{', '}'), '#']
+
+@pytest.fixture(scope='module')
+def corpus():
+    if not DEFAULT_L10N_DIR.is_dir():
+        pytest.skip('no ARB files next to the scripts')
+    return ArbCorpus.load(str(DEFAULT_L10N_DIR), workers=1)
+
+def test_every_corpus_value_round_trips(corpus):
+    checked = 0
+    for locale in corpus.locales:
+        for value in corpus.data(locale).values():
+            if '{' in value:
+                masked, table = mask(value)
+                assert unmask(masked, table) == value, (locale, value)
+                checked += 1
+    assert checked
+
+def test_check_accepts_reordered_and_translated_choices():
+    source = '{count, plural, one{# item} other{# items}} for {name}'
+    assert check(source, '{name}: {count, plural, one{# article} few{# articles} other{# articles}}') is None
+
+def test_check_reports_broken_placeholders():
+    assert 'missing' in check('Hello {name}', 'Bonjour {nom}')
+    assert 'invalid ICU syntax' in check('Hello {name}', 'Bonjour {name')
+    assert check('{n, plural, other{# items}}', '{n, plural, one{# article}}') == 'plural/select structure differs'
+    assert check('{g, select, male{He} other{They}}', '{g, select, other{Ils}}') == 'plural/select structure differs'
+
+def test_parse_rejects_unbalanced_braces():
+    with pytest.raises(PlaceholderError):
+        parse('Hello {name')
+    with pytest.raises(PlaceholderError):
+        parse('Hello name}')
+
+def test_unmask_rejects_unknown_and_misused_tags():
+    masked, table = mask('{count, plural, other{# items}} for {name}')
+    with pytest.raises(PlaceholderError, match='Unknown tag'):
+        unmask(masked + '<x9/>', table)
+    with pytest.raises(PlaceholderError, match='self-closing'):
+        unmask('<x0/>', table)
+    with pytest.raises(PlaceholderError, match='open/close'):
+        unmask(masked.replace(f'<x{len(table) - 1}/>', f'<x{len(table) - 1}>'), table)
+
+def test_tags_match_ignores_order():
+    assert tags_match('<x0/> and <x1/>', '<x1/> et <x0/>')
+    assert not tags_match('<x0/> and <x1/>', '<x0/> et')
+    assert tags_match('plain', 'simple')
+
+def test_mask_example_uses_the_tags_of_the_english():
+    assert mask_example('Hello {name}, {name}!', 'Salut {name} !') == ('Hello <x0/>, <x1/>!', 'Salut <x0/> !')
+    assert mask_example('Plain', 'Simple') == ('Plain', 'Simple')
+    assert mask_example('Plain', 'Simple {x}') is None
+    assert mask_example('Hi {name}', 'Salut {nom}') is None
+    assert mask_example('{n, plural, other{# items}}', '{n, plural, other{# articles}}') is None
+
+def test_masker_restores_good_translations_and_drops_broken_ones():
+    texts = {'greet': 'Hello {name}', 'count': '{n, plural, one{# item} other{# items}}', 'plain': 'Bye'}
+    masker = PlaceholderMasker()
+    masked = masker.mask_texts(texts, 'fr')
+    assert masked['greet'] == 'Hello <x0/>' and masked['plain'] == 'Bye'
+    assert masker.masked_keys == 2
+
+    translations = {
+        'greet': 'Bonjour <x0/>',
+        'count': '<x0><x1><x2/> article</x1></x0>',
+        'plain': 'Au revoir',
+    }
+    restored = masker.unmask_translations(texts, translations, 'fr')
+    assert restored == {'greet': 'Bonjour {name}', 'plain': 'Au revoir'}
+    assert [(locale, key) for locale, key, _ in masker.rejected] == [('fr', 'count')]
+
+def test_masker_sends_invalid_english_unmasked():
+    masker = PlaceholderMasker()
+    assert masker.mask_texts({'bad': 'Hello {name'}, 'fr') == {'bad': 'Hello {name'}
+    assert masker.masked_keys == 0
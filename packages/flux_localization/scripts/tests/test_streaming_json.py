@@ -0,0 +1,108 @@
+"""
+Incremental JSON parsing of streamed batch responses
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from streaming_json import DRAIN_CHUNKS, IncrementalObjectParser, consume_stream
+
+EXPECTED = {'hello': 'Hello', 'bye': 'Goodbye', 'count': 'You have <x0/> items'}
+
+def feed_all(parser, text, size):
+    pairs = []
+    for start in range(0, len(text), size):
+        pairs.extend(parser.feed(text[start:start + size]))
+    return pairs
+
+@pytest.mark.parametrize('size', [1, 3, 7, 1000])
+def test_parser_emits_each_pair_once_whatever_the_chunking(size):
+    text = 'Sure:\n```json\n{"a": "x, \\"y\\"", "b": {"n": [1, 2]}, "c": 12.5}\n```'
+    parser = IncrementalObjectParser()
+    assert feed_all(parser, text, size) == [('a', 'x, "y"'), ('b', {'n': [1, 2]}), ('c', 12.5)]
+    assert parser.done and not parser.broken
+
+@pytest.mark.parametrize('cut', ['{"a": 12', '{"a": 12.', '{"a": 12.5e', '{"a": -'])
+def test_parser_waits_for_a_number_that_may_continue(cut):
+    text = '{"a": -12.5e3, "b": "x"}' if cut.endswith('-') else '{"a": 12.5e3, "b": "x"}'
+    parser = IncrementalObjectParser()
+    assert parser.feed(cut) == []
+    assert parser.feed(text[len(cut):]) == [('a', float(text[6:text.index(',')])), ('b', 'x')]
+
+def test_parser_keeps_pairs_before_a_break():
+    parser = IncrementalObjectParser()
+    assert parser.feed('{"a": "x", "b" "y", "c": "z"}') == [('a', 'x')]
+    assert parser.broken
+    assert parser.feed('more') == []
+
+def test_parser_drops_a_value_cut_off_mid_string():
+    parser = IncrementalObjectParser()
+    assert parser.feed('{"a": "x", "b": "unfinis') == [('a', 'x')]
+    assert not parser.done and not parser.broken
+
+class FakeStream:
+    """Chat completion chunks as the openai SDK yields them, from text pieces."""
+
+    def __init__(self, pieces, finish_reason='stop', error=None):
+        self.chunks = [SimpleNamespace(choices=[])]
+        self.chunks += [SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=piece), finish_reason=None)])
+                        for piece in pieces]
+        self.chunks.append(SimpleNamespace(choices=[SimpleNamespace(delta=None, finish_reason=finish_reason)]))
+        self.error = error
+        self.read = 0
+        self.closed = False
+
+    def __iter__(self):
+        for chunk in self.chunks:
+            if self.error is not None and self.read == len(self.chunks) // 2:
+                raise self.error
+            self.read += 1
+            yield chunk
+
+    def close(self):
+        self.closed = True
+
+def pieces(text, size=5):
+    return [text[start:start + size] for start in range(0, len(text), size)]
+
+def test_consume_stream_maps_wire_ids_and_keeps_request_order():
+    stream = FakeStream(pieces('{"3":"Vous avez <x0/> articles","1":"Bonjour","2":"Au revoir"}'))
+    result = consume_stream(stream, EXPECTED)
+    assert result.complete
+    assert list(result.ordered()) == ['hello', 'bye', 'count']
+    assert result.ordered()['count'] == 'Vous avez <x0/> articles'
+    assert stream.closed
+
+def test_consume_stream_stops_reading_once_every_key_arrived():
+    # The model keeps going after the last key (whitespace before the closing brace)
+    text = '{"1":"Bonjour","2":"Au revoir","3":"<x0/> articles"' + ' ' * 200 + '}'
+    stream = FakeStream(pieces(text, 10))
+    result = consume_stream(stream, EXPECTED)
+    assert result.complete and result.stopped_early
+    # The opening chunk without choices, the pieces up to the last value, then at most DRAIN_CHUNKS more
+    assert stream.read <= 1 + len(pieces(text[:60], 10)) + DRAIN_CHUNKS + 1
+    assert stream.read < len(stream.chunks)
+
+def test_consume_stream_keeps_complete_pairs_of_a_truncated_response():
+    stream = FakeStream(pieces('{"1":"Bonjour","2":"Au rev'), finish_reason='length')
+    result = consume_stream(stream, EXPECTED)
+    assert result.finish_reason == 'length'
+    assert not result.complete
+    assert result.translations == {'hello': 'Bonjour'}
+
+def test_consume_stream_rejects_values_that_lose_a_tag():
+    stream = FakeStream(pieces('{"1":"Bonjour","2":"Au revoir","3":"Vous avez des articles"}'))
+    result = consume_stream(stream, EXPECTED)
+    assert set(result.translations) == {'hello', 'bye'}
+
+def test_consume_stream_keeps_pairs_received_before_an_error():
+    stream = FakeStream(['{"1":"Bonjour",', '"2":"Au revoir",', '"3":"<x0/>"}'], error=TimeoutError('read timed out'))
+    result = consume_stream(stream, EXPECTED)
+    assert result.translations == {'hello': 'Bonjour'}
+    assert isinstance(result.error, TimeoutError) and stream.closed
+
+def test_consume_stream_raises_when_an_error_leaves_nothing():
+    stream = FakeStream(['{"1":', '"Bon'], error=ConnectionError('reset'))
+    with pytest.raises(ConnectionError):
+        consume_stream(stream, EXPECTED)
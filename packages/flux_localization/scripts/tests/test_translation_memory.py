@@ -0,0 +1,61 @@
+"""
+Translation memory lookups, invalidation and LRU eviction
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+import translation_memory
+from translation_memory import TranslationMemory
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(translation_memory, 'time', SimpleNamespace(time=lambda: clock.now))
+    return clock
+
+@pytest.fixture
+def memory(tmp_path, clock):
+    memory = TranslationMemory(str(tmp_path / 'memory.sqlite3'), max_entries=3)
+    yield memory
+    memory.close()
+
+def store(memory, clock, text):
+    clock.now += 1
+    memory.store_many({text: text}, {text: text.upper()}, 'fr', 'gpt', 'v1')
+
+def test_lookup_splits_cached_and_missing(memory, clock):
+    memory.store_many({'k1': 'Hello', 'k2': 'Bye', 'k3': 'Blank'}, {'k1': 'Bonjour', 'k2': None}, 'fr', 'gpt', 'v1')
+    # The same English under another key is a hit too
+    cached, missing = memory.lookup_many({'a': 'Hello', 'b': 'Bye'}, 'fr', 'gpt', 'v1')
+    assert cached == {'a': 'Bonjour'} and missing == {'b': 'Bye'}
+    assert (memory.hits, memory.misses, memory.stores) == (1, 1, 1)
+
+@pytest.mark.parametrize('locale, deployment, version', [('de', 'gpt', 'v1'), ('fr', 'other', 'v1'), ('fr', 'gpt', 'v2')])
+def test_entries_are_keyed_by_locale_deployment_and_prompt_version(memory, locale, deployment, version):
+    memory.store_many({'k': 'Hello'}, {'k': 'Bonjour'}, 'fr', 'gpt', 'v1')
+    assert memory.lookup_many({'k': 'Hello'}, locale, deployment, version) == ({}, {'k': 'Hello'})
+
+def test_eviction_drops_the_least_recently_used(memory, clock):
+    for text in ('one', 'two', 'three'):
+        store(memory, clock, text)
+
+    # A hit refreshes 'one', so 'two' is now the oldest
+    clock.now += 1
+    memory.lookup_many({'k': 'one'}, 'fr', 'gpt', 'v1')
+    store(memory, clock, 'four')
+
+    assert memory.evictions == 1
+    cached, missing = memory.lookup_many({t: t for t in ('one', 'two', 'three', 'four')}, 'fr', 'gpt', 'v1')
+    assert set(cached) == {'one', 'three', 'four'} and set(missing) == {'two'}
+
+def test_memory_persists_across_instances(tmp_path, clock):
+    path = str(tmp_path / 'memory.sqlite3')
+    first = TranslationMemory(path)
+    first.store_many({'k': 'Hello'}, {'k': 'Bonjour'}, 'fr', 'gpt', 'v1')
+    first.close()
+
+    second = TranslationMemory(path)
+    assert second.lookup_many({'k': 'Hello'}, 'fr', 'gpt', 'v1')[0] == {'k': 'Bonjour'}
+    second.close()
@@ -0,0 +1,30 @@
+"""
+Compact batch payloads and mapping responses back to ARB keys
+"""
+
+import json
+
+from wire_format import encode_examples, encode_payload, from_wire, wire_ids
+
+TEXTS = {'appTitle': 'FluxStore', 'blank': '   ', 'greeting': ' Hello "friend" ', 'accents': 'Café'}
+
+def test_payload_round_trips_through_json():
+    payload = encode_payload(TEXTS)
+    assert payload == '{"1":"FluxStore","2":"","3":"Hello \\"friend\\"","4":"Café"}'
+
+    data = json.loads(payload)
+    assert from_wire(data, TEXTS) == {key: text.strip() for key, text in TEXTS.items()}
+    assert list(from_wire(data, TEXTS)) == list(TEXTS)
+
+def test_ids_follow_the_order_of_the_batch():
+    assert wire_ids(TEXTS) == {'1': 'appTitle', '2': 'blank', '3': 'greeting', '4': 'accents'}
+
+def test_from_wire_accepts_keys_echoed_by_name():
+    data = {'appTitle': 'FluxStore', '3': 'Bonjour', '9': 'unknown id'}
+    assert from_wire(data, TEXTS) == {'appTitle': 'FluxStore', 'greeting': 'Bonjour', '9': 'unknown id'}
+
+def test_from_wire_leaves_non_objects_for_validation():
+    assert from_wire(['a'], TEXTS) == ['a']
+
+def test_examples_are_compact():
+    assert encode_examples({'Hello': 'Bonjour', 'Bye': 'Salut'}) == '{"Hello":"Bonjour","Bye":"Salut"}'
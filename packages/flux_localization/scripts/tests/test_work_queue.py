@@ -0,0 +1,168 @@
+"""
+Claims, leases and the write-once hand-off of the shared work queue
+"""
+
+import time as real_time
+from types import SimpleNamespace
+
+import pytest
+
+import work_queue
+from work_queue import MAX_ATTEMPTS, WorkQueue
+
+LEASE = 60
+
+class Clock:
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def time(self):
+        return self.now
+
+    def strftime(self, fmt):
+        return real_time.strftime(fmt, real_time.localtime(self.now))
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(work_queue, 'time', SimpleNamespace(time=clock.time, strftime=clock.strftime))
+    return clock
+
+@pytest.fixture
+def queues(tmp_path, clock):
+    """Two workers sharing one queue database."""
+    opened = [WorkQueue(str(tmp_path / 'queue.sqlite3'), worker_id=name, lease_seconds=LEASE)
+              for name in ('w1', 'w2')]
+    yield opened
+    for queue in opened:
+        queue.close()
+
+PLANS = {'fr': {'file': 'intl_fr.arb'}, 'de': {'file': 'intl_de.arb'}}
+JOBS = {'fr': {'a': 'A', 'b': 'B', 'c': 'C'}, 'de': {'a': 'A'}}
+
+def enqueue(queue):
+    return queue.enqueue(PLANS, JOBS, {'a': 'hash'}, batch_size=2)
+
+def unit_states(queue, job):
+    return {(locale, batch): state for locale, batch, state in queue.conn.execute(
+        'SELECT locale, batch, state FROM units WHERE job = ?', (job,))}
+
+class Writer:
+    def __init__(self, ok=True):
+        self.ok = ok
+        self.calls = []
+
+    def __call__(self, locale, plan, sources, translations, methods, base_hashes):
+        self.calls.append((locale, plan, sources, translations, methods, base_hashes))
+        return self.ok
+
+def test_enqueue_splits_locales_into_batches(queues):
+    w1, _ = queues
+    job = enqueue(w1)
+    assert w1.active_job() == job
+    assert unit_states(w1, job) == {('fr', 0): 'pending', ('fr', 1): 'pending', ('de', 0): 'pending'}
+    assert w1.progress(job) == {'pending': 3}
+
+def test_workers_never_claim_the_same_unit(queues):
+    w1, w2 = queues
+    job = enqueue(w1)
+    first = w1.claim(job, limit=2)
+    second = w2.claim(job, limit=2)
+    # Batch 0 of every locale first, so locales finish at a similar pace
+    assert [(unit.locale, unit.batch) for unit in first] == [('de', 0), ('fr', 0)]
+    assert [(unit.locale, unit.batch) for unit in second] == [('fr', 1)]
+    assert first[1].texts == {'a': 'A', 'b': 'B'}
+    assert w2.claim(job) == []
+
+def test_an_expired_lease_is_taken_over_and_the_late_result_ignored(queues, clock):
+    w1, w2 = queues
+    job = enqueue(w1)
+    (unit,) = w1.claim(job)
+    assert w2.claim(job, limit=3) != []
+
+    clock.now += LEASE + 1
+    assert w1.progress(job) == {'expired': 3}
+    (taken,) = [u for u in w2.claim(job, limit=3) if (u.locale, u.batch) == (unit.locale, unit.batch)]
+
+    w1.complete(unit, {'a': 'late'}, {'a': 'batch'})
+    assert w1.completed == 0
+    w2.complete(taken, {'a': 'A2'}, {'a': 'batch'})
+    (translations,) = w1.conn.execute('SELECT translations FROM units WHERE job = ? AND locale = ? AND batch = ?',
+                                      (job, unit.locale, unit.batch)).fetchone()
+    assert translations == '{"a": "A2"}'
+
+def test_release_hands_units_back_without_using_an_attempt(queues):
+    w1, w2 = queues
+    job = enqueue(w1)
+    units = w1.claim(job, limit=3)
+    w1.release(units)
+    assert w1.released == 3
+    assert w1.progress(job) == {'pending': 3}
+    assert len(w2.claim(job, limit=3)) == 3
+    assert {row[0] for row in w1.conn.execute('SELECT attempts FROM units WHERE job = ?', (job,))} == {1}
+
+def test_a_unit_is_given_up_after_max_attempts(queues, clock):
+    w1, w2 = queues
+    job = enqueue(w1)
+    for _ in range(MAX_ATTEMPTS):
+        assert w1.claim(job, limit=3)
+        clock.now += LEASE + 1
+    assert w2.claim(job, limit=3) == []
+    assert w1.progress(job) == {'failed': 3}
+
+    # Nothing is left to translate, so the locales are written with what they have
+    writer = Writer()
+    assert w2.write_finished(job, writer) == ['de', 'fr']
+    assert all(call[3] == {} for call in writer.calls)
+
+def finish(queue, job):
+    while True:
+        units = queue.claim(job, limit=10)
+        if not units:
+            return
+        for unit in units:
+            queue.complete(unit, {key: text.lower() for key, text in unit.texts.items()},
+                           {key: 'batch' for key in unit.texts})
+
+def test_a_locale_is_written_once_after_all_its_units(queues):
+    w1, w2 = queues
+    job = enqueue(w1)
+    writer = Writer()
+
+    units = w1.claim(job, limit=2)
+    for unit in units:
+        w1.complete(unit, {key: text.lower() for key, text in unit.texts.items()}, {})
+    # fr batch 1 is still pending
+    assert w1.write_finished(job, writer) == ['de']
+    assert not w1.is_done(job)
+
+    finish(w2, job)
+    assert w2.write_finished(job, writer) == ['fr']
+    assert w1.write_finished(job, writer) == []
+    assert [call[0] for call in writer.calls] == ['de', 'fr']
+
+    locale, plan, sources, translations, _, base_hashes = writer.calls[1]
+    assert plan == PLANS['fr'] and base_hashes == {'a': 'hash'}
+    assert sources == JOBS['fr'] and translations == {'a': 'a', 'b': 'b', 'c': 'c'}
+    assert w1.is_done(job) and w1.active_job() is None
+    assert (w1.written, w2.written) == (['de'], ['fr'])
+
+def test_a_locale_that_could_not_be_written_is_marked_failed(queues):
+    w1, _ = queues
+    job = enqueue(w1)
+    finish(w1, job)
+    assert w1.write_finished(job, Writer(ok=False)) == []
+    assert sorted(w1.failed) == ['de', 'fr']
+    assert {row[0] for row in w1.conn.execute('SELECT state FROM locales WHERE job = ?', (job,))} == {'failed'}
+    # Not retried by the next writer
+    writer = Writer()
+    assert w1.write_finished(job, writer) == [] and writer.calls == []
+    assert w1.is_done(job)
+
+def test_a_new_job_supersedes_the_open_one(queues, clock):
+    w1, w2 = queues
+    old = enqueue(w1)
+    clock.now += 1
+    new = enqueue(w2)
+    assert new != old
+    assert w1.is_done(old) and w1.active_job() == new
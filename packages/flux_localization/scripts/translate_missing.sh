@@ -106,6 +106,9 @@ show_usage() {
     echo "  --azure-endpoint URL    Azure OpenAI endpoint"
     echo "  --api-key KEY           Azure OpenAI API key"
     echo "  --deployment-name NAME  Azure OpenAI deployment name"
+    echo "  --concurrency N         Maximum API calls in flight across all languages (default: serial)"
+    echo "  --changed-only          Also retranslate keys whose English text changed since the last sync"
+    echo "  --workers N             Split the run over N worker processes sharing a work queue"
     echo "  --batch-size SIZE       Number of texts to translate in each batch (default: 20)"
     echo ""
     echo "Examples:"
@@ -128,6 +131,9 @@ run_translation() {
     local api_key="$4"
     local deployment_name="$5"
     local batch_size="$6"
+    local concurrency="$7"
+    local changed_only="$8"
+    local workers="$9"
     
     print_info "Starting translation process..."
     
@@ -158,6 +164,38 @@ run_translation() {
         cmd="$cmd --batch-size $batch_size"
     fi
     
+    if [ -n "$concurrency" ]; then
+        cmd="$cmd --concurrency $concurrency"
+    fi
+    
+    if [ "$changed_only" = "true" ]; then
+        cmd="$cmd --changed-only"
+    fi
+    
+    if [ -n "$workers" ]; then
+        # Plan the run once, then let the workers share it through the queue
+        print_info "Running: $cmd --queue --enqueue"
+        eval $cmd --queue --enqueue
+        
+        local pids=()
+        for ((i = 1; i <= workers; i++)); do
+            print_info "Starting worker $i: $cmd --queue --worker"
+            eval $cmd --queue --worker &
+            pids+=($!)
+        done
+        
+        local failed=0
+        for pid in "${pids[@]}"; do
+            wait "$pid" || failed=1
+        done
+        if [ $failed -ne 0 ]; then
+            print_error "Translation process failed!"
+            exit 1
+        fi
+        print_success "Translation process completed successfully!"
+        return
+    fi
+    
     print_info "Running: $cmd"
     eval $cmd
     
@@ -178,6 +216,9 @@ main() {
     local api_key=""
     local deployment_name=""
     local batch_size=""
+    local concurrency=""
+    local changed_only=false
+    local workers=""
     
     # Parse command line arguments
     while [[ $# -gt 0 ]]; do
@@ -214,6 +255,18 @@ main() {
                 batch_size="$2"
                 shift 2
                 ;;
+            --concurrency)
+                concurrency="$2"
+                shift 2
+                ;;
+            --changed-only)
+                changed_only=true
+                shift
+                ;;
+            --workers)
+                workers="$2"
+                shift 2
+                ;;
             *)
                 print_error "Unknown option: $1"
                 show_usage
@@ -243,7 +296,7 @@ main() {
     fi
     
     # Run translation
-    run_translation "$languages" "$l10n_dir" "$azure_endpoint" "$api_key" "$deployment_name" "$batch_size"
+    run_translation "$languages" "$l10n_dir" "$azure_endpoint" "$api_key" "$deployment_name" "$batch_size" "$concurrency" "$changed_only" "$workers"
 }
 
 # Run main function with all arguments
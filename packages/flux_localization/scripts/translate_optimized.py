@@ -9,10 +9,29 @@ import argparse
 import logging
 import time
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 import openai
 from dotenv import load_dotenv
 
+from arb_corpus import ArbCorpus, locale_of
+from async_engine import AsyncTranslationEngine
+from batch_recovery import RecoveryStats, bisect_recover, is_usable, keep_best, salvage_translations
+from batching import AdaptiveBatcher, estimate_prompt_tokens
+from checkpoint import DEFAULT_CHECKPOINT_DIR, CheckpointJournal
+from dart_usage import UsageIndex
+from dedup import DEFAULT_EXCLUDE_FILE, SourceDeduplicator, load_exclusions
+from fuzzy_memory import DEFAULT_HINT_THRESHOLD, DEFAULT_REUSE_THRESHOLD, FuzzyMemory
+from metrics import CallMetrics
+from placeholders import PlaceholderMasker
+from provenance import DEFAULT_PROVENANCE_DIR, ProvenanceStore
+from rate_limiter import RateLimiter
+from streaming_json import StreamResult, consume_stream
+from sync_manifest import DEFAULT_MANIFEST_PATH, SyncManifest
+from translation_memory import DEFAULT_CACHE_PATH, DEFAULT_MAX_ENTRIES, TranslationMemory
+from transport import DEFAULT_CONNECT_TIMEOUT, HttpTransport
+from wire_format import encode_examples, encode_payload, from_wire
+from work_queue import DEFAULT_LEASE_SECONDS, DEFAULT_QUEUE_PATH, WorkQueue, WorkUnit
+
 # Load environment variables
 load_dotenv()
 
@@ -21,8 +40,65 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(
 logger = logging.getLogger(__name__)
 
 class OptimizedTranslator:
-    def __init__(self, azure_endpoint: str = None, api_key: str = None, deployment_name: str = None):
+    # Completion budget of one batch request; adaptive batching packs keys against it
+    BATCH_MAX_TOKENS = 3000
+
+    # Bump whenever the batch prompt, system message or sampling settings change
+    # so the translation memory stops serving results of the old prompt
+    PROMPT_VERSION = "optimized-4"
+
+    # Instructions shared by every batch call; the user message carries only the
+    # language and the texts, keyed by short ids instead of the ARB key names
+    # (see wire_format.py), so neither the request nor the echoed response
+    # spends tokens on key names or indentation
+    BATCH_SYSTEM_PROMPT = """You are a professional translator of mobile app texts. The user names the target language and sends a JSON object of English texts keyed by short ids. You MUST return ONLY a valid JSON object with the same ids mapped to the translations, written compactly like the input. Do not include any explanations or additional text.
+
+Rules:
+1. Keep placeholders like {variable} and tags like <x0/> or <x1>...</x1> unchanged; translate only the text around and between tags
+2. Maintain the same tone and style
+3. Ensure natural, app-appropriate translations
+4. When existing translations of similar texts follow the input, keep their terminology and wording"""
+
+    MULTI_TARGET_SYSTEM_PROMPT = """You are a professional translator of mobile app texts. The user lists language codes and sends a JSON object of English texts keyed by short ids. You MUST return ONLY a valid JSON object with the same ids, where each value maps every listed language code to the translation, e.g. {"1":{"fr":"..."}}, written compactly like the input. Do not include any explanations or additional text.
+
+Rules:
+1. Keep placeholders like {variable} and tags like <x0/> or <x1>...</x1> unchanged; translate only the text around and between tags
+2. Maintain the same tone and style
+3. Ensure natural, app-appropriate translations
+4. Use the language codes exactly as listed"""
+
+    def __init__(self, azure_endpoint: str = None, api_key: str = None, deployment_name: str = None,
+                 translation_memory: Optional[TranslationMemory] = None, adaptive_batching: bool = False,
+                 rate_limiter: Optional[RateLimiter] = None, checkpoint_dir: Optional[str] = None,
+                 metrics: Optional[CallMetrics] = None, stream: bool = False,
+                 dedup: Optional[SourceDeduplicator] = None, placeholders: Optional[PlaceholderMasker] = None,
+                 provenance: Optional[ProvenanceStore] = None,
+                 transport: Optional[HttpTransport] = None, usage: Optional[UsageIndex] = None,
+                 fuzzy: Optional[FuzzyMemory] = None):
         """Initialize the translator with Azure OpenAI credentials."""
+        self.translation_memory = translation_memory
+        self.adaptive_batching = adaptive_batching
+        # Stream batch responses and keep each translation as soon as its pair is complete
+        self.stream = stream
+        self.dedup = dedup
+        # Send placeholders as opaque tags and reject translations that lose them
+        self.placeholders = placeholders
+        # How each written translation was produced, kept in sidecars next to the run state
+        self.provenance = provenance
+        self.methods: Dict[str, Dict[str, str]] = {}
+        # Keys no Dart file uses are left out when a usage index is given
+        self.usage = usage
+        # Near matches among the existing translations: reused when close enough, else sent as examples
+        self.fuzzy = fuzzy
+        self._batchers: Dict[str, AdaptiveBatcher] = {}
+        self.recovery_stats = RecoveryStats()
+        # Wall-clock seconds of every batch including retries and recovery
+        self.batch_latencies: List[float] = []
+        self.corpus: Optional[ArbCorpus] = None
+        self.rate_limiter = rate_limiter or RateLimiter()
+        # Connection pool and timeouts shared by the sync client and the asyncio engine
+        self.transport = transport or HttpTransport()
+        self.metrics = metrics or CallMetrics()
         self.azure_endpoint = azure_endpoint or os.getenv('AZURE_OPENAI_ENDPOINT')
         self.api_key = api_key or os.getenv('AZURE_OPENAI_API_KEY')
         self.deployment_name = deployment_name or os.getenv('AZURE_OPENAI_DEPLOYMENT_NAME')
@@ -30,10 +106,17 @@ class OptimizedTranslator:
         if not all([self.azure_endpoint, self.api_key, self.deployment_name]):
             raise ValueError("Missing Azure OpenAI credentials")
         
+        # Completed batches are journaled so an interrupted run resumes where it stopped
+        self.checkpoint = CheckpointJournal(checkpoint_dir, f"{self.PROMPT_VERSION}:{self.deployment_name}") if checkpoint_dir else None
+        
+        self.api_version = "2024-02-15-preview"
         self.client = openai.AzureOpenAI(
             azure_endpoint=self.azure_endpoint,
             api_key=self.api_key,
-            api_version="2024-02-15-preview"
+            api_version=self.api_version,
+            # Retries and backoff are handled by the rate limiter
+            max_retries=0,
+            http_client=self.transport.client()
         )
         
         # Language mapping
@@ -59,7 +142,17 @@ class OptimizedTranslator:
     def translate_batch_optimized(self, texts: Dict[str, str], target_language: str, batch_size: int = 30) -> Dict[str, str]:
         """Optimized batch translation with better success rates."""
         language_name = self.language_names.get(target_language, target_language)
-        translations = {}
+        
+        # Serve unchanged strings from the translation memory before batching
+        translations, texts = self._recall(texts, target_language)
+        
+        if self.adaptive_batching:
+            batcher = self._get_batcher(target_language, batch_size)
+            total_batches, batch_success_count, individual_fallback_count = self._translate_adaptive(
+                texts, translations, target_language, language_name, batcher)
+            self._log_batch_summary(total_batches, batch_success_count, individual_fallback_count)
+            batcher.log_summary()
+            return translations
         
         # Split texts into batches
         text_items = list(texts.items())
@@ -73,25 +166,21 @@ class OptimizedTranslator:
         for batch_idx, batch in enumerate(batches, 1):
             batch_texts = {key: text for key, text in batch}
             
-            # Try batch translation with retries
-            batch_translations = self._try_batch_with_retries(batch_texts, target_language, language_name, batch_idx)
+            batch_translations, batch_ok = self._translate_one_batch(batch_texts, target_language, language_name, batch_idx)
+            translations.update(batch_translations)
+            self._checkpoint(batch_texts, batch_translations, target_language)
             
-            if batch_translations:
-                translations.update(batch_translations)
+            if batch_ok:
                 batch_success_count += 1
                 logger.info(f"✅ Batch {batch_idx}/{len(batches)} completed successfully")
             else:
-                # Fallback to individual translation
-                logger.warning(f"⚠️ Batch {batch_idx} failed, using individual translation")
                 individual_fallback_count += 1
-                
-                for key, text in batch:
-                    translation = self._translate_single_optimized(text, target_language, language_name)
-                    translations[key] = translation
-                    time.sleep(0.1)  # Small delay to avoid rate limits
         
-        # Summary
-        total_batches = len(batches)
+        self._log_batch_summary(len(batches), batch_success_count, individual_fallback_count)
+        return translations
+
+    def _log_batch_summary(self, total_batches: int, batch_success_count: int, individual_fallback_count: int):
+        """Log the batch success statistics for one language."""
         success_rate = (batch_success_count / total_batches) * 100 if total_batches > 0 else 0
         
         logger.info(f"📊 Translation Summary:")
@@ -99,85 +188,413 @@ class OptimizedTranslator:
         logger.info(f"   - Successful batches: {batch_success_count}")
         logger.info(f"   - Individual fallbacks: {individual_fallback_count}")
         logger.info(f"   - Batch success rate: {success_rate:.1f}%")
+
+
+    def _get_batcher(self, target_language: str, batch_size: int) -> AdaptiveBatcher:
+        """Return the adaptive batcher of a language, keeping what it learned across calls."""
+        if target_language not in self._batchers:
+            self._batchers[target_language] = AdaptiveBatcher(target_language, self.BATCH_MAX_TOKENS, max_keys=batch_size)
+        return self._batchers[target_language]
+
+    def _translate_adaptive(self, texts: Dict[str, str], translations: Dict[str, str], target_language: str,
+                            language_name: str, batcher: AdaptiveBatcher) -> Tuple[int, int, int]:
+        """Translate texts in batches packed by estimated tokens.
+
+        A truncated or unparseable batch is not retried as is: the batcher
+        shrinks and the same keys are repacked, so only a failing single key
+        ever reaches the individual fallback.
+        """
+        remaining = list(texts.items())
+        total_batches = 0
+        batch_success_count = 0
+        individual_fallback_count = 0
         
-        return translations
+        logger.info(f"Translating {len(texts)} texts to {language_name} in adaptive batches "
+                    f"(budget {batcher.token_budget} tokens, max {batcher.max_keys} keys)")
+        
+        while remaining:
+            total_batches += 1
+            batch_texts = batcher.next_batch(remaining)
+            
+            if len(batch_texts) == 1:
+                batch_translations, batch_ok = self._translate_one_batch(batch_texts, target_language, language_name, total_batches)
+            else:
+                started = time.perf_counter()
+                salvaged = {}
+                batch_translations = self._try_batch_with_retries(batch_texts, target_language, language_name, total_batches,
+                                                  batcher=batcher, salvage=salvaged)
+                self.batch_latencies.append(time.perf_counter() - started)
+                batch_ok = bool(batch_translations)
+                if not batch_ok:
+                    if batcher.max_keys >= len(batch_texts):
+                        # Failed on errors rather than a bad response: still make the next batch smaller
+                        batcher.record_parse_failure(len(batch_texts))
+                    if salvaged:
+                        # Keep the keys that arrived complete and repack only the missing ones
+                        translations.update(salvaged)
+                        self._note(target_language, salvaged, 'recovery')
+                        self._checkpoint(batch_texts, salvaged, target_language)
+                        remaining = [(key, text) for key, text in remaining if key not in salvaged]
+                    logger.warning(f"⚠️ Batch {total_batches} ({len(batch_texts)} keys) failed, kept {len(salvaged)}, "
+                                   f"repacking the rest with max {batcher.max_keys} keys")
+                    continue
+                self._remember_batch(batch_texts, batch_translations, target_language)
+            
+            translations.update(batch_translations)
+            self._checkpoint(batch_texts, batch_translations, target_language)
+            remaining = remaining[len(batch_texts):]
+            if batch_ok:
+                batch_success_count += 1
+                logger.info(f"✅ Batch {total_batches} ({len(batch_texts)} keys) completed successfully")
+            else:
+                individual_fallback_count += 1
+        
+        return total_batches, batch_success_count, individual_fallback_count
+
+    def _translate_one_batch(self, batch_texts: Dict[str, str], target_language: str, language_name: str,
+                             batch_idx: int) -> Tuple[Dict[str, str], bool]:
+        """Translate one batch, falling back to individual translation if every retry fails."""
+        # Try batch translation with retries
+        started = time.perf_counter()
+        salvaged = {}
+        batch_translations = self._try_batch_with_retries(batch_texts, target_language, language_name, batch_idx,
+                                                  salvage=salvaged)
+        
+        if batch_translations:
+            self._remember_batch(batch_texts, batch_translations, target_language)
+            self.batch_latencies.append(time.perf_counter() - started)
+            return batch_translations, True
+        
+        # Recover by re-requesting only the keys that did not come back, in halves
+        logger.warning(f"⚠️ Batch {batch_idx} failed, kept {len(salvaged)}/{len(batch_texts)} keys; "
+                       f"recovering the rest by bisection")
+        
+        translations = bisect_recover(batch_texts, salvaged,
+                                      lambda texts: self._request_batch_partial(texts, target_language, language_name),
+                                      lambda text: self._translate_single_optimized(text, target_language, language_name), self.recovery_stats,
+                                      lambda key, method: self._note(target_language, [key], method))
+        self._note(target_language, translations, 'recovery')
+        self.batch_latencies.append(time.perf_counter() - started)
+        return translations, False
 
-    def _try_batch_with_retries(self, texts: Dict[str, str], target_language: str, language_name: str, batch_idx: int, max_retries: int = 2) -> Optional[Dict[str, str]]:
+    def _note(self, target_language: str, keys: Iterable[str], method: str):
+        """Remember how keys were translated for the provenance record; the first method noted wins."""
+        methods = self.methods.setdefault(target_language, {})
+        for key in keys:
+            methods.setdefault(key, method)
+
+    def _request_batch_partial(self, texts: Dict[str, str], target_language: str, language_name: str) -> Dict[str, str]:
+        """Make one batch call and return whichever keys came back usable."""
+        try:
+            with self.metrics.call(target_language, 'recovery', keys=len(texts)) as call:
+                if self.stream:
+                    return self._stream_batch(texts, language_name, call, target_language).ordered()
+                response = self.rate_limiter.create(self.client, self._batch_request_kwargs(texts, language_name, target_language),
+                                                    call)
+                response_text = response.choices[0].message.content.strip()
+                translations = self._parse_json_response(response_text, texts, call)
+                if translations:
+                    return {key: translations[key] for key in texts}
+                call.parse = 'salvaged'
+                return salvage_translations(response_text, texts)
+        except Exception as e:
+            logger.warning(f"Recovery call for {len(texts)} keys failed: {str(e)}")
+            return {}
+
+    def _recall(self, texts: Dict[str, str], target_language: str) -> Tuple[Dict[str, str], Dict[str, str]]:
+        """Split texts into translations already available and texts to send.
+
+        Translations come from the checkpoint of an interrupted run first,
+        then from the translation memory.
+        """
+        done = {}
+        if self.checkpoint:
+            done, texts = self.checkpoint.resume(target_language, texts)
+            self._note(target_language, done, 'checkpoint')
+        
+        if not self.translation_memory:
+            return done, texts
+        
+        cached, missing = self.translation_memory.lookup_many(texts, target_language, self.deployment_name, self.PROMPT_VERSION)
+        self._note(target_language, cached, 'memory')
+        if cached:
+            logger.info(f"🗄️ {len(cached)}/{len(texts)} texts for {target_language} served from translation memory")
+        return {**done, **cached}, missing
+
+    def _checkpoint(self, texts: Dict[str, str], translations: Dict[str, str], target_language: str):
+        """Journal a completed batch so a rerun does not request it again."""
+        if self.checkpoint:
+            self.checkpoint.record(target_language, texts, translations)
+
+    def _remember_batch(self, texts: Dict[str, str], translations: Dict[str, str], target_language: str):
+        """Store the result of a successful batch in the translation memory."""
+        if not self.translation_memory:
+            return
+        
+        self.translation_memory.store_many(texts, translations, target_language, self.deployment_name, self.PROMPT_VERSION)
+
+    def _try_batch_with_retries(self, texts: Dict[str, str], target_language: str, language_name: str, batch_idx: int, max_retries: int = 2,
+                  batcher: Optional[AdaptiveBatcher] = None, salvage: Optional[Dict[str, str]] = None) -> Optional[Dict[str, str]]:
         """Try batch translation with retries and improved prompts."""
         
         for attempt in range(max_retries + 1):
             try:
-                # Improved prompt for better JSON responses
-                prompt = self._create_optimized_prompt(texts, language_name)
-                
                 logger.info(f"Making API call for batch {batch_idx} (attempt {attempt + 1})")
                 
-                response = self.client.chat.completions.create(
-                    model=self.deployment_name,
-                    messages=[
-                        {
-                            "role": "system", 
-                            "content": "You are a professional translator. You MUST return ONLY a valid JSON object with the exact same keys as the input, translated to the target language. Do not include any explanations or additional text."
-                        },
-                        {"role": "user", "content": prompt}
-                    ],
-                    temperature=0.1,  # Lower temperature for more consistent JSON
-                    max_tokens=3000,
-                    timeout=90
-                )
-                
-                response_text = response.choices[0].message.content.strip()
-                
-                # Try to parse JSON with multiple strategies
-                translations = self._parse_json_response(response_text, texts)
+                with self.metrics.call(target_language, 'batch', attempt + 1, len(texts)) as call:
+                    if self.stream:
+                        streamed = self._stream_batch(texts, language_name, call, target_language)
+                        response_text, finish_reason = streamed.text, streamed.finish_reason
+                    else:
+                        response = self.rate_limiter.create(
+                            self.client, self._batch_request_kwargs(texts, language_name, target_language), call)
+                        response_text = response.choices[0].message.content.strip()
+                        finish_reason = response.choices[0].finish_reason
+                    
+                    if batcher and finish_reason == 'length' and len(texts) > 1:
+                        # Retrying the same batch would truncate again; let the batcher repack smaller
+                        logger.warning(f"Batch {batch_idx} attempt {attempt + 1}: Response truncated at max_tokens")
+                        batcher.record_truncation(len(texts))
+                        if salvage is not None:
+                            # The keys before the cut are complete; only the rest needs repacking
+                            keep_best(salvage, streamed.translations if self.stream
+                                      else salvage_translations(response_text, texts))
+                        return None
+                    
+                    # Try to parse JSON with multiple strategies
+                    if self.stream:
+                        translations = streamed.ordered() if streamed.complete else None
+                    else:
+                        translations = self._parse_json_response(response_text, texts, call)
                 
                 if translations:
+                    if batcher:
+                        batcher.record_success()
                     return translations
                 else:
-                    logger.warning(f"Batch {batch_idx} attempt {attempt + 1}: Invalid JSON response")
+                    logger.warning(f"Batch {batch_idx} attempt {attempt + 1}: Invalid or incomplete response")
+                    if salvage is not None:
+                        # Keep the best partial answer for recovery if every attempt fails
+                        keep_best(salvage, streamed.translations if self.stream
+                                  else salvage_translations(response_text, texts))
+                        if salvage:
+                            # Keep the usable keys and let recovery request only the rest
+                            return None
+                    if batcher and len(texts) > 1:
+                        batcher.record_parse_failure(len(texts))
+                        return None
                     
             except Exception as e:
                 logger.warning(f"Batch {batch_idx} attempt {attempt + 1} failed: {str(e)}")
                 
             # Wait before retry
             if attempt < max_retries:
-                time.sleep(2)
+                time.sleep(self.rate_limiter.backoff_delay(attempt))
         
         return None
 
-    def _create_optimized_prompt(self, texts: Dict[str, str], language_name: str) -> str:
-        """Create an optimized prompt for better batch translation success."""
+    def _batch_request_kwargs(self, texts: Dict[str, str], language_name: str, target_language: Optional[str] = None) -> Dict:
+        """Build the chat completion arguments for a batch of texts."""
+        examples = self.fuzzy.examples(texts, target_language) if self.fuzzy and target_language else None
+        if examples and self.placeholders:
+            examples = self.placeholders.mask_examples(examples)
+        prompt = self._create_optimized_prompt(texts, language_name, examples)
+
+        return {
+            "model": self.deployment_name,
+            "messages": [
+                {"role": "system", "content": self.BATCH_SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ],
+            "temperature": 0.1,  # Lower temperature for more consistent JSON
+            "max_tokens": self.BATCH_MAX_TOKENS,
+            "timeout": self.transport.timeout(90)
+        }
+
+    def _stream_batch(self, texts: Dict[str, str], language_name: str, call=None,
+                      target_language: Optional[str] = None) -> StreamResult:
+        """Send a batch as a streamed request, collecting each translation as soon as it is complete."""
+        request_kwargs = {**self._batch_request_kwargs(texts, language_name, target_language), "stream": True}
+        stream = self.rate_limiter.create(self.client, request_kwargs, call)
+        return consume_stream(stream, texts, call)
+
+    def _single_request_kwargs(self, text: str, language_name: str) -> Dict:
+        """Build the chat completion arguments for a single text."""
+        prompt = f"""Translate to {language_name}: "{text}"
+Keep placeholders like {{variable}} and tags like <x0/> unchanged.
+Return only the translation."""
+
+        return {
+            "model": self.deployment_name,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": 0.3,
+            "max_tokens": 200,
+            "timeout": self.transport.timeout(30)
+        }
+
+    def _clean_single_translation(self, translation: str) -> str:
+        """Strip the quotes the model sometimes wraps single translations in."""
+        translation = translation.strip()
+        if translation.startswith('"') and translation.endswith('"'):
+            translation = translation[1:-1]
+        return translation
+
+    def _create_optimized_prompt(self, texts: Dict[str, str], language_name: str,
+                                 examples: Optional[Dict[str, str]] = None) -> str:
+        """Create the user message of a batch: the target language, the texts keyed by short ids and any examples."""
+        prompt = f"Translate to {language_name}:\n{encode_payload(texts)}"
+        if examples:
+            prompt += f"\nExisting translations of similar texts:\n{encode_examples(examples)}"
+        return prompt
+
+    def _create_multi_target_prompt(self, texts: Dict[str, str], target_languages: List[str]) -> str:
+        """Create the user message of a multi-target batch: the language codes and the texts keyed by short ids."""
+        language_lines = "\n".join(f"- {code}: {self.language_names.get(code, code)}" for code in target_languages)
+        return f"Languages:\n{language_lines}\nTexts:\n{encode_payload(texts)}"
+
+    def _multi_target_request_kwargs(self, texts: Dict[str, str], target_languages: List[str]) -> Dict:
+        """Build the chat completion arguments for a multi-target batch."""
+        return {
+            "model": self.deployment_name,
+            "messages": [
+                {"role": "system", "content": self.MULTI_TARGET_SYSTEM_PROMPT},
+                {"role": "user", "content": self._create_multi_target_prompt(texts, target_languages)}
+            ],
+            "temperature": 0.1,
+            # The response carries one translation per language for every key
+            "max_tokens": min(16000, 3000 * len(target_languages)),
+            "timeout": self.transport.timeout(90 + 30 * len(target_languages))
+        }
+
+    def _split_multi_target_response(self, response: Dict, texts: Dict[str, str], target_languages: List[str]) -> Dict[str, Dict[str, str]]:
+        """Split a ``{key: {lang: text}}`` response into per-language slices that pass validation."""
+        slices = {}
+        for language_code in target_languages:
+            language_slice = {}
+            for key in texts:
+                value = response.get(key)
+                if isinstance(value, dict) and isinstance(value.get(language_code), str):
+                    language_slice[key] = value[language_code]
+            
+            if self._validate_translations(language_slice, texts):
+                slices[language_code] = language_slice
+        return slices
+
+    def _try_multi_target_batch(self, texts: Dict[str, str], target_languages: List[str], batch_idx: int,
+                                stats: Dict[str, float], max_retries: int = 2) -> Dict[str, Dict[str, str]]:
+        """Request several languages for one batch, returning the language slices that came back valid."""
+        request_kwargs = self._multi_target_request_kwargs(texts, target_languages)
         
-        # Create a cleaner JSON structure
-        clean_texts = {}
-        for key, text in texts.items():
-            # Clean the text for better translation
-            clean_text = text.strip()
-            if clean_text:
-                clean_texts[key] = clean_text
+        for attempt in range(max_retries + 1):
+            try:
+                logger.info(f"Making multi-target API call for batch {batch_idx} -> {', '.join(target_languages)} (attempt {attempt + 1})")
+                
+                with self.metrics.call('+'.join(target_languages), 'multi', attempt + 1, len(texts)) as call:
+                    response = self.rate_limiter.create(self.client, request_kwargs, call)
+                    stats['calls'] += 1
+                    stats['input_tokens'] += estimate_prompt_tokens(request_kwargs['messages'])
+                    if getattr(response, 'usage', None):
+                        stats['billed_input_tokens'] += response.usage.prompt_tokens
+                    
+                    parsed = self._parse_json_response(response.choices[0].message.content.strip(), texts, call)
+                if parsed:
+                    return self._split_multi_target_response(parsed, texts, target_languages)
+                
+                logger.warning(f"Multi-target batch {batch_idx} attempt {attempt + 1}: Invalid JSON response")
+                
+            except Exception as e:
+                logger.warning(f"Multi-target batch {batch_idx} attempt {attempt + 1} failed: {str(e)}")
+            
+            if attempt < max_retries:
+                time.sleep(self.rate_limiter.backoff_delay(attempt))
         
-        return f"""Translate the following English texts to {language_name}.
+        return {}
 
-IMPORTANT: Return ONLY a JSON object with the exact same keys and translated values.
+    def translate_multi_target(self, jobs: Dict[str, Dict[str, str]], batch_size: int = 30,
+                               locales_per_call: int = 8) -> Dict[str, Dict[str, str]]:
+        """Translate ``{language: {key: text}}`` jobs, sending each batch to several languages per call.
 
-Input texts:
-{json.dumps(clean_texts, ensure_ascii=False, indent=2)}
-
-Rules:
-1. Keep placeholders like {{variable}} unchanged
-2. Maintain the same tone and style
-3. Ensure natural, app-appropriate translations
-4. Return ONLY the JSON object, no explanations
+        Languages that need exactly the same keys share requests. A language
+        whose slice of a response fails validation is split back into the
+        regular single-language path for that batch.
+        """
+        start_time = time.perf_counter()
+        stats = {'calls': 0, 'input_tokens': 0, 'billed_input_tokens': 0, 'per_locale_input_tokens': 0, 'split_back': 0}
+        
+        results = {}
+        pending = {}
+        for language_code, texts in jobs.items():
+            results[language_code], pending[language_code] = self._recall(texts, language_code)
+        
+        # Group languages by the exact key list they still need
+        groups: Dict[Tuple[str, ...], List[str]] = {}
+        for language_code, texts in pending.items():
+            if texts:
+                groups.setdefault(tuple(texts), []).append(language_code)
+        
+        for group_languages in groups.values():
+            text_items = list(pending[group_languages[0]].items())
+            batches = [dict(text_items[i:i + batch_size]) for i in range(0, len(text_items), batch_size)]
+            language_chunks = [group_languages[i:i + locales_per_call] for i in range(0, len(group_languages), locales_per_call)]
+            
+            logger.info(f"Translating {len(text_items)} texts to {len(group_languages)} languages in "
+                        f"{len(batches) * len(language_chunks)} multi-target calls")
+            
+            for batch_idx, batch_texts in enumerate(batches, 1):
+                for language_chunk in language_chunks:
+                    for language_code in language_chunk:
+                        language_name = self.language_names.get(language_code, language_code)
+                        stats['per_locale_input_tokens'] += estimate_prompt_tokens(
+                            self._batch_request_kwargs(batch_texts, language_name)['messages'])
+                    
+                    slices = self._try_multi_target_batch(batch_texts, language_chunk, batch_idx, stats)
+                    
+                    for language_code in language_chunk:
+                        if language_code in slices:
+                            results[language_code].update(slices[language_code])
+                            self._note(language_code, slices[language_code], 'multi')
+                            self._remember_batch(batch_texts, slices[language_code], language_code)
+                            self._checkpoint(batch_texts, slices[language_code], language_code)
+                            continue
+                        
+                        logger.warning(f"⚠️ Multi-target batch {batch_idx} invalid for {language_code}, splitting back to a single-language batch")
+                        stats['split_back'] += 1
+                        language_name = self.language_names.get(language_code, language_code)
+                        batch_translations, _ = self._translate_one_batch(batch_texts, language_code, language_name, batch_idx)
+                        results[language_code].update(batch_translations)
+                        self._checkpoint(batch_texts, batch_translations, language_code)
+        
+        elapsed = time.perf_counter() - start_time
+        saved = stats['per_locale_input_tokens'] - stats['input_tokens']
+        saved_pct = (saved / stats['per_locale_input_tokens']) * 100 if stats['per_locale_input_tokens'] else 0
+        
+        logger.info(f"📊 Multi-target Summary:")
+        logger.info(f"   - Multi-target calls: {stats['calls']}")
+        logger.info(f"   - Language slices split back: {stats['split_back']}")
+        logger.info(f"   - Estimated input tokens: {stats['input_tokens']} (per-language path: {stats['per_locale_input_tokens']})")
+        logger.info(f"   - Estimated input tokens saved: {saved} ({saved_pct:.1f}%)")
+        if stats['billed_input_tokens']:
+            logger.info(f"   - Billed input tokens: {stats['billed_input_tokens']}")
+        logger.info(f"   - Wall-clock time: {elapsed:.1f}s")
+        
+        self.multi_target_stats = {**stats, 'elapsed': elapsed}
+        return results
 
-JSON response:"""
+    def _parse_json_response(self, response_text: str, original_texts: Dict[str, str], call=None) -> Optional[Dict[str, str]]:
+        """Parse JSON response with multiple fallback strategies.
 
-    def _parse_json_response(self, response_text: str, original_texts: Dict[str, str]) -> Optional[Dict[str, str]]:
-        """Parse JSON response with multiple fallback strategies."""
+        The strategy that worked (``direct``, ``extracted``, ``fenced`` or
+        ``invalid``) is noted on ``call`` when a call trace is given.
+        """
+        if call is not None:
+            call.parse = 'invalid'
         
         # Strategy 1: Direct JSON parsing
         try:
-            translations = json.loads(response_text)
+            translations = from_wire(json.loads(response_text), original_texts)
             if self._validate_translations(translations, original_texts):
+                if call is not None:
+                    call.parse = 'direct'
                 return translations
         except json.JSONDecodeError:
             pass
@@ -189,8 +606,10 @@ JSON response:"""
             
             if start_idx != -1 and end_idx > start_idx:
                 json_text = response_text[start_idx:end_idx]
-                translations = json.loads(json_text)
+                translations = from_wire(json.loads(json_text), original_texts)
                 if self._validate_translations(translations, original_texts):
+                    if call is not None:
+                        call.parse = 'extracted'
                     return translations
         except (json.JSONDecodeError, ValueError):
             pass
@@ -204,8 +623,10 @@ JSON response:"""
             if cleaned.endswith('```'):
                 cleaned = cleaned[:-3]
             
-            translations = json.loads(cleaned)
+            translations = from_wire(json.loads(cleaned), original_texts)
             if self._validate_translations(translations, original_texts):
+                if call is not None:
+                    call.parse = 'fenced'
                 return translations
         except (json.JSONDecodeError, ValueError):
             pass
@@ -213,7 +634,7 @@ JSON response:"""
         return None
 
     def _validate_translations(self, translations: Dict[str, str], original_texts: Dict[str, str]) -> bool:
-        """Validate that all required keys are present in translations."""
+        """Validate that all required keys are present in translations with their placeholders intact."""
         if not isinstance(translations, dict):
             return False
         
@@ -221,101 +642,122 @@ JSON response:"""
         for key in original_texts.keys():
             if key not in translations:
                 return False
+            if not is_usable(translations[key], original_texts[key]):
+                return False
         
         return True
 
-    def _translate_single_optimized(self, text: str, target_language: str, language_name: str) -> str:
+    def _translate_single_optimized(self, text: str, target_language: str, language_name: str) -> Optional[str]:
         """Optimized single text translation."""
         try:
-            prompt = f"""Translate to {language_name}: "{text}"
-Return only the translation."""
-
-            response = self.client.chat.completions.create(
-                model=self.deployment_name,
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.3,
-                max_tokens=200,
-                timeout=30
-            )
-            
-            translation = response.choices[0].message.content.strip()
+            with self.metrics.call(target_language, 'single') as call:
+                response = self.rate_limiter.create(self.client, self._single_request_kwargs(text, language_name), call)
             
             # Clean up common issues
-            if translation.startswith('"') and translation.endswith('"'):
-                translation = translation[1:-1]
-            
-            return translation
+            return self._clean_single_translation(response.choices[0].message.content)
             
         except Exception as e:
             logger.error(f"Single translation failed for '{text}': {str(e)}")
-            return text  # Return original as fallback
+            return None  # The caller keeps the original and records an error
+
+    def _corpus_for(self, file_path: str, reload: bool = False) -> ArbCorpus:
+        """The loaded ARB corpus containing ``file_path``, reading its directory once."""
+        if reload or self.corpus is None or self.corpus.locale_for(file_path) is None:
+            self.corpus = ArbCorpus.load(str(Path(file_path).parent))
+        return self.corpus
 
     def get_missing_keys(self, base_file: str, target_files: List[str]) -> List[str]:
         """Get the list of keys that are missing from target files."""
         logger.info(f"Reading base file: {base_file}")
         
-        with open(base_file, 'r', encoding='utf-8') as f:
-            base_data = json.load(f)
-        
-        base_keys = set(base_data.keys())
-        missing_keys = []
+        corpus = self._corpus_for(base_file)
+        missing_keys = set()
         
         for target_file in target_files:
-            if not os.path.exists(target_file):
+            language_code = corpus.locale_for(target_file)
+            if language_code is None:
                 logger.warning(f"Target file not found: {target_file}")
                 continue
-                
-            with open(target_file, 'r', encoding='utf-8') as f:
-                target_data = json.load(f)
-            
-            target_keys = set(target_data.keys())
-            file_missing = base_keys - target_keys
             
+            file_missing = corpus.missing_keys(language_code)
             if file_missing:
                 logger.info(f"Missing keys in {target_file}: {len(file_missing)} keys")
-                missing_keys.extend(list(file_missing))
+                missing_keys.update(file_missing)
         
         # Remove duplicates and sort
-        missing_keys = sorted(list(set(missing_keys)))
+        missing_keys = sorted(missing_keys)
         logger.info(f"Total unique missing keys: {len(missing_keys)}")
         return missing_keys
 
-    def update_language_file(self, file_path: str, new_translations: Dict[str, str], missing_keys: List[str]) -> bool:
-        """Update a language file with new translations."""
+    def update_language_file(self, file_path: str, new_translations: Dict[str, str], missing_keys: List[str],
+                             changed_keys: List[str] = None) -> bool:
+        """Update a language file with new translations.
+
+        Missing keys are added; ``changed_keys`` already exist in the file and
+        are overwritten because their English source was edited. The file is
+        replaced atomically. Returns False if it could not be updated.
+        """
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            corpus = self._corpus_for(file_path)
+            language_code = locale_of(file_path)
+            data = corpus.data(language_code)
             
-            updated = False
+            updated_count = 0
             for key in missing_keys:
                 if key in new_translations and key not in data:
                     data[key] = new_translations[key]
-                    updated = True
+                    updated_count += 1
+            for key in changed_keys or []:
+                if key in new_translations and data.get(key) != new_translations[key]:
+                    data[key] = new_translations[key]
+                    updated_count += 1
             
-            if updated:
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    json.dump(data, f, ensure_ascii=False, indent='\t')
-                logger.info(f"Updated {file_path} with {len([k for k in missing_keys if k in new_translations])} new translations")
-                return True
+            if updated_count:
+                corpus.write(language_code, data)
+                logger.info(f"Updated {file_path} with {updated_count} new translations")
             else:
                 logger.info(f"No updates needed for {file_path}")
-                return False
+            return True
                 
         except Exception as e:
             logger.error(f"Failed to update {file_path}: {str(e)}")
             return False
 
-    def process_language_files(self, l10n_dir: str, languages_to_process: List[str] = None, batch_size: int = 30):
-        """Process all language files with optimized translation."""
+    def process_language_files(self, l10n_dir: str, languages_to_process: List[str] = None, batch_size: int = 30,
+                               concurrency: int = 0, per_locale_concurrency: int = 4,
+                               changed_only: bool = False, manifest: Optional[SyncManifest] = None,
+                               locales_per_call: int = 1, retry_untrusted: bool = False,
+                               queue: Optional[WorkQueue] = None):
+        """Process all language files with optimized translation.
+
+        With ``concurrency`` > 0 the batches of every locale are sent through
+        the asyncio engine instead of one blocking call at a time. With
+        ``changed_only`` keys whose English value changed since the locale's
+        last sync (according to ``manifest``) are retranslated as well as the
+        missing ones. With ``locales_per_call`` > 1 each batch is translated
+        into that many languages per API call. With ``retry_untrusted`` keys
+        whose provenance says they came from the single-key fallback, or are
+        still the English text after it failed, are requested again. With a
+        ``queue`` the work is only planned and enqueued for ``process_queue``
+        workers.
+        """
         l10n_path = Path(l10n_dir)
         base_file = l10n_path / "intl_en.arb"
         
         if not base_file.exists():
             raise FileNotFoundError(f"Base file not found: {base_file}")
         
+        if changed_only and manifest is None:
+            raise ValueError("changed_only requires a sync manifest")
+        
+        if retry_untrusted and self.provenance is None:
+            raise ValueError("retry_untrusted requires a provenance store")
+        
+        # Read every language file once
+        corpus = self._corpus_for(str(base_file), reload=True)
+        
         # Get all language files
-        all_files = list(l10n_path.glob("intl_*.arb"))
-        target_files = [f for f in all_files if f.name != "intl_en.arb"]
+        target_files = sorted(corpus.paths[language_code] for language_code in corpus.target_locales)
         
         # Filter by specified languages
         if languages_to_process:
@@ -323,35 +765,253 @@ Return only the translation."""
         
         logger.info(f"Found {len(target_files)} target language files")
         
-        # Read base file
-        with open(base_file, 'r', encoding='utf-8') as f:
-            base_data = json.load(f)
-        
-        base_keys = set(base_data.keys())
+        base_data = corpus.data(corpus.base_locale)
+        base_hashes = SyncManifest.hash_source(base_data) if manifest is not None else {}
         
-        # Process each language file
+        # Collect the keys to translate for every language file, in base file
+        # order so the keys are appended to each file deterministically
+        jobs = {}
+        plans = {}
         for target_file in target_files:
-            language_code = target_file.stem.replace('intl_', '')
+            language_code = locale_of(target_file)
             logger.info(f"Processing language: {language_code}")
             
             # Get missing keys for this specific file
-            with open(target_file, 'r', encoding='utf-8') as f:
-                target_data = json.load(f)
+            file_missing_keys = corpus.missing_keys(language_code)
+            file_changed_keys = []
+            if changed_only:
+                if manifest.has_locale(language_code):
+                    file_changed_keys = corpus.changed_keys(language_code, manifest, base_hashes)
+                else:
+                    logger.info(f"No sync record for {language_code}; assuming existing translations match intl_en.arb")
+            if retry_untrusted:
+                target_data = corpus.data(language_code)
+                untrusted = [key for key in self.provenance.untrusted(language_code)
+                             if key in base_data and key in target_data and key not in file_changed_keys]
+                if untrusted:
+                    logger.info(f"Retrying {len(untrusted)} fallback translations for {language_code}")
+                    file_changed_keys = file_changed_keys + untrusted
             
-            target_keys = set(target_data.keys())
-            file_missing_keys = base_keys - target_keys
+            if self.usage:
+                file_missing_keys = self.usage.skip_unused(file_missing_keys)
+                file_changed_keys = self.usage.skip_unused(file_changed_keys)
             
-            if file_missing_keys:
-                texts_to_translate = {key: base_data[key] for key in file_missing_keys if key in base_data}
-                
-                if texts_to_translate:
-                    logger.info(f"Translating {len(texts_to_translate)} missing keys for {language_code}")
-                    new_translations = self.translate_batch_optimized(texts_to_translate, language_code, batch_size)
-                    self.update_language_file(str(target_file), new_translations, list(file_missing_keys))
-                else:
-                    logger.info(f"No texts to translate for {language_code}")
+            plans[language_code] = {
+                'path': str(target_file),
+                'missing': file_missing_keys,
+                'changed': file_changed_keys,
+                'target_keys': corpus.keys_of(language_code),
+            }
+            
+            if file_missing_keys or file_changed_keys:
+                logger.info(f"Translating {len(file_missing_keys)} missing and {len(file_changed_keys)} changed keys for {language_code}")
+                keys_to_translate = set(file_missing_keys) | set(file_changed_keys)
+                jobs[language_code] = {key: base_data[key] for key in base_data if key in keys_to_translate}
             else:
                 logger.info(f"No missing keys for {language_code}")
+        
+        def finish_locale(language_code: str, new_translations: Dict[str, str]):
+            self._write_locale(language_code, plans[language_code], new_translations, base_data,
+                               self.methods.pop(language_code, {}), manifest, base_hashes)
+        
+        if queue is not None:
+            if jobs:
+                queue.enqueue({language_code: plans[language_code] for language_code in jobs}, jobs,
+                              base_hashes, batch_size)
+        elif jobs:
+            self._translate_jobs(jobs, batch_size, concurrency, per_locale_concurrency, finish_locale, locales_per_call)
+        
+        if queue is not None:
+            # Workers save the manifest and provenance under the queue's write lock; update the copies on disk under it too
+            with queue.write_lock():
+                self._update_run_state(SyncManifest(str(manifest.path)) if manifest is not None else None,
+                                       ProvenanceStore(str(self.provenance.directory)) if self.provenance else None,
+                                       plans, jobs, base_data, base_hashes)
+        else:
+            self._update_run_state(manifest, self.provenance, plans, jobs, base_data, base_hashes)
+        
+        if queue is None:
+            self._log_summaries()
+
+    def _update_run_state(self, manifest: Optional[SyncManifest], provenance: Optional[ProvenanceStore],
+                          plans: Dict[str, Dict], jobs: Dict[str, Dict[str, str]], base_data: Dict[str, str],
+                          base_hashes: Dict[str, str]):
+        """Mark the locales without work as synced and drop the provenance of keys removed from English."""
+        if manifest is not None:
+            for language_code, plan in plans.items():
+                if language_code not in jobs:
+                    manifest.mark_synced(language_code, base_hashes, plan['target_keys'])
+            manifest.save()
+        if provenance is not None:
+            for language_code in plans:
+                provenance.forget(language_code, [key for key in provenance.entries(language_code) if key not in base_data])
+            provenance.save()
+
+    def _write_locale(self, language_code: str, plan: Dict, new_translations: Dict[str, str], sources: Dict[str, str],
+                      methods: Dict[str, str], manifest: Optional[SyncManifest], base_hashes: Dict[str, str]) -> bool:
+        """Write a language's new translations and record them in the sync manifest and provenance.
+
+        Returns False when the file could not be written.
+        """
+        if not self.update_language_file(plan['path'], new_translations, plan['missing'], plan['changed']):
+            # Nothing was written: keep the journal and leave the keys unsynced for the next run
+            return False
+        if self.checkpoint:
+            self.checkpoint.clear(language_code)
+        if manifest is not None:
+            manifest.mark_synced(language_code, base_hashes, plan['target_keys'], new_translations.keys())
+        if self.provenance:
+            self.provenance.record(language_code, new_translations, sources, methods,
+                                   self.deployment_name, self.PROMPT_VERSION)
+            self.provenance.save()
+        return True
+
+    def process_queue(self, queue: WorkQueue, batch_size: int = 30, concurrency: int = 0,
+                      per_locale_concurrency: int = 4, manifest_path: Optional[str] = None,
+                      poll_interval: float = 5.0, wait_for_job: float = 60.0):
+        """Work on the newest open job of a shared queue until every one of its languages is written.
+
+        Each round claims one unit, or ``concurrency`` units sent through the
+        asyncio engine. Languages whose units are all done are written by
+        whichever worker notices first, starting from the sync manifest on
+        disk since other workers update it too. A worker started before the
+        coordinator enqueued the job waits up to ``wait_for_job`` seconds.
+        """
+        job = queue.active_job()
+        deadline = time.monotonic() + wait_for_job
+        while job is None and time.monotonic() < deadline:
+            time.sleep(poll_interval)
+            job = queue.active_job()
+        if job is None:
+            logger.info("No open job in the work queue")
+            return
+        
+        logger.info(f"Working on job {job} as {queue.worker_id}")
+        queue.start_heartbeat()
+        
+        def write(language_code: str, plan: Dict, sources: Dict[str, str], translations: Dict[str, str],
+                  methods: Dict[str, str], base_hashes: Dict[str, str]) -> bool:
+            manifest = SyncManifest(manifest_path) if manifest_path else None
+            if not self._write_locale(language_code, plan, translations, sources, methods, manifest, base_hashes):
+                return False
+            if manifest is not None:
+                manifest.save()
+            return True
+        
+        while True:
+            units = queue.claim(job, max(1, concurrency))
+            if units:
+                self._translate_units(queue, units, batch_size, concurrency, per_locale_concurrency)
+            queue.write_finished(job, write)
+            if queue.is_done(job):
+                break
+            if not units:
+                # The rest is claimed by other workers; units of a crashed worker come back when its lease runs out
+                time.sleep(poll_interval)
+        
+        self._log_summaries()
+        queue.log_summary()
+
+    def _translate_units(self, queue: WorkQueue, units: List[WorkUnit], batch_size: int, concurrency: int,
+                         per_locale_concurrency: int):
+        """Translate claimed units, grouped per language, and store each unit's result in the queue."""
+        jobs: Dict[str, Dict[str, str]] = {}
+        for unit in units:
+            jobs.setdefault(unit.locale, {}).update(unit.texts)
+        
+        results: Dict[str, Dict[str, str]] = {}
+        try:
+            self._translate_jobs(jobs, batch_size, concurrency, per_locale_concurrency,
+                                 lambda language_code, translations: results.__setitem__(language_code, translations))
+        except BaseException:
+            # Hand the units back at once instead of waiting for the lease to run out
+            queue.release(units)
+            raise
+        
+        for unit in units:
+            translations = results.get(unit.locale, {})
+            methods = self.methods.get(unit.locale, {})
+            queue.complete(unit, {key: translations[key] for key in unit.texts if key in translations},
+                           {key: methods[key] for key in unit.texts if key in methods})
+        for language_code in jobs:
+            self.methods.pop(language_code, None)
+
+    def _log_summaries(self):
+        self.recovery_stats.log_summary()
+        self.rate_limiter.log_summary()
+        self.metrics.log_summary()
+        self.transport.log_summary()
+        if self.dedup:
+            self.dedup.log_summary()
+        if self.placeholders:
+            self.placeholders.log_summary()
+        
+        if self.provenance:
+            self.provenance.log_summary()
+        if self.usage:
+            self.usage.log_summary()
+        if self.fuzzy:
+            self.fuzzy.log_summary()
+        
+        if self.translation_memory:
+            self.translation_memory.log_summary()
+
+    def _translate_jobs(self, jobs: Dict[str, Dict[str, str]], batch_size: int, concurrency: int, per_locale_concurrency: int,
+                        on_locale_done: Callable[[str, Dict[str, str]], None], locales_per_call: int = 1):
+        """Translate the collected jobs serially, through the asyncio engine or in multi-target calls."""
+        if self.fuzzy:
+            # Keys whose English matches an already translated string take its translation without a call
+            reused = {language_code: self.fuzzy.reuse(texts, language_code) for language_code, texts in jobs.items()}
+            jobs = {language_code: {key: text for key, text in texts.items() if key not in reused[language_code]}
+                    for language_code, texts in jobs.items()}
+            finish_fuzzy = on_locale_done
+            
+            def on_locale_done(language_code: str, new_translations: Dict[str, str]):
+                self._note(language_code, reused[language_code], 'fuzzy')
+                finish_fuzzy(language_code, {**new_translations, **reused[language_code]})
+            
+            for language_code in [language_code for language_code, texts in jobs.items() if not texts]:
+                logger.info(f"🔎 All {len(reused[language_code])} texts for {language_code} reused from existing translations")
+                del jobs[language_code]
+                on_locale_done(language_code, {})
+        
+        if self.dedup:
+            # Send each distinct source string once per language and fan the results back out
+            plans = {language_code: self.dedup.plan(texts, language_code) for language_code, texts in jobs.items()}
+            jobs = {language_code: plan.unique for language_code, plan in plans.items()}
+            finish_locale = on_locale_done
+            
+            def on_locale_done(language_code: str, new_translations: Dict[str, str]):
+                plan = plans[language_code]
+                # Keys fanned out from a representative share how it was translated
+                methods = self.methods.setdefault(language_code, {})
+                for keys in plan.members.values():
+                    if keys[0] in methods:
+                        self._note(language_code, keys[1:], methods[keys[0]])
+                finish_locale(language_code, plan.expand(new_translations))
+        
+        if self.placeholders:
+            # Mask after deduplication so the grouping sees the English text
+            sources = jobs
+            jobs = {language_code: self.placeholders.mask_texts(texts, language_code) for language_code, texts in sources.items()}
+            finish_unmasked = on_locale_done
+            
+            def on_locale_done(language_code: str, new_translations: Dict[str, str]):
+                finish_unmasked(language_code, self.placeholders.unmask_translations(
+                    sources[language_code], new_translations, language_code))
+        
+        if locales_per_call > 1:
+            if concurrency > 0:
+                logger.warning("Multi-target mode runs serially; ignoring --concurrency")
+            for language_code, new_translations in self.translate_multi_target(jobs, batch_size, locales_per_call).items():
+                on_locale_done(language_code, new_translations)
+        elif concurrency > 0:
+            engine = AsyncTranslationEngine(self, max_in_flight=concurrency, per_locale_limit=per_locale_concurrency)
+            engine.translate_all(jobs, batch_size, on_locale_done=on_locale_done)
+        else:
+            for language_code, texts_to_translate in jobs.items():
+                new_translations = self.translate_batch_optimized(texts_to_translate, language_code, batch_size)
+                on_locale_done(language_code, new_translations)
 
 def main():
     parser = argparse.ArgumentParser(description='Optimized translation script')
@@ -361,17 +1021,133 @@ def main():
     parser.add_argument('--azure-endpoint', help='Azure OpenAI endpoint')
     parser.add_argument('--api-key', help='Azure OpenAI API key')
     parser.add_argument('--deployment-name', help='Azure OpenAI deployment name')
+    parser.add_argument('--concurrency', type=int, default=0,
+                        help='Maximum API calls in flight across all languages (default: 0, serial)')
+    parser.add_argument('--per-locale-concurrency', type=int, default=4,
+                        help='Maximum API calls in flight per language when --concurrency is set (default: 4)')
+    parser.add_argument('--cache-db', default=str(DEFAULT_CACHE_PATH),
+                        help='Translation memory database (default: .l10n_state/translation_memory.sqlite3)')
+    parser.add_argument('--cache-max-entries', type=int, default=DEFAULT_MAX_ENTRIES,
+                        help=f'Maximum translation memory entries before LRU eviction (default: {DEFAULT_MAX_ENTRIES})')
+    parser.add_argument('--no-cache', action='store_true', help='Do not read or write the translation memory')
+    parser.add_argument('--checkpoint-dir', default=str(DEFAULT_CHECKPOINT_DIR / 'translate_optimized'),
+                        help='Journal of completed batches used to resume an interrupted run '
+                             '(default: .l10n_state/checkpoints/translate_optimized)')
+    parser.add_argument('--no-checkpoint', action='store_true', help='Do not journal batches or resume interrupted runs')
+    parser.add_argument('--tpm', type=int, default=int(os.getenv('AZURE_OPENAI_TPM', 0)),
+                        help='Deployment tokens-per-minute quota to pace calls to (default: $AZURE_OPENAI_TPM or unlimited)')
+    parser.add_argument('--rpm', type=int, default=int(os.getenv('AZURE_OPENAI_RPM', 0)),
+                        help='Deployment requests-per-minute quota (default: $AZURE_OPENAI_RPM, or 6 per 1000 TPM)')
+    parser.add_argument('--adaptive-batching', action='store_true',
+                        help='Pack batches by estimated tokens and shrink/grow them on truncated or invalid responses; '
+                             '--batch-size becomes the maximum keys per batch')
+    parser.add_argument('--locales-per-call', type=int, default=1,
+                        help='Translate each batch into this many languages per API call (default: 1)')
+    parser.add_argument('--changed-only', action='store_true',
+                        help='Also retranslate keys whose English value changed since the last sync')
+    parser.add_argument('--manifest', default=str(DEFAULT_MANIFEST_PATH),
+                        help='Sync manifest of English source hashes (default: .l10n_state/sync_manifest.json)')
+    parser.add_argument('--no-dedup', action='store_true',
+                        help='Send every key even when another key has the same English text')
+    parser.add_argument('--dedup-exclude-file', default=str(DEFAULT_EXCLUDE_FILE),
+                        help='Keys or glob patterns that are never merged with other keys (default: scripts/dedup_exclude.txt)')
+    parser.add_argument('--provenance-dir', default=str(DEFAULT_PROVENANCE_DIR),
+                        help='Per-language record of how each translation was produced (default: .l10n_state/provenance)')
+    parser.add_argument('--retry-untrusted', action='store_true',
+                        help='Also retranslate keys the provenance records as single-key fallbacks or errors')
+    parser.add_argument('--skip-unused', action='store_true',
+                        help='Leave out keys that no Dart file of the app uses, according to the usage index '
+                             'of dart_usage.py')
+    parser.add_argument('--fuzzy', action='store_true',
+                        help='Index the existing translations by character n-grams: reuse the translation of an '
+                             'identical English string and send the nearest ones as examples with each batch')
+    parser.add_argument('--fuzzy-reuse', type=float, default=DEFAULT_REUSE_THRESHOLD,
+                        help=f'With --fuzzy: similarity from which a match is reused without a call; above 1 never '
+                             f'(default: {DEFAULT_REUSE_THRESHOLD})')
+    parser.add_argument('--fuzzy-hint', type=float, default=DEFAULT_HINT_THRESHOLD,
+                        help=f'With --fuzzy: similarity from which a match is sent as an example (default: {DEFAULT_HINT_THRESHOLD})')
+    parser.add_argument('--no-mask-placeholders', action='store_true',
+                        help='Send {placeholders} and ICU plural/select syntax as they are instead of as opaque tags')
+    parser.add_argument('--stream', action='store_true',
+                        help='Stream batch responses, keeping each key as soon as it arrives and the keys '
+                             'received before a truncated or timed-out response ends')
+    parser.add_argument('--max-connections', type=int, default=0,
+                        help='Connection pool size; every connection is kept alive between calls. '
+                             'Setting it also sends --concurrency calls through this pool instead of '
+                             "the SDK's own client (default: --concurrency, at least 32)")
+    parser.add_argument('--http2', action='store_true',
+                        help='Multiplex requests over HTTP/2 connections (needs: pip install "httpx[http2]")')
+    parser.add_argument('--connect-timeout', type=float, default=DEFAULT_CONNECT_TIMEOUT,
+                        help=f'Seconds allowed to open a connection (default: {DEFAULT_CONNECT_TIMEOUT:.0f})')
+    parser.add_argument('--read-timeout', type=float, default=0,
+                        help='Seconds to wait for a response, for every kind of request '
+                             '(default: 90 per batch, 30 per single text, more for multi-target calls)')
+    parser.add_argument('--queue', nargs='?', const=str(DEFAULT_QUEUE_PATH),
+                        help='Share the run with other processes or machines through this SQLite work queue '
+                             '(default path: .l10n_state/work_queue.sqlite3); use with --enqueue and/or --worker')
+    parser.add_argument('--enqueue', action='store_true',
+                        help='With --queue: plan the run and enqueue it as (language, batch) units for workers')
+    parser.add_argument('--worker', action='store_true',
+                        help='With --queue: claim and translate units of the newest job until all of its languages are written')
+    parser.add_argument('--worker-id', help='Name of this worker in the queue (default: host:pid)')
+    parser.add_argument('--lease', type=float, default=DEFAULT_LEASE_SECONDS,
+                        help=f'Seconds before the claims of a worker that stopped renewing them are handed out again '
+                             f'(default: {DEFAULT_LEASE_SECONDS})')
+    parser.add_argument('--metrics-trace', help='Append one JSON line per API call to this file')
+    parser.add_argument('--metrics-prom', help='Write per-locale call, token and time totals as a Prometheus textfile')
+    parser.add_argument('--input-cost', type=float, default=float(os.getenv('AZURE_OPENAI_INPUT_COST', 0)),
+                        help='Price per 1K prompt tokens for the cost column (default: $AZURE_OPENAI_INPUT_COST or 0)')
+    parser.add_argument('--output-cost', type=float, default=float(os.getenv('AZURE_OPENAI_OUTPUT_COST', 0)),
+                        help='Price per 1K completion tokens (default: $AZURE_OPENAI_OUTPUT_COST or 0)')
     
     args = parser.parse_args()
+    if args.queue and not (args.enqueue or args.worker):
+        parser.error("--queue needs --enqueue, --worker or both")
     
     try:
+        translation_memory = None if args.no_cache else TranslationMemory(args.cache_db, args.cache_max_entries)
+        
+        metrics = CallMetrics(args.metrics_trace, args.input_cost, args.output_cost)
+        
+        # The queue holds every finished unit, so it replaces the per-process checkpoint
+        queue = WorkQueue(args.queue, args.worker_id, args.lease) if args.queue else None
+        
         translator = OptimizedTranslator(
             azure_endpoint=args.azure_endpoint,
             api_key=args.api_key,
-            deployment_name=args.deployment_name
+            deployment_name=args.deployment_name,
+            translation_memory=translation_memory,
+            adaptive_batching=args.adaptive_batching,
+            rate_limiter=RateLimiter.from_quota(args.tpm, args.rpm),
+            checkpoint_dir=None if args.no_checkpoint or queue else args.checkpoint_dir,
+            metrics=metrics,
+            stream=args.stream,
+            dedup=None if args.no_dedup else SourceDeduplicator(load_exclusions(args.dedup_exclude_file)),
+            placeholders=None if args.no_mask_placeholders else PlaceholderMasker(),
+            provenance=ProvenanceStore(args.provenance_dir),
+            usage=UsageIndex.build() if args.skip_unused else None,
+            fuzzy=FuzzyMemory.from_corpus(ArbCorpus.load(args.l10n_dir), reuse_threshold=args.fuzzy_reuse,
+                                          hint_threshold=args.fuzzy_hint) if args.fuzzy else None,
+            transport=HttpTransport.for_concurrency(args.concurrency, args.max_connections, http2=args.http2,
+                                                    connect_timeout=args.connect_timeout,
+                                                    read_timeout=args.read_timeout or None)
         )
         
-        translator.process_language_files(args.l10n_dir, args.languages, args.batch_size)
+        if queue is None or args.enqueue:
+            translator.process_language_files(args.l10n_dir, args.languages, args.batch_size,
+                                              args.concurrency, args.per_locale_concurrency,
+                                              args.changed_only, SyncManifest(args.manifest),
+                                              args.locales_per_call, args.retry_untrusted, queue)
+        if queue is not None:
+            if args.worker:
+                translator.process_queue(queue, args.batch_size, args.concurrency, args.per_locale_concurrency,
+                                         args.manifest)
+            queue.close()
+        
+        if args.metrics_prom:
+            metrics.write_prometheus(args.metrics_prom)
+        metrics.close()
+        translator.transport.close()
         
     except Exception as e:
         logger.error(f"Script failed: {str(e)}")
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Persistent translation memory shared by the translation scripts
+"""
+
+import hashlib
+import logging
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Local run state lives next to the scripts, outside lib/ (which is bundled as app assets)
+STATE_DIR = Path(__file__).resolve().parent.parent / '.l10n_state'
+DEFAULT_CACHE_PATH = STATE_DIR / 'translation_memory.sqlite3'
+DEFAULT_MAX_ENTRIES = 200000
+
+class TranslationMemory:
+    """SQLite-backed cache of translations with LRU eviction.
+
+    Entries are keyed by a hash of (source text, target locale, deployment
+    name, prompt version), so changing the model deployment or bumping a
+    script's prompt version naturally invalidates old results.
+    """
+
+    def __init__(self, db_path: str = None, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.db_path = Path(db_path) if db_path else DEFAULT_CACHE_PATH
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+        self.conn = sqlite3.connect(str(self.db_path))
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS translations (
+                entry_hash TEXT PRIMARY KEY,
+                locale TEXT NOT NULL,
+                translation TEXT NOT NULL,
+                last_used REAL NOT NULL
+            )
+        ''')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS idx_translations_last_used ON translations (last_used)')
+        self.conn.commit()
+
+    @staticmethod
+    def entry_hash(source_text: str, locale: str, deployment_name: str, prompt_version: str) -> str:
+        """Hash the fields that determine a translation."""
+        digest = hashlib.sha256()
+        for part in (source_text, locale, deployment_name, prompt_version):
+            digest.update(part.encode('utf-8'))
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+    def lookup_many(self, texts: Dict[str, str], locale: str, deployment_name: str,
+                    prompt_version: str) -> Tuple[Dict[str, str], Dict[str, str]]:
+        """Split ``{key: source}`` into cached translations and texts still to translate."""
+        hashes = {key: self.entry_hash(text, locale, deployment_name, prompt_version) for key, text in texts.items()}
+
+        found = {}
+        unique_hashes = list(set(hashes.values()))
+        # Stay well below SQLite's bound parameter limit
+        for i in range(0, len(unique_hashes), 500):
+            chunk = unique_hashes[i:i + 500]
+            placeholders = ','.join('?' * len(chunk))
+            rows = self.conn.execute(
+                f'SELECT entry_hash, translation FROM translations WHERE entry_hash IN ({placeholders})', chunk)
+            found.update(rows.fetchall())
+
+        cached = {}
+        missing = {}
+        for key, text in texts.items():
+            if hashes[key] in found:
+                cached[key] = found[hashes[key]]
+            else:
+                missing[key] = text
+
+        if found:
+            now = time.time()
+            self.conn.executemany('UPDATE translations SET last_used = ? WHERE entry_hash = ?',
+                                  [(now, entry_hash) for entry_hash in found])
+            self.conn.commit()
+
+        self.hits += len(cached)
+        self.misses += len(missing)
+        return cached, missing
+
+    def store_many(self, texts: Dict[str, str], translations: Dict[str, str], locale: str,
+                   deployment_name: str, prompt_version: str):
+        """Remember the translations of ``{key: source}`` texts."""
+        now = time.time()
+        rows = [
+            (self.entry_hash(text, locale, deployment_name, prompt_version), locale, translations[key], now)
+            for key, text in texts.items()
+            if isinstance(translations.get(key), str)
+        ]
+        if not rows:
+            return
+
+        self.conn.executemany('INSERT OR REPLACE INTO translations VALUES (?, ?, ?, ?)', rows)
+        self.conn.commit()
+        self.stores += len(rows)
+        self._evict()
+
+    def _evict(self):
+        """Drop the least recently used entries beyond ``max_entries``."""
+        (count,) = self.conn.execute('SELECT COUNT(*) FROM translations').fetchone()
+        excess = count - self.max_entries
+        if excess <= 0:
+            return
+
+        self.conn.execute('''
+            DELETE FROM translations WHERE entry_hash IN (
+                SELECT entry_hash FROM translations ORDER BY last_used ASC LIMIT ?
+            )
+        ''', (excess,))
+        self.conn.commit()
+        self.evictions += excess
+
+    def log_summary(self):
+        """Log the hit/miss counters for the end-of-run summary."""
+        total = self.hits + self.misses
+        hit_rate = (self.hits / total) * 100 if total > 0 else 0
+
+        logger.info(f"🗄️ Translation Memory Summary:")
+        logger.info(f"   - Cache hits: {self.hits}")
+        logger.info(f"   - Cache misses: {self.misses}")
+        logger.info(f"   - Hit rate: {hit_rate:.1f}%")
+        logger.info(f"   - Stored entries: {self.stores}")
+        logger.info(f"   - Evicted entries: {self.evictions}")
+
+    def close(self):
+        self.conn.close()
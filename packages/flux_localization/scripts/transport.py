@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Pooled HTTP transport shared by the Azure OpenAI clients of a run
+"""
+
+import importlib
+import logging
+import threading
+from collections import Counter
+from typing import Optional
+
+import openai
+
+logger = logging.getLogger(__name__)
+
+def _sdk_httpx():
+    """The httpx package the installed openai SDK is built on: httpx2 in recent releases, httpx before.
+
+    The SDK only accepts clients of its own package, and httpcore 1.0 under
+    the legacy httpx rescans every pooled connection on each request, which
+    made pools of 64 connections several times slower than the SDK's client.
+    """
+    base = getattr(openai, 'DefaultAsyncHttpxClient', None)
+    if base is None:
+        return importlib.import_module('httpx')
+    return importlib.import_module(base.__mro__[1].__module__.split('.')[0])
+
+httpx = _sdk_httpx()
+
+# Connections kept per pool; raised to the run's concurrency when that is higher
+DEFAULT_MAX_CONNECTIONS = 32
+# Idle connections are closed after this many seconds
+DEFAULT_KEEPALIVE_EXPIRY = 60.0
+# Time allowed for the TCP and TLS handshake of a new connection
+DEFAULT_CONNECT_TIMEOUT = 10.0
+# httpcore trace events marking a new connection and its TLS handshake
+_CONNECT_EVENT = 'connection.connect_tcp.complete'
+_TLS_EVENT = 'connection.start_tls.complete'
+
+def http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+class HttpTransport:
+    """Connection pool settings and the httpx clients built from them.
+
+    Without it the openai SDK builds a private pool per client with its own
+    limits, and the plain ``timeout`` seconds of each request applied to
+    connecting as much as to reading, so an unreachable endpoint held a
+    concurrency slot for the whole read budget. Here the pool is sized for
+    the run and keeps every connection alive (no TCP and TLS handshake
+    between calls), the sync client is shared by every translator given the
+    same transport, and each request's timeout is split into a short
+    connect budget and the request's own read budget. The async engine
+    keeps the SDK's own client unless the pool was ``configured``
+    explicitly; the split timeouts are sent with every request either way.
+    With ``http2``
+    requests are multiplexed over few connections; it needs the ``h2``
+    package and is negotiated over TLS, so plain ``http://`` endpoints
+    stay on HTTP/1.1.
+    """
+
+    def __init__(self, max_connections: int = DEFAULT_MAX_CONNECTIONS, max_keepalive: Optional[int] = None,
+                 keepalive_expiry: float = DEFAULT_KEEPALIVE_EXPIRY, http2: bool = False,
+                 connect_timeout: float = DEFAULT_CONNECT_TIMEOUT, read_timeout: Optional[float] = None,
+                 configured: bool = False):
+        if max_connections < 1:
+            raise ValueError("max_connections must be at least 1")
+        if http2 and not http2_available():
+            raise ValueError("HTTP/2 needs the h2 package: pip install 'httpx[http2]'")
+
+        self.max_connections = max_connections
+        # Keeping every connection alive is what avoids the handshakes
+        self.max_keepalive = max_connections if max_keepalive is None else max_keepalive
+        self.keepalive_expiry = keepalive_expiry
+        self.http2 = http2
+        self.connect_timeout = connect_timeout
+        # Overrides the per-request read budgets when set
+        self.read_timeout = read_timeout
+        # Pool size or HTTP/2 was asked for, so the async engine uses this pool too
+        self.configured = configured
+        self._client: Optional[httpx.Client] = None
+        self._lock = threading.Lock()
+        self.connections = 0
+        self.tls_handshakes = 0
+        self.versions = Counter()
+
+    @classmethod
+    def for_concurrency(cls, concurrency: int, max_connections: int = 0, http2: bool = False,
+                        **kwargs) -> 'HttpTransport':
+        """A transport with a pool large enough for ``concurrency`` requests in flight, unless sized explicitly."""
+        return cls(max_connections or max(DEFAULT_MAX_CONNECTIONS, concurrency), http2=http2,
+                   configured=bool(max_connections or http2), **kwargs)
+
+    def limits(self) -> httpx.Limits:
+        return httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_keepalive,
+                            keepalive_expiry=self.keepalive_expiry)
+
+    def timeout(self, read: float) -> httpx.Timeout:
+        """The timeout of one request: the shared connect budget and ``read`` seconds for the response.
+
+        Waiting for a free pooled connection is bounded by the read budget
+        as well, since the engine's semaphores already cap what is in flight.
+        """
+        read = self.read_timeout or read
+        return httpx.Timeout(read, connect=self.connect_timeout, pool=read)
+
+    def _trace(self, event: str, info: dict):
+        if event == _CONNECT_EVENT:
+            with self._lock:
+                self.connections += 1
+        elif event == _TLS_EVENT:
+            with self._lock:
+                self.tls_handshakes += 1
+
+    async def _trace_async(self, event: str, info: dict):
+        self._trace(event, info)
+
+    def _on_request(self, request: httpx.Request):
+        request.extensions['trace'] = self._trace
+
+    async def _on_request_async(self, request: httpx.Request):
+        request.extensions['trace'] = self._trace_async
+
+    def _on_response(self, response: httpx.Response):
+        with self._lock:
+            self.versions[response.http_version] += 1
+
+    async def _on_response_async(self, response: httpx.Response):
+        self._on_response(response)
+
+    def client(self) -> httpx.Client:
+        """The sync client, created on first use and shared from then on."""
+        with self._lock:
+            if self._client is None or self._client.is_closed:
+                self._client = httpx.Client(
+                    limits=self.limits(), timeout=self.timeout(60.0), http2=self.http2, follow_redirects=True,
+                    event_hooks={'request': [self._on_request], 'response': [self._on_response]})
+            return self._client
+
+    def async_client(self) -> httpx.AsyncClient:
+        """A new async client; it belongs to the running event loop, so one is built per asyncio run."""
+        return httpx.AsyncClient(
+            limits=self.limits(), timeout=self.timeout(60.0), http2=self.http2, follow_redirects=True,
+            event_hooks={'request': [self._on_request_async], 'response': [self._on_response_async]})
+
+    def close(self):
+        """Close the sync client and its pooled connections; a later call builds a new one."""
+        with self._lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+
+    def log_summary(self):
+        requests = sum(self.versions.values())
+        if not requests:
+            return
+
+        logger.info(f"🔌 Transport Summary:")
+        logger.info(f"   - Requests: {requests} over {self.connections} connections "
+                    f"({requests / max(1, self.connections):.1f} per connection)")
+        logger.info(f"   - Protocols: {', '.join(f'{version} {count}' for version, count in self.versions.most_common())}")
+        if self.tls_handshakes:
+            logger.info(f"   - TLS handshakes: {self.tls_handshakes}")
+        logger.info(f"   - Pool: {self.max_connections} connections, {self.max_keepalive} kept alive for "
+                    f"{self.keepalive_expiry:.0f}s, connect timeout {self.connect_timeout:.0f}s"
+                    f"{', HTTP/2' if self.http2 else ''}")
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Lint every ARB file of the l10n directory against the English file in a process pool
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from arb_corpus import DEFAULT_L10N_DIR, locale_of
+from placeholders import EMPTY_SIGNATURE, PlaceholderError, check, signature
+
+logger = logging.getLogger(__name__)
+
+# Check name -> severity; errors fail the run, warnings only with --fail-on warning
+CHECKS = {
+    'invalid-json': 'error',
+    'duplicate-key': 'error',
+    'locale': 'error',
+    'not-a-string': 'error',
+    'empty': 'error',
+    'placeholder': 'error',
+    'missing-key': 'warning',
+    'extra-key': 'warning',
+    'untranslated': 'warning',
+}
+
+# The English file, parsed once per worker process
+_base: Dict[str, str] = {}
+_signatures: Dict[str, object] = {}
+
+def _finding(locale: str, key: Optional[str], check_name: str, message: str) -> Dict[str, Optional[str]]:
+    return {'locale': locale, 'key': key, 'check': check_name, 'severity': CHECKS[check_name], 'message': message}
+
+def _load(path: Path) -> Tuple[Optional[List[Tuple[str, object]]], Optional[str]]:
+    """The ``(key, value)`` pairs of a file in order, duplicates included, or the parse error."""
+    try:
+        pairs = json.loads(path.read_bytes().decode('utf-8'), object_pairs_hook=lambda pairs: pairs)
+    except (UnicodeDecodeError, json.JSONDecodeError) as e:
+        return None, str(e)
+    if not isinstance(pairs, list):
+        return None, "top level is not an object"
+    return pairs, None
+
+def _init_worker(base_path: str):
+    """Parse the English file and its placeholder signatures once per process."""
+    pairs, _ = _load(Path(base_path))
+    _base.clear()
+    _signatures.clear()
+    for key, value in pairs or []:
+        if key.startswith('@') or not isinstance(value, str):
+            continue
+        _base[key] = value
+        try:
+            _signatures[key] = signature(value)
+        except PlaceholderError:
+            # Reported when the English file itself is linted
+            pass
+
+def lint_file(path: str) -> List[Dict[str, Optional[str]]]:
+    """All findings for one ARB file, compared with the English file of the worker."""
+    path = Path(path)
+    locale = locale_of(path)
+    is_base = locale == 'en'
+    pairs, error = _load(path)
+    if pairs is None:
+        return [_finding(locale, None, 'invalid-json', error)]
+
+    findings = []
+    seen = set()
+    for key, value in pairs:
+        if key in seen:
+            findings.append(_finding(locale, key, 'duplicate-key', "key appears more than once; the last value wins"))
+        seen.add(key)
+
+        if key == '@@locale':
+            if value != locale:
+                findings.append(_finding(locale, key, 'locale', f"@@locale is {value!r}, expected {locale!r}"))
+            continue
+        if key.startswith('@'):
+            # Message metadata ("@key": {...}) is not a translation
+            continue
+        if not isinstance(value, str):
+            findings.append(_finding(locale, key, 'not-a-string', f"value is {type(value).__name__}"))
+            continue
+
+        source = _base.get(key)
+        if not value.strip() and (source is None or source.strip()):
+            findings.append(_finding(locale, key, 'empty', "value is blank"))
+            continue
+        if is_base:
+            if key not in _signatures:
+                try:
+                    signature(value)
+                except PlaceholderError as e:
+                    findings.append(_finding(locale, key, 'placeholder', f"invalid ICU syntax: {e}"))
+            continue
+        if source is None:
+            findings.append(_finding(locale, key, 'extra-key', "key is not in intl_en.arb"))
+            continue
+
+        source_signature = _signatures.get(key)
+        if source_signature is not None and (source_signature is not EMPTY_SIGNATURE or '{' in value or '}' in value):
+            problem = check(source, value, source_signature)
+            if problem:
+                findings.append(_finding(locale, key, 'placeholder', problem))
+        # Strings without letters ("%", "-", "1/2") read the same in every language
+        if value == source and any(ch.isalpha() for ch in value):
+            findings.append(_finding(locale, key, 'untranslated', "value is identical to English"))
+
+    if '@@locale' not in seen:
+        findings.append(_finding(locale, '@@locale', 'locale', "@@locale is missing"))
+    if not is_base:
+        findings.extend(_finding(locale, key, 'missing-key', "key from intl_en.arb is missing")
+                        for key in _base if key not in seen)
+    return findings
+
+def lint(l10n_dir: str, files: Optional[List[str]] = None, workers: int = 0) -> List[Dict[str, Optional[str]]]:
+    """Lint ``files`` (default: every ``intl_*.arb`` of ``l10n_dir``), one file per task in a process pool.
+
+    ``workers`` 0 uses one process per CPU; 1 lints in this process.
+    """
+    base_path = Path(l10n_dir) / 'intl_en.arb'
+    paths = sorted(Path(l10n_dir).glob('intl_*.arb'))
+    if files:
+        selected = {Path(f).resolve() for f in files}
+        # A change to the English file affects every locale
+        if base_path.resolve() not in selected:
+            paths = [path for path in paths if path.resolve() in selected]
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(paths) == 1:
+        _init_worker(str(base_path))
+        results = [lint_file(str(path)) for path in paths]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(str(base_path),)) as pool:
+            results = list(pool.map(lint_file, [str(path) for path in paths], chunksize=max(1, len(paths) // (workers * 4))))
+    return [finding for result in results for finding in result]
+
+def main():
+    parser = argparse.ArgumentParser(description='Check ARB files for missing, extra, untranslated and broken entries')
+    parser.add_argument('files', nargs='*', help='ARB files to check (default: every intl_*.arb); '
+                                                 'intl_en.arb among them checks every file')
+    parser.add_argument('--l10n-dir', default=str(DEFAULT_L10N_DIR), help='Directory containing intl_*.arb files')
+    parser.add_argument('--workers', type=int, default=0, help='Worker processes (default: one per CPU; 1 runs in-process)')
+    parser.add_argument('--checks', nargs='+', choices=sorted(CHECKS), help='Only report these checks')
+    parser.add_argument('--fail-on', choices=('error', 'warning', 'never'), default='error',
+                        help='Lowest severity that makes the exit code non-zero (default: error)')
+    parser.add_argument('--json', action='store_true', help='Print findings as JSON')
+
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    findings = lint(args.l10n_dir, args.files, args.workers)
+    elapsed = time.perf_counter() - start
+    if args.checks:
+        findings = [finding for finding in findings if finding['check'] in args.checks]
+
+    if args.json:
+        print(json.dumps(findings, ensure_ascii=False, indent=2))
+    else:
+        for finding in findings:
+            print(f"{finding['severity']:<7} {finding['locale']:<8} {finding['check']:<13} "
+                  f"{finding['key'] or '-'}: {finding['message']}")
+        counts = {severity: sum(finding['severity'] == severity for finding in findings) for severity in ('error', 'warning')}
+        print(f"{counts['error']} errors, {counts['warning']} warnings in {elapsed * 1000:.0f} ms", file=sys.stderr)
+
+    failing = {'error': ('error',), 'warning': ('error', 'warning'), 'never': ()}[args.fail_on]
+    sys.exit(1 if any(finding['severity'] in failing for finding in findings) else 0)
+
+if __name__ == "__main__":
+    main()
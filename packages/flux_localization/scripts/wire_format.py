@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Compact batch payloads: short positional ids in place of ARB key names, JSON without whitespace
+"""
+
+import json
+from typing import Dict
+
+def wire_id(index: int) -> str:
+    """The id of the ``index``-th text of a batch; one token for any batch size in use."""
+    return str(index + 1)
+
+def wire_ids(texts: Dict[str, str]) -> Dict[str, str]:
+    """``{id: key}`` of a batch, ids following the order of ``texts``."""
+    return {wire_id(index): key for index, key in enumerate(texts)}
+
+def encode_payload(texts: Dict[str, str]) -> str:
+    """The texts of a batch as sent to the model: ``{"1":"...","2":"..."}``.
+
+    Blank texts are sent as ``""`` like any other entry: validation expects
+    every key of the batch back, and a blank answer is usable for them.
+    """
+    payload = {wire_id(index): text.strip() for index, text in enumerate(texts.values())}
+    return json.dumps(payload, ensure_ascii=False, separators=(',', ':'))
+
+def from_wire(data, texts: Dict[str, str]):
+    """Map the ids of a parsed response back to the keys of ``texts``.
+
+    Keys the model echoed by name are kept as they are; anything that is not
+    a JSON object is returned unchanged for validation to reject.
+    """
+    if not isinstance(data, dict):
+        return data
+    ids = wire_ids(texts)
+    return {key if key in texts else ids.get(key, key): value for key, value in data.items()}
+
+def encode_examples(examples: Dict[str, str]) -> str:
+    """Existing ``{English: translation}`` pairs sent along with a batch, in the same compact JSON."""
+    return json.dumps(examples, ensure_ascii=False, separators=(',', ':'))
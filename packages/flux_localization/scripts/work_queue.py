@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+SQLite work queue that lets several processes or machines share one translation run
+"""
+
+import argparse
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional
+
+from translation_memory import STATE_DIR
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUEUE_PATH = STATE_DIR / 'work_queue.sqlite3'
+# A claim not renewed for this long belongs to a crashed worker and is handed out again
+DEFAULT_LEASE_SECONDS = 300
+# A unit whose workers died this many times is given up; its keys stay missing until the next run
+MAX_ATTEMPTS = 3
+
+SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS jobs (
+        job TEXT PRIMARY KEY,
+        created REAL NOT NULL,
+        state TEXT NOT NULL,
+        base_hashes TEXT NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS locales (
+        job TEXT NOT NULL,
+        locale TEXT NOT NULL,
+        plan TEXT NOT NULL,
+        state TEXT NOT NULL,
+        writer TEXT,
+        PRIMARY KEY (job, locale)
+    );
+    CREATE TABLE IF NOT EXISTS units (
+        job TEXT NOT NULL,
+        locale TEXT NOT NULL,
+        batch INTEGER NOT NULL,
+        texts TEXT NOT NULL,
+        state TEXT NOT NULL,
+        owner TEXT,
+        lease_until REAL,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        translations TEXT,
+        methods TEXT,
+        PRIMARY KEY (job, locale, batch)
+    );
+    CREATE INDEX IF NOT EXISTS idx_units_state ON units (job, state, lease_until);
+'''
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+class WorkUnit(NamedTuple):
+    job: str
+    locale: str
+    batch: int
+    texts: Dict[str, str]
+
+class WorkQueue:
+    """Batches of one run as ``(locale, batch)`` units that workers claim under a lease.
+
+    A coordinator plans the run once and enqueues it as a job. Workers claim
+    units, renew their leases from a heartbeat thread while they translate,
+    and store each result in the queue, which is the run's shared
+    checkpoint: a unit is never translated twice unless its worker died,
+    in which case the lease runs out and another worker takes it over.
+    Once every unit of a locale is done, exactly one worker writes the
+    locale's ARB file, holding the database's write lock so the sync
+    manifest and the files are never written by two processes at once.
+    Several machines can share a job when the queue and the l10n directory
+    are on the same file system (SQLite needs working file locks there).
+    """
+
+    def __init__(self, db_path: Optional[str] = None, worker_id: Optional[str] = None,
+                 lease_seconds: float = DEFAULT_LEASE_SECONDS):
+        self.db_path = Path(db_path) if db_path else DEFAULT_QUEUE_PATH
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.worker_id = worker_id or default_worker_id()
+        self.lease_seconds = lease_seconds
+        self.claimed = 0
+        self.completed = 0
+        self.released = 0
+        self.written: List[str] = []
+        self.failed: List[str] = []
+        self._heartbeat: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+        self.conn = self._connect()
+        self.conn.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        # Autocommit; writes take the lock up front with BEGIN IMMEDIATE
+        conn = sqlite3.connect(str(self.db_path), timeout=60, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        return conn
+
+    @contextmanager
+    def _transaction(self, conn: Optional[sqlite3.Connection] = None) -> Iterator[sqlite3.Connection]:
+        conn = conn or self.conn
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+
+    def enqueue(self, plans: Dict[str, Dict], jobs: Dict[str, Dict[str, str]], base_hashes: Dict[str, str],
+                batch_size: int) -> str:
+        """Add a job: ``jobs`` holds ``{locale: {key: English}}``, split into units of ``batch_size`` keys.
+
+        ``plans`` carries what writing a locale needs (its file, missing and
+        changed keys); it is stored as given. Older open jobs are superseded:
+        the new plan already covers whatever they left undone.
+        """
+        job = time.strftime('%Y%m%d-%H%M%S') + f'-{os.getpid()}'
+        with self._transaction() as conn:
+            conn.execute("UPDATE jobs SET state = 'superseded' WHERE state = 'open'")
+            conn.execute('INSERT INTO jobs VALUES (?, ?, ?, ?)',
+                         (job, time.time(), 'open', json.dumps(base_hashes)))
+            for locale, texts in jobs.items():
+                conn.execute('INSERT INTO locales VALUES (?, ?, ?, ?, NULL)',
+                             (job, locale, json.dumps(plans[locale], ensure_ascii=False), 'open'))
+                items = list(texts.items())
+                conn.executemany('INSERT INTO units (job, locale, batch, texts, state) VALUES (?, ?, ?, ?, ?)', [
+                    (job, locale, batch, json.dumps(dict(items[start:start + batch_size]), ensure_ascii=False), 'pending')
+                    for batch, start in enumerate(range(0, len(items), batch_size))
+                ])
+        units = sum(-(-len(texts) // batch_size) for texts in jobs.values())
+        logger.info(f"📥 Enqueued job {job}: {units} units across {len(jobs)} languages in {self.db_path}")
+        return job
+
+    def active_job(self) -> Optional[str]:
+        """The most recent job that is not finished yet."""
+        row = self.conn.execute("SELECT job FROM jobs WHERE state = 'open' ORDER BY created DESC LIMIT 1").fetchone()
+        return row[0] if row else None
+
+    def claim(self, job: str, limit: int = 1) -> List[WorkUnit]:
+        """Take up to ``limit`` pending units, or units whose lease ran out, spreading them over locales."""
+        now = time.time()
+        with self._transaction() as conn:
+            # Units of a crashed worker too often are given up
+            conn.execute("""UPDATE units SET state = 'failed', owner = NULL
+                            WHERE job = ? AND state = 'claimed' AND lease_until < ? AND attempts >= ?""",
+                         (job, now, MAX_ATTEMPTS))
+            rows = conn.execute("""
+                SELECT locale, batch, texts FROM units
+                WHERE job = ? AND (state = 'pending' OR (state = 'claimed' AND lease_until < ?))
+                ORDER BY batch, locale LIMIT ?
+            """, (job, now, limit)).fetchall()
+            conn.executemany("""UPDATE units SET state = 'claimed', owner = ?, lease_until = ?, attempts = attempts + 1
+                                WHERE job = ? AND locale = ? AND batch = ?""",
+                             [(self.worker_id, now + self.lease_seconds, job, locale, batch) for locale, batch, _ in rows])
+        self.claimed += len(rows)
+        return [WorkUnit(job, locale, batch, json.loads(texts)) for locale, batch, texts in rows]
+
+    def complete(self, unit: WorkUnit, translations: Dict[str, str], methods: Dict[str, str]):
+        """Store a unit's result; a unit meanwhile taken over by another worker keeps that worker's claim."""
+        with self._transaction() as conn:
+            cursor = conn.execute("""
+                UPDATE units SET state = 'done', translations = ?, methods = ?, owner = NULL, lease_until = NULL
+                WHERE job = ? AND locale = ? AND batch = ? AND owner = ? AND state = 'claimed'
+            """, (json.dumps(translations, ensure_ascii=False), json.dumps(methods),
+                  unit.job, unit.locale, unit.batch, self.worker_id))
+        if cursor.rowcount:
+            self.completed += 1
+        else:
+            logger.warning(f"Lease on {unit.locale} batch {unit.batch} was lost; keeping the other worker's result")
+
+    def release(self, units: List[WorkUnit]):
+        """Hand claimed units back without a result, e.g. after an error or on shutdown."""
+        with self._transaction() as conn:
+            cursor = conn.executemany("""
+                UPDATE units SET state = 'pending', owner = NULL, lease_until = NULL, attempts = attempts - 1
+                WHERE job = ? AND locale = ? AND batch = ? AND owner = ? AND state = 'claimed'
+            """, [(unit.job, unit.locale, unit.batch, self.worker_id) for unit in units])
+        self.released += cursor.rowcount
+
+    @contextmanager
+    def write_lock(self) -> Iterator[None]:
+        """Hold the lock ``write_finished`` writes under, e.g. to update the shared sync manifest."""
+        with self._transaction():
+            yield
+
+    def write_finished(self, job: str, write: Callable[..., bool]) -> List[str]:
+        """Write every locale whose units are all finished and that no worker wrote yet.
+
+        ``write(locale, plan, sources, translations, methods, base_hashes)``
+        runs while this process holds the queue's write lock, so each locale
+        is written exactly once and writes never overlap. It returns whether
+        the file was written; a locale it could not write is marked
+        ``failed`` and its keys stay missing until the next run.
+        """
+        written = []
+        with self._transaction() as conn:
+            locales = [row[0] for row in conn.execute("""
+                SELECT locale FROM locales l WHERE job = ? AND state = 'open' AND NOT EXISTS (
+                    SELECT 1 FROM units u WHERE u.job = l.job AND u.locale = l.locale AND u.state IN ('pending', 'claimed'))
+            """, (job,))]
+            if locales:
+                (base_hashes,) = conn.execute('SELECT base_hashes FROM jobs WHERE job = ?', (job,)).fetchone()
+                base_hashes = json.loads(base_hashes)
+            for locale in locales:
+                (plan,) = conn.execute('SELECT plan FROM locales WHERE job = ? AND locale = ?', (job, locale)).fetchone()
+                sources, translations, methods = {}, {}, {}
+                for texts, unit_translations, unit_methods in conn.execute(
+                        'SELECT texts, translations, methods FROM units WHERE job = ? AND locale = ? ORDER BY batch',
+                        (job, locale)):
+                    sources.update(json.loads(texts))
+                    translations.update(json.loads(unit_translations or '{}'))
+                    methods.update(json.loads(unit_methods or '{}'))
+                if not write(locale, json.loads(plan), sources, translations, methods, base_hashes):
+                    logger.error(f"Could not write {locale}; its translations stay in job {job} of the queue")
+                    conn.execute("UPDATE locales SET state = 'failed', writer = ? WHERE job = ? AND locale = ?",
+                                 (self.worker_id, job, locale))
+                    self.failed.append(locale)
+                    continue
+                conn.execute("UPDATE locales SET state = 'written', writer = ? WHERE job = ? AND locale = ?",
+                             (self.worker_id, job, locale))
+                written.append(locale)
+            if not conn.execute("SELECT 1 FROM locales WHERE job = ? AND state = 'open' LIMIT 1", (job,)).fetchone():
+                conn.execute("UPDATE jobs SET state = 'done' WHERE job = ?", (job,))
+        self.written.extend(written)
+        return written
+
+    def is_done(self, job: str) -> bool:
+        """Whether a job needs no more work: finished, superseded or purged."""
+        row = self.conn.execute('SELECT state FROM jobs WHERE job = ?', (job,)).fetchone()
+        return row is None or row[0] != 'open'
+
+    def progress(self, job: str) -> Dict[str, int]:
+        """Unit counts by state; expired claims count as ``expired``."""
+        counts = Counter()
+        for state, expired, count in self.conn.execute("""
+                SELECT state, state = 'claimed' AND lease_until < ?, COUNT(*) FROM units WHERE job = ? GROUP BY 1, 2
+        """, (time.time(), job)):
+            counts['expired' if expired else state] += count
+        return dict(counts)
+
+    def _renew(self):
+        conn = self._connect()
+        try:
+            while not self._stop.wait(self.lease_seconds / 3):
+                with self._transaction(conn):
+                    conn.execute("UPDATE units SET lease_until = ? WHERE owner = ? AND state = 'claimed'",
+                                 (time.time() + self.lease_seconds, self.worker_id))
+        finally:
+            conn.close()
+
+    def start_heartbeat(self):
+        """Keep renewing this worker's leases from a background thread until ``close``."""
+        if self._heartbeat is None:
+            self._heartbeat = threading.Thread(target=self._renew, name='work-queue-heartbeat', daemon=True)
+            self._heartbeat.start()
+
+    def close(self):
+        self._stop.set()
+        if self._heartbeat:
+            self._heartbeat.join()
+            self._heartbeat = None
+        self.conn.close()
+
+    def log_summary(self):
+        if not self.claimed:
+            return
+
+        logger.info(f"📮 Work Queue Summary ({self.worker_id}):")
+        logger.info(f"   - Units claimed: {self.claimed}, completed: {self.completed}, released: {self.released}")
+        logger.info(f"   - Languages written by this worker: {len(self.written)}"
+                    f"{' (' + ', '.join(self.written) + ')' if self.written else ''}")
+        if self.failed:
+            logger.info(f"   - Languages that could not be written: {', '.join(self.failed)}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Show or clean up the shared translation work queue')
+    parser.add_argument('command', choices=('status', 'purge'),
+                        help='status: progress of every job; purge: delete finished and superseded jobs')
+    parser.add_argument('--queue', default=str(DEFAULT_QUEUE_PATH), help='Queue database (default: .l10n_state/work_queue.sqlite3)')
+
+    args = parser.parse_args()
+
+    queue = WorkQueue(args.queue)
+    jobs = queue.conn.execute('SELECT job, state FROM jobs ORDER BY created').fetchall()
+    if args.command == 'purge':
+        with queue._transaction() as conn:
+            finished = [job for job, state in jobs if state != 'open']
+            for job in finished:
+                for table in ('units', 'locales', 'jobs'):
+                    conn.execute(f'DELETE FROM {table} WHERE job = ?', (job,))
+        print(f"Purged {len(finished)} jobs")
+        return
+
+    for job, state in jobs:
+        counts = queue.progress(job)
+        workers = [row[0] for row in queue.conn.execute(
+            "SELECT DISTINCT owner FROM units WHERE job = ? AND state = 'claimed'", (job,))]
+        print(f"{job}  {state:<10} " + ' '.join(f"{name} {count}" for name, count in sorted(counts.items()))
+              + (f"  workers: {', '.join(workers)}" if workers else ''))
+
+if __name__ == "__main__":
+    main()